@@ -0,0 +1,132 @@
+"""Multi-day archive index, updated in O(1) per build.
+
+Layout under output/content/archive/:
+    index.json      {"schema_version", "months": [...], "recent": [...]}
+    {YYYY-MM}.json  {"schema_version", "month", "days": [...]} — sealed
+
+`recent` holds the entries of the current month, newest first; `months`
+lists the sealed segments, newest first. When a build for a new month comes
+in, the previous month's entries are rolled into their segment file. A
+build therefore touches at most one month of entries and never lists or
+reads past digests. A client reads index.json, then pages back through
+segments as needed.
+
+An entry summarizes one day's digest: its date and path, and for each story
+the ID, headlines and the available levels with their audio durations.
+Rebuilding a day replaces its entry.
+"""
+
+import logging
+from collections.abc import Callable
+from pathlib import Path
+
+from backend.storage import read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA_VERSION = 1
+
+
+def archive_entry(digest: dict) -> dict:
+    """Compact index entry for one day's digest."""
+    return {
+        "date": digest["date"],
+        "digest": f"{digest['date']}/digest.json",
+        "stories": [
+            {
+                "id": story["id"],
+                "headline_de": story["headline_de"],
+                "headline_en": story["headline_en"],
+                "levels": {
+                    level: content.get("audio_duration_seconds")
+                    for level, content in story["levels"].items()
+                },
+            }
+            for story in digest["stories"]
+        ],
+    }
+
+
+def _read_index(archive_dir: Path) -> dict:
+    path = archive_dir / "index.json"
+    if path.exists():
+        return read_json(path)
+    return {"schema_version": ARCHIVE_SCHEMA_VERSION, "months": [], "recent": []}
+
+
+def _seal_month(archive_dir: Path, month: str, entries: list[dict]) -> None:
+    """Merge entries into a month's segment (a late rebuild may reopen one)."""
+    path = archive_dir / f"{month}.json"
+    days = read_json(path)["days"] if path.exists() else []
+    dates = {e["date"] for e in entries}
+    days = sorted(
+        entries + [d for d in days if d["date"] not in dates],
+        key=lambda d: d["date"], reverse=True,
+    )
+    write_json_atomic(
+        path, {"schema_version": ARCHIVE_SCHEMA_VERSION, "month": month, "days": days},
+    )
+    logger.info("Archived %d days into %s", len(entries), path.name)
+
+
+def _add_entry(archive_dir: Path, index: dict, entry: dict) -> None:
+    """Put entry into index (or its sealed month), rolling months as needed."""
+    month = entry["date"][:7]
+    recent_month = index["recent"][0]["date"][:7] if index["recent"] else month
+
+    if month < recent_month:
+        # Rebuild of a day in an already sealed month
+        _seal_month(archive_dir, month, [entry])
+        index["months"] = sorted(set(index["months"]) | {month}, reverse=True)
+    else:
+        if month > recent_month:
+            _seal_month(archive_dir, recent_month, index["recent"])
+            index["months"] = sorted(set(index["months"]) | {recent_month}, reverse=True)
+            index["recent"] = []
+        others = [e for e in index["recent"] if e["date"] != entry["date"]]
+        index["recent"] = sorted([entry, *others], key=lambda e: e["date"], reverse=True)
+
+
+def update_archive(digest: dict, content_root: Path) -> None:
+    """Add (or replace) the digest's day in the archive index."""
+    archive_dir = content_root / "archive"
+    index = _read_index(archive_dir)
+    _add_entry(archive_dir, index, archive_entry(digest))
+    write_json_atomic(archive_dir / "index.json", index)
+
+
+def merge_published(
+    content_root: Path,
+    published: dict,
+    read_segment: Callable[[str], dict | None],
+) -> None:
+    """Fold a published archive index into the local one.
+
+    A build that only has today's content (a CI run) has an archive of
+    today alone; publishing it as is would replace the full published index.
+    Days the local archive lacks are taken from published, and local
+    segments are completed from their published copies (read_segment(month)
+    returns one, or None). Local entries win for a date both have. Only
+    segments that exist locally are read.
+    """
+    archive_dir = content_root / "archive"
+    index = _read_index(archive_dir)
+    for month in published["months"]:
+        if (archive_dir / f"{month}.json").exists() and (segment := read_segment(month)):
+            local = read_json(archive_dir / f"{month}.json")["days"]
+            dates = {d["date"] for d in local}
+            _seal_month(
+                archive_dir, month, local + [d for d in segment["days"] if d["date"] not in dates],
+            )
+    index["months"] = sorted(set(index["months"]) | set(published["months"]), reverse=True)
+
+    def known(date: str) -> bool:
+        segment = archive_dir / f"{date[:7]}.json"
+        return any(e["date"] == date for e in index["recent"]) or (
+            segment.exists() and any(d["date"] == date for d in read_json(segment)["days"])
+        )
+
+    for entry in sorted(published["recent"], key=lambda e: e["date"]):
+        if not known(entry["date"]):
+            _add_entry(archive_dir, index, entry)
+    write_json_atomic(archive_dir / "index.json", index)
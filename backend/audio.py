@@ -1,39 +1,107 @@
 import asyncio
 import logging
-import re
+import os
 import subprocess
 import tempfile
-from dataclasses import replace
+from collections.abc import Callable
+from dataclasses import dataclass, replace
 from pathlib import Path
 
 from mutagen.mp3 import MP3
 from openai import AsyncOpenAI
 
-from backend.models import LevelContent, ProcessedStory
+from backend import cefr, mp3
+from backend.models import AudioFile, LevelContent, ProcessedStory, SentenceTiming
+from backend.tts import TtsEngine, default_engine
 
 logger = logging.getLogger(__name__)
 
 TTS_MAX_CHARS = 4096
 
 
+@dataclass(frozen=True, slots=True)
+class Rendition:
+    extension: str
+    mime_type: str  # as passed to canPlayType() in the frontend
+    codec_args: tuple[str, ...]
+
+
+# Published audio formats. All are mono speech; Opus at 24 kbps is about half
+# the size of the MP3 at similar intelligibility.
+RENDITIONS = {
+    "opus-webm": Rendition(
+        ".webm", 'audio/webm; codecs="opus"',
+        ("-c:a", "libopus", "-b:a", "24k", "-application", "voip"),
+    ),
+    "opus-ogg": Rendition(
+        ".ogg", 'audio/ogg; codecs="opus"',
+        ("-c:a", "libopus", "-b:a", "24k", "-application", "voip"),
+    ),
+    # HE-AAC needs an ffmpeg built with libfdk_aac; aac-m4a uses the native
+    # encoder (AAC-LC) available everywhere. Every rendition needs its own
+    # extension, since it names the file (rendition_path)
+    "he-aac-m4a": Rendition(
+        ".he.m4a", 'audio/mp4; codecs="mp4a.40.5"',
+        ("-c:a", "libfdk_aac", "-profile:a", "aac_he", "-b:a", "24k",
+         "-movflags", "+faststart"),
+    ),
+    "aac-m4a": Rendition(
+        ".m4a", 'audio/mp4; codecs="mp4a.40.2"',
+        ("-c:a", "aac", "-b:a", "40k", "-movflags", "+faststart"),
+    ),
+    "mp3": Rendition(
+        ".mp3", "audio/mpeg",
+        ("-ab", "48k", "-ar", "22050"),  # 48kbps, 22kHz sample rate
+    ),
+}
+# MP3 is always produced: it's the fallback every browser plays, and the
+# file audio_url points to
+FALLBACK_FORMAT = "mp3"
+DEFAULT_FORMATS = (FALLBACK_FORMAT,)
+# What the mp3 rendition encodes to; TTS output already in this format is
+# spliced into the published MP3 as is
+MP3_SAMPLE_RATE = 22050
+MP3_BITRATE_KBPS = 48
+
+
+def audio_formats(names: list[str]) -> tuple[str, ...]:
+    """Validate a format ladder (most preferred first), adding the MP3 fallback."""
+    unknown = [n for n in names if n not in RENDITIONS]
+    if unknown:
+        raise ValueError(f"Unknown audio formats: {', '.join(unknown)}")
+    ladder = tuple(dict.fromkeys(names))
+    return ladder if FALLBACK_FORMAT in ladder else (*ladder, FALLBACK_FORMAT)
+
+
+def rendition_path(output_path: Path, name: str) -> Path:
+    """Where a rendition of output_path (the MP3) is written."""
+    return output_path.with_suffix(RENDITIONS[name].extension)
+
+
+def encode_renditions(
+    input_path: Path, output_path: Path, formats: tuple[str, ...] = DEFAULT_FORMATS,
+) -> None:
+    """Encode every rendition from a single ffmpeg decode of input_path."""
+    cmd = ["ffmpeg", "-y", "-i", str(input_path)]
+    for name in formats:
+        cmd += [
+            "-ac", "1",  # mono
+            *RENDITIONS[name].codec_args,
+            str(rendition_path(output_path, name)),
+        ]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
 def reencode_mp3(input_path: Path, output_path: Path) -> None:
     """Re-encode MP3 to mono 48kbps 22kHz using ffmpeg."""
-    subprocess.run(
-        [
-            "ffmpeg", "-y",
-            "-i", str(input_path),
-            "-ac", "1",       # mono
-            "-ab", "48k",     # 48kbps
-            "-ar", "22050",   # 22kHz sample rate
-            str(output_path),
-        ],
-        check=True,
-        capture_output=True,
-    )
+    encode_renditions(input_path, output_path, (FALLBACK_FORMAT,))
 
 
 def concat_mp3s(input_paths: list[Path], output_path: Path) -> None:
-    """Concatenate multiple MP3 files using ffmpeg."""
+    """Concatenate multiple MP3 files using ffmpeg.
+
+    Fallback for chunks backend.mp3 can't splice.
+    """
     with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
         list_path = Path(f.name)
         for p in input_paths:
@@ -61,7 +129,7 @@ def chunk_text(text: str, max_chars: int = TTS_MAX_CHARS) -> list[str]:
     if len(text) <= max_chars:
         return [text]
 
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = split_sentences(text)
     chunks = []
     current = ""
 
@@ -78,106 +146,292 @@ def chunk_text(text: str, max_chars: int = TTS_MAX_CHARS) -> list[str]:
     return chunks
 
 
+def split_sentences(text: str) -> list[str]:
+    """Sentences of text, by backend.cefr's rule (ordinals and "z. B." stay whole)."""
+    return [s.strip() for s in cefr.split_sentences(text) if s.strip()]
+
+
+def sentence_index(
+    text: str, chunks: list[str], durations: list[float], total: float,
+) -> tuple[SentenceTiming, ...]:
+    """Seek index from per-chunk TTS durations.
+
+    Chunk durations are measured on the raw TTS output; they're scaled so
+    they add up to the duration of the final encoded file.
+    """
+    raw_total = sum(durations)
+    scale = total / raw_total if raw_total else 1.0
+    timings = []
+    pos, t = 0, 0.0
+    for chunk, duration in zip(chunks, durations):
+        char_start = text.find(chunk, pos)
+        if char_start < 0:
+            char_start = pos
+        char_end = char_start + len(chunk)
+        end = t + duration * scale
+        timings.append(SentenceTiming(char_start, char_end, round(t, 2), round(end, 2)))
+        pos, t = char_end, end
+    return tuple(timings)
+
+
 def get_mp3_duration(path: Path) -> float:
-    """Get duration of an MP3 file in seconds using mutagen."""
-    audio = MP3(path)
-    return audio.info.length
+    """Duration of an MP3 file in seconds, exact from its frame count.
 
+    Falls back to mutagen for files backend.mp3 can't parse.
+    """
+    try:
+        return mp3.duration(path)
+    except ValueError:
+        return MP3(path).info.length
 
-async def _generate_tts_chunk(
-    client: AsyncOpenAI, voice: str, text: str, output_path: Path
-) -> None:
-    """Generate TTS for a single chunk of text."""
-    response = await client.audio.speech.create(
-        model="tts-1",
-        voice=voice,
-        input=text,
-    )
-    response.stream_to_file(str(output_path))
 
+def max_chars(engine: TtsEngine | None) -> int:
+    """Longest text one TTS request of engine takes (default: OpenAI's)."""
+    return engine.max_chars if engine else TTS_MAX_CHARS
 
-async def generate_single_audio(
+
+async def generate_tts_chunk(
     client: AsyncOpenAI,
     voice: str,
-    text_de: str,
+    text: str,
     output_path: Path,
-) -> tuple[str, float]:
-    """Generate TTS audio for a text, chunking if needed, then re-encode."""
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    engine: TtsEngine | None = None,
+) -> None:
+    """Generate TTS for a single chunk of text.
+
+    Without an engine, client is used through its shared default engine
+    (backend.tts.default_engine).
+    """
+    engine = engine or default_engine(client)
+    output_path.write_bytes(await engine.synthesize(text, voice))
 
-    chunks = chunk_text(text_de)
-    tmp_paths: list[Path] = []
 
+def temp_mp3_path() -> Path:
+    """A new, empty temporary .mp3 file; the caller removes it."""
+    fd, name = tempfile.mkstemp(suffix=".mp3")
+    os.close(fd)
+    return Path(name)
+
+
+def _read_chunks(chunk_paths: list[Path]) -> list[mp3.Mp3Stream] | None:
     try:
-        for i, chunk in enumerate(chunks):
-            tmp = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-            tmp_path = Path(tmp.name)
-            tmp.close()
-            tmp_paths.append(tmp_path)
-            await _generate_tts_chunk(client, voice, chunk, tmp_path)
-
-        if len(tmp_paths) == 1:
-            raw_path = tmp_paths[0]
-        else:
-            raw_file = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-            raw_path = Path(raw_file.name)
-            raw_file.close()
-            tmp_paths.append(raw_path)
-            concat_mp3s(tmp_paths[:-1], raw_path)
+        return [mp3.read(p) for p in chunk_paths]
+    except ValueError as e:
+        logger.debug("Can't splice TTS chunks (%s), using ffmpeg", e)
+        return None
+
+
+def assemble_audio(
+    chunk_paths: list[Path],
+    output_path: Path,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+) -> None:
+    """Join raw TTS chunks in order and encode every published rendition.
 
-        reencode_mp3(raw_path, output_path)
+    Chunks are joined frame by frame (backend.mp3). If they are already in
+    the published MP3 format, the joined stream is the MP3 and only the
+    other renditions are encoded; otherwise it is re-encoded once. ffmpeg's
+    concat demuxer is the fallback for chunks that can't be spliced.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    streams = _read_chunks(chunk_paths)
+    if streams and all(s.matches(MP3_SAMPLE_RATE, MP3_BITRATE_KBPS) for s in streams):
+        mp3.splice(streams, output_path)
+        others = tuple(f for f in formats if f != FALLBACK_FORMAT)
+        if others:
+            encode_renditions(output_path, output_path, others)
+        return
+    if len(chunk_paths) == 1:
+        encode_renditions(chunk_paths[0], output_path, formats)
+        return
+
+    raw_path = temp_mp3_path()
+    try:
+        try:
+            if streams is None:
+                raise ValueError("unparseable chunks")
+            mp3.splice(streams, raw_path)
+        except ValueError:
+            concat_mp3s(chunk_paths, raw_path)
+        encode_renditions(raw_path, output_path, formats)
+    finally:
+        raw_path.unlink(missing_ok=True)
+
+
+def audio_url(audio_path: str | Path, output_dir: Path) -> str:
+    """Path relative to the output root (includes content/ prefix for site URL)."""
+    output_root = output_dir.parent.parent  # output/content/{date} → output/
+    return str(Path(audio_path).relative_to(output_root))
+
+
+def audio_files(
+    audio_path: str | Path, output_dir: Path, formats: tuple[str, ...],
+) -> tuple[AudioFile, ...]:
+    """The renditions written next to audio_path, in ladder order."""
+    files = []
+    for name in formats:
+        path = rendition_path(Path(audio_path), name)
+        if path.exists():
+            files.append(AudioFile(
+                url=audio_url(path, output_dir),
+                mime_type=RENDITIONS[name].mime_type,
+                size_bytes=path.stat().st_size,
+            ))
+    return tuple(files)
+
+
+async def _synthesize(
+    client: AsyncOpenAI,
+    voice: str,
+    chunks: list[str],
+    output_path: Path,
+    formats: tuple[str, ...],
+    measure: bool = False,
+    engine: TtsEngine | None = None,
+) -> list[float]:
+    """TTS all chunks concurrently and assemble them in order.
+
+    With measure=True, returns each raw chunk's duration.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_paths = [temp_mp3_path() for _ in chunks]
+    try:
+        results = await asyncio.gather(
+            *[
+                generate_tts_chunk(client, voice, chunk, path, engine)
+                for chunk, path in zip(chunks, tmp_paths)
+            ],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        # Parsing and encoding block; keep them off the event loop
+        durations = [
+            await asyncio.to_thread(get_mp3_duration, p) for p in tmp_paths
+        ] if measure else []
+        await asyncio.to_thread(assemble_audio, tmp_paths, output_path, formats)
     finally:
         for p in tmp_paths:
             p.unlink(missing_ok=True)
+    return durations
+
 
-    duration = get_mp3_duration(output_path)
+async def generate_single_audio(
+    client: AsyncOpenAI,
+    voice: str,
+    text_de: str,
+    output_path: Path,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    engine: TtsEngine | None = None,
+) -> tuple[str, float]:
+    """Generate TTS audio for a text, chunking if needed, then re-encode.
+
+    output_path is the MP3; other renditions in formats are written next to it.
+    engine defaults to OpenAI TTS through client.
+    """
+    chunks = chunk_text(text_de, max_chars(engine))
+    await _synthesize(client, voice, chunks, output_path, formats, engine=engine)
+
+    duration = await asyncio.to_thread(get_mp3_duration, output_path)
     logger.info("Generated audio: %s (%.1fs, %d chunks)", output_path.name, duration, len(chunks))
     return str(output_path), duration
 
 
+async def generate_aligned_audio(
+    client: AsyncOpenAI,
+    voice: str,
+    text_de: str,
+    output_path: Path,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    engine: TtsEngine | None = None,
+) -> tuple[str, float, tuple[SentenceTiming, ...]]:
+    """Like generate_single_audio, one TTS request per sentence, plus a seek index."""
+    sentences = split_sentences(text_de)
+    durations = await _synthesize(
+        client, voice, sentences, output_path, formats, measure=True, engine=engine,
+    )
+
+    duration = await asyncio.to_thread(get_mp3_duration, output_path)
+    logger.info(
+        "Generated aligned audio: %s (%.1fs, %d sentences)",
+        output_path.name, duration, len(sentences),
+    )
+    return str(output_path), duration, sentence_index(text_de, sentences, durations, duration)
+
+
+async def generate_level_audio(
+    client: AsyncOpenAI,
+    voice: str,
+    text_de: str,
+    output_path: Path,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    align: bool = False,
+    engine: TtsEngine | None = None,
+) -> tuple[str, float, tuple[SentenceTiming, ...]]:
+    """Audio for one level; the seek index is empty unless align is set."""
+    if align:
+        return await generate_aligned_audio(
+            client, voice, text_de, output_path, formats, engine,
+        )
+    path, duration = await generate_single_audio(
+        client, voice, text_de, output_path, formats, engine,
+    )
+    return path, duration, ()
+
+
 async def generate_audio_for_story(
     story: ProcessedStory,
     client: AsyncOpenAI,
     voice: str,
     output_dir: Path,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    align: bool = False,
+    engine: TtsEngine | None = None,
+    skip_levels: frozenset[int] = frozenset(),
+    progress: Callable[[ProcessedStory], None] | None = None,
 ) -> ProcessedStory:
-    """Generate audio for all levels of a story in parallel."""
-    tasks = {}
-    for level_num, content in story.levels.items():
-        output_path = output_dir / story.id / f"level-{level_num}.mp3"
-        tasks[level_num] = generate_single_audio(
-            client, voice, content.text_de, output_path,
-        )
-
-    results = await asyncio.gather(
-        *[tasks[k] for k in sorted(tasks.keys())],
-        return_exceptions=True,
-    )
+    """Generate audio for all levels of a story in parallel.
 
+    With align, each level is synthesized sentence by sentence and gets a
+    per-sentence seek index. Levels in skip_levels are published without
+    audio (see backend.budget). progress, if given, is called with the
+    story so far as each level's audio is done.
+    """
     updated_levels = dict(story.levels)
-    for level_num, result in zip(sorted(tasks.keys()), results):
-        if isinstance(result, Exception):
-            logger.warning(
-                "TTS failed for story %s level %d: %s",
-                story.id, level_num, result,
+    level_of = {
+        asyncio.create_task(generate_level_audio(
+            client, voice, story.levels[level_num].text_de,
+            output_dir / story.id / f"level-{level_num}.mp3", formats, align, engine,
+        )): level_num
+        for level_num in sorted(story.levels) if level_num not in skip_levels
+    }
+    remaining = set(level_of)
+    try:
+        while remaining:
+            finished, remaining = await asyncio.wait(
+                remaining, return_when=asyncio.FIRST_COMPLETED,
             )
-            continue
-
-        audio_path, duration = result
-        # Store path relative to output root (includes content/ prefix for site URL)
-        output_root = output_dir.parent.parent  # output/content/{date} → output/
-        rel_path = str(Path(audio_path).relative_to(output_root))
-        updated_levels[level_num] = replace(
-            updated_levels[level_num],
-            audio_url=rel_path,
-            audio_duration_seconds=round(duration, 1),
-        )
-
-    return ProcessedStory(
-        id=story.id,
-        headline_de=story.headline_de,
-        headline_en=story.headline_en,
-        summary_en=story.summary_en,
-        source_url=story.source_url,
-        levels=updated_levels,
-    )
+            for task in finished:
+                level_num = level_of[task]
+                if task.exception() is not None:
+                    logger.warning(
+                        "TTS failed for story %s level %d: %s",
+                        story.id, level_num, task.exception(),
+                    )
+                    continue
+                audio_path, duration, sentences = task.result()
+                updated_levels[level_num] = replace(
+                    updated_levels[level_num],
+                    audio_url=audio_url(audio_path, output_dir),
+                    audio_duration_seconds=round(duration, 1),
+                    audio_files=audio_files(audio_path, output_dir, formats),
+                    sentences=sentences,
+                )
+                if progress is not None:
+                    progress(replace(story, levels=dict(updated_levels)))
+    finally:
+        # Cancelled while waiting: don't leave TTS running
+        for task in remaining:
+            task.cancel()
+    return replace(story, levels=updated_levels)
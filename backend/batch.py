@@ -0,0 +1,329 @@
+"""Batch-API level generation for builds where throughput beats latency.
+
+Every pending prompt of a generation wave is staged as one line of a JSONL
+file, uploaded (files.create, purpose="batch"), submitted
+(batches.create) and polled until the provider finishes; the results are
+then fanned back out by custom_id and parsed into their response models
+(backend.responses). The C1 → B1 → A1 chain needs one wave
+per level, and translations ride along with the next level's wave:
+
+    wave 1: C1
+    wave 2: B1, translate C1
+    wave 3: A1, translate B1
+    wave 4: translate A1
+
+Each wave's JSONL and batch ID are kept under the work directory, so a
+rerun after a crash polls the batch already submitted instead of paying
+for it again. The batch is only reused if it was built from the same
+requests (compared by a hash of the JSONL); a rerun with other stories,
+or with earlier texts changed by retries or corrections, resubmits.
+Requests that fail are retried interactively, and replies that don't
+parse get one interactive repair call (to the escalation model where
+backend.routing configures one), as do CEFR corrections — all a small
+fraction of the calls.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from openai import OpenAI
+from openai.types import CompletionUsage
+
+from backend.levels import (
+    LEVEL_TASKS,
+    TRANSLATE_TASK,
+    call_structured,
+    chat_params,
+    enforce_level,
+    repair,
+)
+from backend.metrics import metrics
+from backend.models import LevelContent, ProcessedStory, RawStory
+from backend.prompts import LEVEL_PROMPTS, TRANSLATION_PROMPT
+from backend.responses import LevelResponse, ResponseError, parse, response_for
+from backend.routing import ModelRoutes, as_routes
+from backend.storage import read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+POLL_SECONDS = 30.0
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# Interactive retries and corrections between waves
+FALLBACK_WORKERS = 8
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    prompt: str
+    task: str
+
+
+@dataclass(slots=True)
+class _StoryState:
+    raw: RawStory
+    texts: dict[int, str] = field(default_factory=dict)
+    english: dict[int, str] = field(default_factory=dict)
+    header: LevelResponse | None = None
+
+
+def _custom_id(story_id: str, task: str) -> str:
+    return f"{story_id}/{task}"
+
+
+class BatchRunner:
+    """Submits one JSONL batch per wave and waits for its results."""
+
+    def __init__(
+        self, client: OpenAI, work_dir: Path, poll_interval: float = POLL_SECONDS,
+    ):
+        self.client = client
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+
+    def _submit(self, name: str, lines: list[dict]) -> str:
+        jsonl_path = self.work_dir / f"{name}.jsonl"
+        state_path = self.work_dir / f"{name}.json"
+        data = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+        digest = hashlib.sha256(data.encode()).hexdigest()
+        if state_path.exists():
+            state = read_json(state_path)
+            if state.get("sha256") == digest:
+                logger.info("Resuming batch %s for %s", state["batch_id"], name)
+                return state["batch_id"]
+            logger.info("Requests for %s changed, not resuming its batch", name)
+
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        jsonl_path.write_text(data, encoding="utf-8")
+        uploaded = self.client.files.create(
+            file=(jsonl_path.name, data.encode()), purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        write_json_atomic(state_path, {
+            "batch_id": batch.id, "input_file_id": uploaded.id, "sha256": digest,
+        })
+        logger.info("Submitted batch %s for %s (%d requests)", batch.id, name, len(lines))
+        return batch.id
+
+    def _wait(self, batch_id: str):
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+            logger.info(
+                "Batch %s %s, polling again in %.0fs",
+                batch_id, batch.status, self.poll_interval,
+            )
+            time.sleep(self.poll_interval)
+
+    def _read_file(self, file_id: str | None) -> list[dict]:
+        if not file_id:
+            return []
+        text = self.client.files.content(file_id).text
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def run(self, name: str, requests: dict[str, dict]) -> dict[str, dict]:
+        """Run {custom_id: chat params} as one batch.
+
+        Returns {custom_id: chat completion body} for the requests that
+        succeeded; the rest are missing from the result.
+        """
+        if not requests:
+            return {}
+        lines = [
+            {"custom_id": cid, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+            for cid, body in requests.items()
+        ]
+        start = time.monotonic()
+        batch = self._wait(self._submit(name, lines))
+        if batch.status != "completed":
+            logger.error("Batch %s for %s ended %s", batch.id, name, batch.status)
+
+        results = {}
+        for line in self._read_file(getattr(batch, "output_file_id", None)):
+            response = line.get("response") or {}
+            if response.get("status_code") == 200 and line.get("custom_id") in requests:
+                results[line["custom_id"]] = response["body"]
+        errors = self._read_file(getattr(batch, "error_file_id", None))
+        logger.info(
+            "Batch %s done in %.0fs: %d/%d succeeded, %d errors",
+            name, time.monotonic() - start, len(results), len(requests), len(errors),
+        )
+        return results
+
+
+def _parse(body: dict, job: Job, model: str) -> tuple[object, str, list[str]]:
+    """(response, reply, problems) of a batch result; response is None on problems."""
+    usage = body.get("usage")
+    # Batch usage is recorded under its own task names: its wall time says
+    # nothing about interactive latency, which the scheduler learns from
+    metrics.record_llm(
+        f"batch-{job.task}", model,
+        CompletionUsage.model_validate(usage) if usage else None, 0.0,
+    )
+    try:
+        reply = body["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError) as e:
+        return None, "", [f"no reply: {e!r}"]
+    try:
+        return parse(response_for(job.task), reply), reply, []
+    except ResponseError as e:
+        return None, reply, e.problems
+
+
+def run_wave(
+    runner: BatchRunner,
+    client: OpenAI,
+    routes: ModelRoutes,
+    name: str,
+    jobs: dict[str, Job],
+) -> dict[str, object]:
+    """Run jobs through one batch; returns {custom_id: parsed response}.
+
+    Failed requests are retried interactively and unusable replies
+    repaired; a job that still has no usable result is left out.
+    """
+    requests = {
+        cid: chat_params(routes.for_task(job.task).primary, job.prompt, job.task)
+        for cid, job in jobs.items()
+    }
+    bodies = runner.run(name, requests)
+
+    results: dict[str, object] = {}
+    # None to resend, (reply, problems) to repair
+    retries: dict[str, tuple[str, list[str]] | None] = {}
+    for cid, job in jobs.items():
+        route = routes.for_task(job.task)
+        if cid not in bodies:
+            retries[cid] = None
+            continue
+        result, reply, problems = _parse(bodies[cid], job, route.primary)
+        if problems:
+            retries[cid] = (reply, problems)
+        else:
+            results[cid] = result
+
+    def retry(cid: str):
+        job = jobs[cid]
+        if retries[cid] is None:
+            return call_structured(client, routes, job.prompt, job.task)
+        reply, problems = retries[cid]
+        return repair(client, routes.for_task(job.task), job.prompt, job.task, reply, problems)
+
+    if retries:
+        logger.info("Retrying %d requests of %s interactively", len(retries), name)
+        with ThreadPoolExecutor(FALLBACK_WORKERS) as pool:
+            futures = {cid: pool.submit(retry, cid) for cid in retries}
+        for cid, future in futures.items():
+            try:
+                results[cid] = future.result()
+            except ResponseError as e:
+                logger.warning("Unusable result for %s: %s", cid, e)
+            except Exception:
+                logger.exception("Request %s failed", cid)
+    return results
+
+
+def generate_levels_batch(
+    stories: list[RawStory],
+    client: OpenAI,
+    model: str | ModelRoutes,
+    work_dir: Path,
+    translate: bool = True,
+    validate: bool = True,
+    poll_interval: float = POLL_SECONDS,
+) -> dict[str, ProcessedStory]:
+    """generate_levels for many stories at once, through the batch API.
+
+    Returns {story_id: ProcessedStory} for the stories whose levels all
+    came through; the others are logged and left out.
+    """
+    routes = as_routes(model)
+    runner = BatchRunner(client, work_dir, poll_interval)
+    states = {s.id: _StoryState(s) for s in stories}
+    for story in stories:
+        metrics.record_source(story.full_text)
+
+    for wave, level in enumerate((3, 2, 1, None), start=1):
+        jobs: dict[str, Job] = {}
+        for story_id, state in states.items():
+            if level == 3:
+                prompt = LEVEL_PROMPTS[3].format(article_text=state.raw.full_text)
+            elif level is not None and level + 1 in state.texts:
+                prompt = LEVEL_PROMPTS[level].format(previous_text=state.texts[level + 1])
+            else:
+                prompt = None
+            if prompt is not None:
+                task = LEVEL_TASKS[level]
+                jobs[_custom_id(story_id, task)] = Job(prompt, task)
+            previous = (level + 1) if level is not None else 1
+            if translate and previous in state.texts:
+                jobs[_custom_id(story_id, f"{TRANSLATE_TASK}-{previous}")] = Job(
+                    TRANSLATION_PROMPT.format(text_de=state.texts[previous]),
+                    TRANSLATE_TASK,
+                )
+        results = run_wave(runner, client, routes, f"wave-{wave}", jobs)
+
+        for story_id, state in states.items():
+            if level is not None and _custom_id(story_id, LEVEL_TASKS[level]) in results:
+                result = results[_custom_id(story_id, LEVEL_TASKS[level])]
+                if level == 3:
+                    state.header = result
+                state.texts[level] = result.text_de
+            previous = (level + 1) if level is not None else 1
+            translated = results.get(_custom_id(story_id, f"{TRANSLATE_TASK}-{previous}"))
+            if translated is not None:
+                state.english[previous] = translated.text_en
+
+        if validate and level in (2, 1):
+            _enforce(client, routes, level, states)
+
+    processed = {}
+    for story_id, state in states.items():
+        missing = [n for n in (3, 2, 1) if n not in state.texts]
+        if translate:
+            missing += [f"{n}/en" for n in (3, 2, 1) if n not in state.english]
+        if missing:
+            logger.error(
+                "Story %s incomplete after batch (missing %s), dropping", story_id, missing,
+            )
+            continue
+        processed[story_id] = ProcessedStory(
+            id=story_id,
+            headline_de=state.header.headline_de or state.raw.title,
+            headline_en=state.header.headline_en,
+            summary_en=state.header.summary_en,
+            source_url=state.raw.link,
+            levels={
+                n: LevelContent(text_de=state.texts[n], text_en=state.english.get(n, ""))
+                for n in (3, 2, 1)
+            },
+        )
+    logger.info("Batch generated levels for %d/%d stories", len(processed), len(stories))
+    return processed
+
+
+def _enforce(
+    client: OpenAI, routes: ModelRoutes, level: int, states: dict[str, _StoryState],
+) -> None:
+    """CEFR-check one level of every story, correcting interactively."""
+    pending = {sid: s for sid, s in states.items() if level in s.texts}
+    with ThreadPoolExecutor(FALLBACK_WORKERS) as pool:
+        futures = {
+            sid: pool.submit(enforce_level, client, routes, level, s.texts[level])
+            for sid, s in pending.items()
+        }
+    for sid, future in futures.items():
+        try:
+            states[sid].texts[level] = future.result()
+        except Exception:
+            logger.exception("Correcting level %d of story %s failed", level, sid)
@@ -0,0 +1,228 @@
+"""Per-build token and TTS-character budget with graceful degradation.
+
+Spend is projected per story from the cost model (backend.scheduler):
+prompt and completion tokens from the learned per-task ratios, TTS
+characters from the level texts' expected length. Limits are per build;
+0 means unlimited. When the projection comes within HEADROOM of a limit,
+stories are degraded in a fixed order, lowest priority (latest in feed
+order) first, until it fits:
+
+    1. skip-c1-audio — no audio for the C1 level (the longest text),
+       while the TTS limit is exceeded
+    2. trim-input    — cut the source article to trim_chars at a
+       sentence boundary, which shrinks every call and every level
+    3. drop          — leave the story out (at least one is kept)
+
+The same check runs again as each story starts, with the usage actually
+recorded so far (backend.metrics) plus what the stories still running
+are projected to spend beyond their own recorded usage, so a day whose
+stories cost more than projected degrades its later stories instead of
+overrunning. Every decision is recorded and published under "budget" in
+the digest.
+"""
+
+import logging
+import re
+import threading
+from dataclasses import asdict, dataclass, field, replace
+
+from backend.metrics import StoryUsage, estimate_tokens, metrics
+from backend.models import RawStory
+from backend.scheduler import CostModel
+
+logger = logging.getLogger(__name__)
+
+# Degrade once the projection reaches this fraction of a limit
+HEADROOM = 0.9
+DEFAULT_TRIM_CHARS = 6000
+# Average characters per token of the level texts
+CHARS_PER_TOKEN = 4
+
+SKIP_C1_AUDIO = "skip-c1-audio"
+TRIM_INPUT = "trim-input"
+DROP = "drop"
+C1_LEVEL = 3
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass(frozen=True, slots=True)
+class Usage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tts_chars: int = 0
+
+    def __add__(self, other: "Usage") -> "Usage":
+        return Usage(
+            self.prompt_tokens + other.prompt_tokens,
+            self.completion_tokens + other.completion_tokens,
+            self.tts_chars + other.tts_chars,
+        )
+
+
+def _total(usages) -> Usage:
+    return sum(usages, Usage())
+
+
+def _remaining(projected: Usage, used: StoryUsage) -> Usage:
+    """The part of a running story's projection it hasn't used yet."""
+    return Usage(
+        max(projected.prompt_tokens - used.prompt_tokens, 0),
+        max(projected.completion_tokens - used.completion_tokens, 0),
+        max(projected.tts_chars - used.tts_chars, 0),
+    )
+
+
+def actual_usage() -> Usage:
+    """What the build has used so far, from the metrics."""
+    totals = metrics.totals()
+    return Usage(totals.prompt_tokens, totals.completion_tokens, metrics.tts_chars)
+
+
+def trim_text(text: str, max_chars: int) -> str:
+    """text cut to at most max_chars, at the last sentence end before that."""
+    if len(text) <= max_chars:
+        return text
+    ends = [m.start() for m in _SENTENCE_END.finditer(text, 0, max_chars + 1)]
+    return text[:ends[-1]] if ends else text[:max_chars]
+
+
+@dataclass(frozen=True, slots=True)
+class Decision:
+    story_id: str
+    action: str
+    reason: str  # the limits the projection exceeded
+
+    def to_dict(self) -> dict:
+        return {"story": self.story_id, "action": self.action, "reason": self.reason}
+
+
+@dataclass(slots=True)
+class _Story:
+    raw: RawStory
+    skip_c1_audio: bool = False
+    running: bool = False
+
+
+@dataclass(slots=True)
+class BudgetGovernor:
+    limits: Usage
+    model: CostModel = field(default_factory=CostModel)
+    trim_chars: int = DEFAULT_TRIM_CHARS
+    decisions: list[Decision] = field(default_factory=list)
+    projected: Usage = field(default_factory=Usage)
+    _stories: dict[str, _Story] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def project(self, story: RawStory, skip_c1_audio: bool = False) -> Usage:
+        """Projected spend of one story's levels, translations and audio."""
+        tokens = estimate_tokens(story.full_text)
+        ratios = self.model.output_ratios
+        levels = ("b1", "a1") if skip_c1_audio else ("c1", "b1", "a1")
+        return Usage(
+            prompt_tokens=round(tokens * sum(self.model.prompt_ratios.values())),
+            completion_tokens=round(tokens * sum(ratios.values())),
+            tts_chars=round(tokens * CHARS_PER_TOKEN * sum(ratios.get(t, 0) for t in levels)),
+        )
+
+    def _over(self, usage: Usage) -> list[str]:
+        """Names of the limits usage comes within HEADROOM of."""
+        return [
+            name for name, limit in asdict(self.limits).items()
+            if limit and getattr(usage, name) > limit * HEADROOM
+        ]
+
+    def _degrade(self, stories: list[_Story], spent: Usage) -> list[_Story]:
+        """Apply the degradation steps to stories (lowest priority last)."""
+        kept = list(stories)
+
+        def over() -> list[str]:
+            projected = _total(self.project(s.raw, s.skip_c1_audio) for s in kept)
+            return self._over(spent + projected)
+
+        def decide(story: _Story, action: str, reason: list[str]) -> None:
+            decision = Decision(story.raw.id, action, ", ".join(reason))
+            logger.warning("Budget: %s story %s (%s)", action, story.raw.id, decision.reason)
+            self.decisions.append(decision)
+
+        for story in reversed(stories):
+            reason = over()
+            if "tts_chars" not in reason:
+                break
+            if not story.skip_c1_audio:
+                story.skip_c1_audio = True
+                decide(story, SKIP_C1_AUDIO, reason)
+        for story in reversed(stories):
+            reason = over()
+            if not reason:
+                break
+            if len(story.raw.full_text) > self.trim_chars:
+                story.raw = replace(
+                    story.raw, full_text=trim_text(story.raw.full_text, self.trim_chars),
+                )
+                decide(story, TRIM_INPUT, reason)
+        while (reason := over()) and len(kept) > 1:
+            decide(kept.pop(), DROP, reason)
+        return kept
+
+    def plan(self, stories: list[RawStory]) -> list[RawStory]:
+        """Degrade stories (in priority order) to fit; returns those kept."""
+        with self._lock:
+            kept = self._degrade([_Story(raw) for raw in stories], Usage())
+            self._stories = {s.raw.id: s for s in kept}
+            self.projected = _total(self.project(s.raw, s.skip_c1_audio) for s in kept)
+        logger.info("Budget: projected %s against limits %s", self.projected, self.limits)
+        return [s.raw for s in kept]
+
+    def admit(self, raw: RawStory) -> RawStory | None:
+        """Recheck a planned story as it starts, against actual spend.
+
+        Returns the story to process (possibly trimmed further), or None
+        if it had to be dropped after all.
+        """
+        with self._lock:
+            story = self._stories.get(raw.id) or _Story(raw)
+            story.raw = raw
+            # Running stories' usage so far is in the actuals already
+            running = [
+                _remaining(
+                    self.project(s.raw, s.skip_c1_audio), metrics.story_usage(s.raw.id),
+                )
+                for s in self._stories.values() if s.running and s is not story
+            ]
+            spent = actual_usage() + _total(running)
+            self._degrade([story], spent)
+            reason = self._over(spent + self.project(story.raw, story.skip_c1_audio))
+            if reason and spent != Usage():
+                # Unlike plan(), others have been published, so this may go
+                decision = Decision(raw.id, DROP, ", ".join(reason))
+                logger.warning("Budget: %s story %s (%s)", DROP, raw.id, decision.reason)
+                self.decisions.append(decision)
+                self._stories.pop(raw.id, None)
+                return None
+            story.running = True
+            self._stories[raw.id] = story
+            return story.raw
+
+    def finish(self, story_id: str) -> None:
+        """A story is done (or failed); its spend is in the actuals now."""
+        with self._lock:
+            story = self._stories.get(story_id)
+            if story is not None:
+                story.running = False
+
+    def skip_audio(self, story_id: str) -> frozenset[int]:
+        """Levels of a story to publish without audio."""
+        with self._lock:
+            story = self._stories.get(story_id)
+            skip = story is not None and story.skip_c1_audio
+        return frozenset({C1_LEVEL}) if skip else frozenset()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "limits": asdict(self.limits),
+                "projected": asdict(self.projected),
+                "actual": asdict(actual_usage()),
+                "decisions": [d.to_dict() for d in self.decisions],
+            }
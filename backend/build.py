@@ -3,26 +3,105 @@
 Usage:
     python -m backend.build
 
+For multi-process / multi-node builds see backend.worker; to publish new
+stories continuously through the day see backend.watch; to preview the
+result locally see backend.serve; to upload only what changed see
+backend.publish.
+
 Environment variables:
     OPENAI_API_KEY  — required
     LLM_MODEL       — default: gpt-4o-mini
+    LLM_ROUTES      — per-task models with optional escalation on validation
+                      failure, e.g. "a1=gpt-4.1-mini>gpt-4o,translate=gpt-4.1-nano";
+                      see backend.routing. Unrouted tasks use LLM_MODEL
     TTS_VOICE       — default: nova
     MAX_STORIES     — default: 5
+    OPENAI_BASE_URL — optional, e.g. a local stand-in server
+    LLM_MAX_CONCURRENCY — ceiling for in-flight LLM requests, default: 32
+    TTS_MAX_CONCURRENCY — ceiling for in-flight TTS requests, default: 16
+    STREAM_TTS      — "1" to synthesize sentences while the LLM streams, default: off
+    TRANSLATION_PACK_TOKENS — token budget per packed cross-story translation
+                      request; 0 translates each level on its own, default: 0
+    FEED_URLS       — comma-separated RSS feeds, default: the DW German feed
+    DEDUPE_THRESHOLD — MinHash similarity above which stories count as
+                      duplicates; 0 disables, default: 0.5
+    CEFR_VALIDATE   — "0" to skip local CEFR checks and corrective calls,
+                      default: on
+    STORY_CONCURRENCY — stories processed at once; 0 runs all at once, default: 0
+    PUBLISH_AT      — next local "HH:MM" the digest must be out by; stories that
+                      would finish later are deferred, default: no deadline
+    PUBLISH_MARGIN_SECONDS — time reserved before PUBLISH_AT for writing
+                      and uploading, default: 120
+    AUDIO_FORMATS   — comma-separated audio ladder, most preferred first, from
+                      backend.audio.RENDITIONS (e.g. "opus-webm,aac-m4a");
+                      MP3 is always added as the fallback, default: mp3
+    ALIGN_AUDIO     — "1" to synthesize sentence by sentence and publish a
+                      per-sentence seek index with each level, default: off
+    BATCH_MODE      — "1" to generate all levels through the provider's batch
+                      API (cheaper, higher limits, hours of latency) before
+                      synthesizing audio; see backend.batch, default: off
+    BATCH_POLL_SECONDS — batch status poll interval, default: 30
+    TTS_ENGINE      — "openai", or "espeak" for local espeak-ng (offline
+                      previews, benchmarks, API outages), default: openai
+    ESPEAK_VOICE    — espeak-ng voice when TTS_ENGINE=espeak, default: de
+    TRANSLATION_MEMORY — "1" to reuse remembered sentence translations and
+                      send only new sentences; see backend.translation_memory,
+                      default: off
+    TM_SIMILARITY   — minimum similarity for a fuzzy translation-memory
+                      match; 1 allows exact matches only, default: 0.97
+    GLOSSARY        — "1" to publish a tap-to-translate glossary shard with
+                      each digest, glossing only words new to the persistent
+                      dictionary; see backend.glossary, default: off
+    PROGRESSIVE_PUBLISH — "1" to republish the digest as stories progress:
+                      headlines as soon as each C1 call returns, then levels
+                      and audio as they finish; see backend.progressive,
+                      default: off
+    BUDGET_PROMPT_TOKENS, BUDGET_COMPLETION_TOKENS, BUDGET_TTS_CHARS — per-build
+                      limits; stories are degraded (C1 audio skipped, input
+                      trimmed, lowest priority dropped) to stay within them,
+                      see backend.budget; 0 is unlimited, default: 0
+    BUDGET_TRIM_CHARS — length source articles are trimmed to when over
+                      budget, default: 6000
 """
 
 import asyncio
-import json
 import logging
 import os
+import shutil
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict
 from datetime import date
 from pathlib import Path
 
 from openai import AsyncOpenAI, OpenAI
 
-from backend.audio import generate_audio_for_story
+from backend.archive import update_archive
+from backend.audio import DEFAULT_FORMATS, audio_formats, generate_audio_for_story
+from backend.batch import generate_levels_batch
+from backend.budget import DEFAULT_TRIM_CHARS, BudgetGovernor, Usage
+from backend.clients import make_clients
+from backend.glossary import build_glossary
 from backend.levels import generate_levels
-from backend.models import ProcessedStory
-from backend.sources import fetch_stories
+from backend.metrics import metrics, story_scope
+from backend.models import (
+    AudioFile,
+    LevelContent,
+    ProcessedStory,
+    RawStory,
+    SentenceTiming,
+)
+from backend.packing import fill_translations
+from backend.progressive import ProgressivePublisher
+from backend.routing import ModelRoutes, as_routes, parse_routes
+from backend.scheduler import load_cost_model, plan, seconds_until
+from backend.sources import DW_RSS_URL, fetch_stories
+from backend.spool import StorySpool, write_digest_streaming
+from backend.storage import write_json_atomic
+from backend.streaming import generate_levels_streaming
+from backend.translation_memory import TranslationMemory
+from backend.tts import TtsEngine, make_tts_engine
 
 logger = logging.getLogger(__name__)
 
@@ -34,14 +113,80 @@ def get_config() -> dict:
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY environment variable is required")
+    llm_model = os.environ.get("LLM_MODEL", "gpt-4o-mini")
     return {
         "api_key": api_key,
-        "llm_model": os.environ.get("LLM_MODEL", "gpt-4o-mini"),
+        "llm_model": llm_model,
+        "llm_routes": parse_routes(os.environ.get("LLM_ROUTES", ""), llm_model),
         "tts_voice": os.environ.get("TTS_VOICE", "nova"),
         "max_stories": int(os.environ.get("MAX_STORIES", "3")),
+        "base_url": os.environ.get("OPENAI_BASE_URL") or None,
+        "llm_max_concurrency": int(os.environ.get("LLM_MAX_CONCURRENCY", "32")),
+        "tts_max_concurrency": int(os.environ.get("TTS_MAX_CONCURRENCY", "16")),
+        "stream_tts": os.environ.get("STREAM_TTS", "") == "1",
+        "translation_pack_tokens": int(os.environ.get("TRANSLATION_PACK_TOKENS", "0")),
+        "feeds": [
+            url.strip()
+            for url in os.environ.get("FEED_URLS", DW_RSS_URL).split(",")
+            if url.strip()
+        ],
+        "dedupe_threshold": float(os.environ.get("DEDUPE_THRESHOLD", "0.5")),
+        "cefr_validate": os.environ.get("CEFR_VALIDATE", "1") != "0",
+        "story_concurrency": int(os.environ.get("STORY_CONCURRENCY", "0")),
+        "publish_at": os.environ.get("PUBLISH_AT") or None,
+        "publish_margin": float(os.environ.get("PUBLISH_MARGIN_SECONDS", "120")),
+        "audio_formats": audio_formats([
+            name.strip()
+            for name in os.environ.get("AUDIO_FORMATS", "mp3").split(",")
+            if name.strip()
+        ]),
+        "align_audio": os.environ.get("ALIGN_AUDIO", "") == "1",
+        "batch_mode": os.environ.get("BATCH_MODE", "") == "1",
+        "batch_poll_seconds": float(os.environ.get("BATCH_POLL_SECONDS", "30")),
+        "tts_engine": os.environ.get("TTS_ENGINE", "openai"),
+        "espeak_voice": os.environ.get("ESPEAK_VOICE", "de"),
+        "translation_memory": os.environ.get("TRANSLATION_MEMORY", "") == "1",
+        "tm_similarity": float(os.environ.get("TM_SIMILARITY", "0.97")),
+        "glossary": os.environ.get("GLOSSARY", "") == "1",
+        "progressive_publish": os.environ.get("PROGRESSIVE_PUBLISH", "") == "1",
+        "budget_prompt_tokens": int(os.environ.get("BUDGET_PROMPT_TOKENS", "0")),
+        "budget_completion_tokens": int(os.environ.get("BUDGET_COMPLETION_TOKENS", "0")),
+        "budget_tts_chars": int(os.environ.get("BUDGET_TTS_CHARS", "0")),
+        "budget_trim_chars": int(
+            os.environ.get("BUDGET_TRIM_CHARS", str(DEFAULT_TRIM_CHARS)),
+        ),
     }
 
 
+def llm_routes(config: dict) -> ModelRoutes:
+    """The configured model routes, or LLM_MODEL for every task."""
+    return config.get("llm_routes") or as_routes(config["llm_model"])
+
+
+def translation_memory(config: dict, output_dir: Path) -> TranslationMemory | None:
+    """The persistent translation memory, if enabled."""
+    if not config.get("translation_memory"):
+        return None
+    return TranslationMemory(
+        output_dir / "memory" / "translations.json", config.get("tm_similarity", 0.97),
+    )
+
+
+def budget_governor(config: dict, output_dir: Path) -> BudgetGovernor | None:
+    """The per-build budget governor, if any limit is set."""
+    limits = Usage(
+        config.get("budget_prompt_tokens", 0),
+        config.get("budget_completion_tokens", 0),
+        config.get("budget_tts_chars", 0),
+    )
+    if limits == Usage():
+        return None
+    return BudgetGovernor(
+        limits, load_cost_model(output_dir / "metrics"),
+        config.get("budget_trim_chars", DEFAULT_TRIM_CHARS),
+    )
+
+
 def story_to_dict(story: ProcessedStory) -> dict:
     """Convert a ProcessedStory to a JSON-serializable dict."""
     return {
@@ -56,12 +201,44 @@ def story_to_dict(story: ProcessedStory) -> dict:
                 "text_en": content.text_en,
                 "audio_url": content.audio_url,
                 "audio_duration_seconds": content.audio_duration_seconds,
+                "audio_files": [
+                    {"url": f.url, "type": f.mime_type, "bytes": f.size_bytes}
+                    for f in content.audio_files
+                ],
+                "sentences": [asdict(t) for t in content.sentences],
             }
             for level, content in sorted(story.levels.items())
         },
     }
 
 
+def story_from_dict(data: dict) -> ProcessedStory:
+    """Inverse of story_to_dict."""
+    return ProcessedStory(
+        id=data["id"],
+        headline_de=data["headline_de"],
+        headline_en=data["headline_en"],
+        summary_en=data["summary_en"],
+        source_url=data["source_url"],
+        levels={
+            int(level): LevelContent(
+                text_de=content["text_de"],
+                text_en=content["text_en"],
+                audio_url=content.get("audio_url"),
+                audio_duration_seconds=content.get("audio_duration_seconds"),
+                audio_files=tuple(
+                    AudioFile(url=f["url"], mime_type=f["type"], size_bytes=f["bytes"])
+                    for f in content.get("audio_files", [])
+                ),
+                sentences=tuple(
+                    SentenceTiming(**t) for t in content.get("sentences", [])
+                ),
+            )
+            for level, content in data["levels"].items()
+        },
+    )
+
+
 def build_digest(stories: list[ProcessedStory], today: str) -> dict:
     """Build the digest JSON structure."""
     return {
@@ -73,78 +250,374 @@ def build_digest(stories: list[ProcessedStory], today: str) -> dict:
 
 
 def write_digest(digest: dict, content_dir: Path) -> None:
-    """Write digest.json and latest.json."""
-    content_dir.mkdir(parents=True, exist_ok=True)
+    """Write digest.json and latest.json, and update the archive index.
 
+    Both are replaced atomically, so a reader (or watch mode republishing
+    while the site is live) never sees a half-written file.
+    """
     digest_path = content_dir / "digest.json"
-    with open(digest_path, "w", encoding="utf-8") as f:
-        json.dump(digest, f, ensure_ascii=False, indent=2)
+    write_json_atomic(digest_path, digest)
     logger.info("Wrote %s", digest_path)
 
     # latest.json is a copy at the content root
     latest_path = content_dir.parent / "latest.json"
-    with open(latest_path, "w", encoding="utf-8") as f:
-        json.dump(digest, f, ensure_ascii=False, indent=2)
+    write_json_atomic(latest_path, digest)
     logger.info("Wrote %s", latest_path)
 
+    update_archive(digest, content_dir.parent)
+
+
+async def process_story(
+    raw: RawStory,
+    llm_client: OpenAI,
+    tts_client: AsyncOpenAI,
+    config: dict,
+    content_dir: Path,
+    engine: TtsEngine | None = None,
+    memory: TranslationMemory | None = None,
+    progress: Callable[[ProcessedStory], None] | None = None,
+    skip_audio: frozenset[int] = frozenset(),
+    audio: bool = True,
+    cancel: threading.Event | None = None,
+) -> ProcessedStory:
+    """Generate levels and audio for one story.
+
+    Raises if level generation fails. An audio failure is logged and the
+    story is returned without audio, so the text still gets published.
+    When translation packing is on, text_en is left empty for run_pipeline
+    to fill in across stories. progress is passed on to level and audio
+    generation (see backend.levels.generate_levels). Levels in skip_audio
+    get no audio; such stories aren't streamed. With audio=False, only the
+    levels are generated (add_audio adds the audio later). Setting cancel
+    stops level generation before its next LLM call.
+    """
+    metrics.record_source(raw.full_text)
+    translate = not config.get("translation_pack_tokens")
+    validate = config.get("cefr_validate", True)
+    formats = config.get("audio_formats", DEFAULT_FORMATS)
+    align = config.get("align_audio", False)
+    if config.get("stream_tts") and audio and not skip_audio:
+        logger.info("Streaming levels and audio for story %s: %s", raw.id, raw.title)
+        return await generate_levels_streaming(
+            raw, llm_client, tts_client,
+            llm_routes(config), config["tts_voice"], content_dir, translate,
+            validate, formats, align, engine, memory, progress,
+        )
+
+    logger.info("Generating levels for story %s: %s", raw.id, raw.title)
+    processed = await asyncio.to_thread(
+        generate_levels, raw, llm_client, llm_routes(config), translate, validate,
+        memory, progress, cancel,
+    )
+    if not audio:
+        return processed
+    return await add_audio(
+        processed, tts_client, config, content_dir, engine, skip_audio, progress,
+    )
+
+
+async def add_audio(
+    processed: ProcessedStory,
+    tts_client: AsyncOpenAI,
+    config: dict,
+    content_dir: Path,
+    engine: TtsEngine | None = None,
+    skip_audio: frozenset[int] = frozenset(),
+    progress: Callable[[ProcessedStory], None] | None = None,
+) -> ProcessedStory:
+    """Generate audio for a story's levels; on failure, return it without.
+
+    progress is called with the story so far as each level's audio is done.
+    """
+    try:
+        logger.info("Generating audio for story %s", processed.id)
+        return await generate_audio_for_story(
+            processed, tts_client, config["tts_voice"], content_dir,
+            config.get("audio_formats", DEFAULT_FORMATS),
+            config.get("align_audio", False), engine, skip_audio, progress,
+        )
+    except Exception:
+        logger.exception("Failed to generate audio for story %s", processed.id)
+        return processed
+
 
 async def run_pipeline(config: dict) -> None:
     """Run the full content pipeline."""
     today = date.today().isoformat()
     content_dir = OUTPUT_DIR / "content" / today
     content_dir.mkdir(parents=True, exist_ok=True)
+    metrics.reset()
 
-    # Step 1: Fetch stories
+    # Step 1: Fetch stories, collapsing near-duplicates across feeds
     logger.info("Fetching stories from DW...")
-    raw_stories = fetch_stories(max_stories=config["max_stories"])
+    raw_stories = fetch_stories(
+        max_stories=config["max_stories"],
+        feeds=config.get("feeds"),
+        dedupe_threshold=config.get("dedupe_threshold"),
+    )
     if not raw_stories:
         raise RuntimeError("No stories fetched from DW. Aborting.")
     logger.info("Fetched %d stories", len(raw_stories))
 
-    # Step 2: Generate difficulty levels
-    llm_client = OpenAI(api_key=config["api_key"])
-    processed_stories: list[ProcessedStory] = []
-    for raw in raw_stories:
+    # Finished stories are spooled as they complete; after a crash, a rerun
+    # picks up where the last one stopped
+    spool = StorySpool(OUTPUT_DIR / "spool" / f"{today}.ndjson")
+    spooled = spool.ids()
+    if spooled:
+        logger.info("Resuming: %d stories already done", len(spooled))
+    pending = [raw for raw in raw_stories if raw.id not in spooled]
+    pack = config.get("translation_pack_tokens")
+
+    # Stay within the per-build token and TTS budget: skip C1 audio, trim
+    # inputs, then drop the lowest-priority stories (last in feed order)
+    governor = budget_governor(config, OUTPUT_DIR)
+    if governor is not None:
+        pending = governor.plan(pending)
+
+    def skip_audio(story_id: str) -> frozenset[int]:
+        return governor.skip_audio(story_id) if governor is not None else frozenset()
+
+    header = build_digest([], today)
+    publisher = None
+    if config.get("progressive_publish"):
+        publisher = ProgressivePublisher(
+            header, content_dir, [raw.id for raw in raw_stories],
+        )
+        for story in spool.stories() if spooled else ():
+            publisher.update(story, done=True)
+
+    def publish(story: ProcessedStory, done: bool = False) -> None:
+        if publisher is not None:
+            publisher.update(story_to_dict(story), done)
+
+    progress = publish if publisher is not None else None
+
+    # Steps 2-3: Generate difficulty levels and audio. Stories run
+    # concurrently, longest first; the clients' adaptive limiters keep
+    # in-flight requests within the account's rate limits.
+    budget = None
+    if config.get("publish_at"):
+        budget = seconds_until(config["publish_at"], config.get("publish_margin", 0))
+        if budget is None:
+            logger.warning("Too close to publish time %s", config["publish_at"])
+    deadline = time.monotonic() + budget if budget is not None else None
+    schedule = plan(
+        pending,
+        load_cost_model(OUTPUT_DIR / "metrics"),
+        slots=config.get("story_concurrency") or None,
+        budget_seconds=budget,
+    )
+    logger.info(
+        "Scheduled %d stories, projected %.0fs", len(schedule.order),
+        schedule.projected_seconds,
+    )
+
+    llm_client, tts_client = make_clients(config)
+    engine = make_tts_engine(config, tts_client)
+    memory = translation_memory(config, OUTPUT_DIR)
+    slots = asyncio.Semaphore(config.get("story_concurrency") or len(schedule.order) or 1)
+
+    # Batch mode: every story's text comes from a few batch waves up front;
+    # only audio is left for the per-story tasks
+    batch_dir = OUTPUT_DIR / "batch" / today
+    batched = None
+    if config.get("batch_mode") and schedule.order:
+        batched = await asyncio.to_thread(
+            generate_levels_batch, schedule.order, llm_client, llm_routes(config),
+            batch_dir, not pack, config.get("cefr_validate", True),
+            config.get("batch_poll_seconds", 30.0),
+        )
+        for story in batched.values():
+            publish(story)
+        # The batch counts against the deadline too
+        if deadline is not None:
+            budget = deadline - time.monotonic()
+            if budget <= 0:
+                logger.warning(
+                    "Batch finished past publish time %s", config["publish_at"],
+                )
+                budget = None
+
+    past_deadline = threading.Event()
+
+    async def run_one(raw: RawStory) -> ProcessedStory | None:
+        story = None
         try:
-            logger.info("Generating levels for story %s: %s", raw.id, raw.title)
-            processed = generate_levels(raw, llm_client, config["llm_model"])
-            processed_stories.append(processed)
-        except Exception:
-            logger.exception("Failed to generate levels for story %s", raw.id)
+            async with slots:
+                # Usage is counted per story for the governor's projections
+                with story_scope(raw.id):
+                    if governor is not None and batched is None:
+                        admitted = governor.admit(raw)
+                        if admitted is None:
+                            return None
+                        raw = admitted  # possibly trimmed; same id
+                    if batched is None:
+                        story = await process_story(
+                            raw, llm_client, tts_client, config, content_dir, engine,
+                            memory, progress, skip_audio(raw.id), audio=not pack,
+                            cancel=past_deadline,
+                        )
+                    elif pack and raw.id in batched:
+                        story = batched[raw.id]
+                    elif raw.id in batched:
+                        story = await add_audio(
+                            batched[raw.id], tts_client, config, content_dir, engine,
+                            skip_audio(raw.id), progress,
+                        )
+                    else:
+                        raise RuntimeError(f"No batch output for story {raw.id}")
+        except BaseException:
+            if publisher is not None:
+                publisher.discard(raw.id)
+            raise
+        finally:
+            # In pack mode a story stays admitted until it's voiced below
+            if governor is not None and not (pack and story is not None):
+                governor.finish(raw.id)
+        if pack:
+            publish(story)
+            return story  # translated across stories below, then voiced
+        spool.append(story_to_dict(story))
+        publish(story, done=True)
+        return None
+
+    # Tasks are created in schedule order; the semaphore admits them FIFO
+    tasks = [asyncio.create_task(run_one(raw)) for raw in schedule.order]
+    late: set[asyncio.Task] = set()
+    if tasks:
+        _, late = await asyncio.wait(tasks, timeout=budget)
+    if late:
+        # Cancelling a task doesn't stop its level thread; this does
+        past_deadline.set()
+    for task in late:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    untranslated: list[ProcessedStory] = []
+    deferred = [raw.id for raw in schedule.deferred]
+    for raw, task in zip(schedule.order, tasks):
+        if task in late:
+            logger.warning("Story %s missed the publish deadline, deferring", raw.id)
+            deferred.append(raw.id)
+        elif task.exception() is not None:
+            logger.error(
+                "Failed to generate levels for story %s", raw.id,
+                exc_info=task.exception(),
+            )
+        elif task.result() is not None:
+            untranslated.append(task.result())
+
+    # Packed translation runs before any audio, so a story dropped for an
+    # incomplete translation hasn't had its TTS paid for
+    if pack:
+        translated = await asyncio.to_thread(
+            fill_translations, untranslated, llm_client, llm_routes(config), pack,
+        )
+        kept = {story.id for story in translated}
+        for story in untranslated:
+            if story.id not in kept:
+                if publisher is not None:
+                    publisher.discard(story.id)
+                if governor is not None:
+                    governor.finish(story.id)
+
+        async def voice(story: ProcessedStory) -> None:
+            try:
+                async with slots:
+                    with story_scope(story.id):
+                        story = await add_audio(
+                            story, tts_client, config, content_dir, engine,
+                            skip_audio(story.id), progress,
+                        )
+            except BaseException:
+                if publisher is not None:
+                    publisher.discard(story.id)
+                raise
+            finally:
+                if governor is not None:
+                    governor.finish(story.id)
+            spool.append(story_to_dict(story))
+            publish(story, done=True)
 
-    if not processed_stories:
+        # Voicing gets what's left until the publish deadline
+        voicing = [asyncio.create_task(voice(story)) for story in translated]
+        late_voicing: set[asyncio.Task] = set()
+        if voicing:
+            timeout = max(deadline - time.monotonic(), 0) if budget is not None else None
+            _, late_voicing = await asyncio.wait(voicing, timeout=timeout)
+        for task in late_voicing:
+            task.cancel()
+        await asyncio.gather(*voicing, return_exceptions=True)
+        for story, task in zip(translated, voicing):
+            if task in late_voicing:
+                logger.warning("Story %s missed the publish deadline, deferring", story.id)
+                deferred.append(story.id)
+            elif task.exception() is not None:
+                logger.error(
+                    "Failed to voice story %s", story.id, exc_info=task.exception(),
+                )
+
+    # Level threads of cancelled stories may still report progress; from
+    # here on only the final write publishes
+    if publisher is not None:
+        publisher.close()
+
+    if memory is not None:
+        memory.save()
+    if not spool.ids():
         raise RuntimeError("No stories processed successfully. Aborting.")
 
-    # Step 3: Generate audio
-    tts_client = AsyncOpenAI(api_key=config["api_key"])
-    stories_with_audio: list[ProcessedStory] = []
-    for story in processed_stories:
+    # Glossary for today's words; only words new to the dictionary cost a call
+    if config.get("glossary"):
         try:
-            logger.info("Generating audio for story %s", story.id)
-            with_audio = await generate_audio_for_story(
-                story, tts_client, config["tts_voice"], content_dir,
+            await asyncio.to_thread(
+                build_glossary,
+                {
+                    s["id"]: [c["text_de"] for c in s["levels"].values()]
+                    for s in spool.stories()
+                },
+                llm_client, llm_routes(config),
+                OUTPUT_DIR / "glossary" / "dictionary.json",
+                content_dir / "glossary.json",
             )
-            stories_with_audio.append(with_audio)
+            header["glossary"] = f"{today}/glossary.json"
         except Exception:
-            logger.exception("Failed to generate audio for story %s", story.id)
-            stories_with_audio.append(story)
+            logger.exception("Failed to build the glossary; publishing without")
+
+    if governor is not None:
+        header["budget"] = governor.to_dict()
 
-    # Step 4: Write output
-    digest = build_digest(stories_with_audio, today)
-    write_digest(digest, content_dir)
+    # Step 4: Write output, streamed from the spool in feed order
+    summaries = write_digest_streaming(
+        header,
+        spool.stories(order=[raw.id for raw in raw_stories]),
+        content_dir,
+    )
+    spool.remove()
+    shutil.rmtree(batch_dir, ignore_errors=True)
 
     # Summary
     total_audio = sum(
         1
-        for s in stories_with_audio
-        for c in s.levels.values()
-        if c.audio_url
+        for s in summaries
+        for c in s["levels"].values()
+        if c["audio_duration_seconds"] is not None
     )
     logger.info(
         "Pipeline complete: %d stories, %d audio files",
-        len(stories_with_audio),
+        len(summaries),
         total_audio,
     )
+    metrics.log_summary()
+    write_json_atomic(
+        OUTPUT_DIR / "metrics" / f"{today}.json",
+        {
+            **metrics.to_dict(),
+            "routes": llm_routes(config).to_dict(),
+            "schedule": {**schedule.to_dict(), "deferred": deferred},
+            **({"budget": header["budget"]} if governor is not None else {}),
+        },
+    )
 
 
 def main() -> None:
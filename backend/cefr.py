@@ -0,0 +1,195 @@
+"""Fast local checks that a generated level meets its CEFR constraints.
+
+Runs before any TTS money is spent. Checks mirror the rules in
+backend.prompts: sentence length statistics, share of running words from
+the basic vocabulary list (A1), and pattern checks for subordinate clauses,
+past tenses and constructions each level must not use. validate_level
+returns a list of human-readable problems, empty when the text passes; the
+problems are fed back verbatim in the corrective prompt.
+"""
+
+import re
+from dataclasses import dataclass
+
+from backend.wordlist import FREQUENT_SET
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+# Tokens whose dot doesn't end a sentence: ordinals and dates ("am 3. Oktober"),
+# single letters ("z. B.", "u. a.") and a few short abbreviations
+_NO_BREAK_AFTER = re.compile(
+    r"\(?(?:\d{1,2}|[^\W\d_]|bzw|ca|Dr|Nr|Prof|St|vgl)\.", re.IGNORECASE,
+)
+_WORD = re.compile(r"[^\W\d_]+")
+_SUFFIXES = (
+    "test", "ten", "est", "em", "en", "er", "es", "et", "st", "te", "e", "n", "s", "t",
+)
+
+# Vocabulary share is too noisy on very short texts to act on
+MIN_WORDS_FOR_VOCABULARY = 30
+
+
+def _stems(word: str) -> set[str]:
+    stems = {word}
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            stems.add(word[: -len(suffix)])
+    return stems
+
+
+_KNOWN_STEMS: frozenset[str] = frozenset(
+    stem for word in FREQUENT_SET for stem in _stems(word)
+)
+
+
+def is_basic_word(word: str) -> bool:
+    """Whether a word (any inflection) is in the basic vocabulary list."""
+    word = word.lower()
+    if word in FREQUENT_SET:
+        return True
+    return any(stem in _KNOWN_STEMS for stem in _stems(word))
+
+
+@dataclass(frozen=True, slots=True)
+class LevelRules:
+    name: str
+    max_words_per_sentence: int
+    # Words, matched case-insensitively as whole words, the level must not use
+    forbidden_words: tuple[str, ...] = ()
+    no_relative_clauses: bool = False
+    no_past_tense: bool = False
+    min_basic_vocabulary: float | None = None
+
+
+_SUBORDINATORS = (
+    "weil", "dass", "wenn", "obwohl", "ob", "damit", "nachdem", "bevor",
+    "sodass", "falls", "sobald", "seitdem", "solange", "indem", "wobei",
+)
+_GENITIVE_PREPOSITIONS = (
+    "trotz", "wegen", "angesichts", "aufgrund", "infolge", "hinsichtlich",
+)
+
+LEVEL_RULES = {
+    3: None,  # C1: no constraints beyond the source
+    2: LevelRules(
+        name="B1",
+        max_words_per_sentence=18,
+        forbidden_words=_GENITIVE_PREPOSITIONS + ("sei", "seien"),
+    ),
+    1: LevelRules(
+        name="A1",
+        max_words_per_sentence=8,
+        forbidden_words=_SUBORDINATORS,
+        no_relative_clauses=True,
+        no_past_tense=True,
+        min_basic_vocabulary=0.7,
+    ),
+}
+
+_RELATIVE_CLAUSE = re.compile(
+    r",\s+(?:der|die|das|dem|den|deren|dessen|denen|welche[rsmn]?)\s", re.IGNORECASE,
+)
+_AUXILIARY = re.compile(
+    r"\b(?:habe|hast|hat|haben|habt|bin|bist|ist|sind|seid)\b", re.IGNORECASE,
+)
+# Lowercase words shaped like past participles (ge...t / ge...en)
+_PARTICIPLE = re.compile(r"[a-zäöüß]*ge[a-zäöüß]{2,}(?:t|en)")
+_NOT_PARTICIPLES = frozenset({
+    "gegen", "genug", "gestern", "gern", "gerne", "genau", "gehen", "geht", "geben",
+    "gelten", "gewinnen",
+})
+_PRETERITE = frozenset({
+    "war", "warst", "waren", "wart", "hatte", "hattest", "hatten", "hattet",
+    "wurde", "wurdest", "wurden", "sagte", "sagten", "ging", "gingen", "kam",
+    "kamen", "gab", "gaben", "konnte", "konnten", "musste", "mussten", "wollte",
+    "wollten", "sollte", "sollten", "durfte", "durften", "machte", "machten",
+    "stand", "standen", "sah", "sahen", "nahm", "nahmen", "fand", "fanden", "blieb",
+    "blieben", "lag", "lagen",
+})
+
+
+def sentence_breaks(text: str) -> list[re.Match]:
+    """The whitespace runs in text that end a sentence."""
+    breaks = []
+    for match in _SENTENCE_SPLIT.finditer(text):
+        end = match.start()
+        start = max(text.rfind(" ", 0, end), text.rfind("\n", 0, end)) + 1
+        if not _NO_BREAK_AFTER.fullmatch(text, start, end):
+            breaks.append(match)
+    return breaks
+
+
+def split_sentences(text: str) -> list[str]:
+    text = text.strip()
+    bounds = [0, *(i for m in sentence_breaks(text) for i in m.span()), len(text)]
+    return [text[a:b] for a, b in zip(bounds[::2], bounds[1::2]) if a < b]
+
+
+def words(text: str) -> list[str]:
+    """Words of text as written: runs of letters, without digits or punctuation."""
+    return _WORD.findall(text)
+
+
+def _has_perfekt(sentence: str) -> bool:
+    if not _AUXILIARY.search(sentence):
+        return False
+    return any(
+        _PARTICIPLE.fullmatch(w) and w not in _NOT_PARTICIPLES
+        for w in words(sentence)
+    )
+
+
+def validate_level(level: int, text_de: str) -> list[str]:
+    """Problems with text_de for the given level; empty if it passes."""
+    rules = LEVEL_RULES.get(level)
+    if rules is None:
+        return []
+
+    problems = []
+    sentences = split_sentences(text_de)
+    lengths = [len(words(s)) for s in sentences] or [0]
+    all_words = [w for s in sentences for w in words(s)]
+
+    limit = rules.max_words_per_sentence
+    mean = sum(lengths) / len(lengths)
+    too_long = [n for n in lengths if n > limit * 1.5]
+    if mean > limit * 1.25:
+        problems.append(
+            f"Average sentence length is {mean:.1f} words; {rules.name} allows about {limit}."
+        )
+    if len(too_long) > max(1, len(sentences) // 10):
+        problems.append(
+            f"{len(too_long)} sentences are longer than {int(limit * 1.5)} words; "
+            f"split them (maximum ~{limit} words per sentence)."
+        )
+
+    lowered = text_de.lower()
+    used = sorted({
+        w for w in rules.forbidden_words
+        if re.search(rf"\b{re.escape(w)}\b", lowered)
+    })
+    if used:
+        problems.append(f"Uses words not allowed at {rules.name}: {', '.join(used)}.")
+
+    if rules.no_relative_clauses and _RELATIVE_CLAUSE.search(text_de):
+        problems.append("Contains relative clauses; use separate main clauses.")
+
+    if rules.no_past_tense:
+        past = [w for w in all_words if w.lower() in _PRETERITE]
+        if past:
+            problems.append(
+                f"Uses past tense (Präteritum: {', '.join(sorted(set(past))[:5])}); "
+                "use present tense only."
+            )
+        elif any(_has_perfekt(s) for s in sentences):
+            problems.append("Uses Perfekt; use present tense only.")
+
+    if rules.min_basic_vocabulary and len(all_words) >= MIN_WORDS_FOR_VOCABULARY:
+        share = sum(is_basic_word(w) for w in all_words) / len(all_words)
+        if share < rules.min_basic_vocabulary:
+            rare = sorted({w for w in all_words if not is_basic_word(w) and w.islower()})
+            problems.append(
+                f"Only {share:.0%} of words are basic vocabulary; "
+                f"replace rarer words such as: {', '.join(rare[:10])}."
+            )
+
+    return problems
@@ -0,0 +1,274 @@
+"""Shared OpenAI client factory with adaptive, quota-aware concurrency.
+
+Both clients get tuned httpx connection pools and a transport wrapper that
+gates every request through an AdaptiveLimiter. The limiter reads the
+provider's rate-limit headers on each response and adjusts how many requests
+may be in flight (AIMD: additive increase while quota is healthy,
+multiplicative decrease on 429 or when remaining quota runs low).
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+HTTP_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=60.0,
+)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+# Fraction of remaining quota below which we back off before the provider does
+LOW_WATERMARK = 0.1
+# At most one multiplicative decrease per window, so a burst of throttled
+# responses from the same round of requests only halves the limit once
+DECREASE_COOLDOWN = 1.0
+ASYNC_POLL_INTERVAL = 0.02
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str | None) -> float | None:
+    """Parse a rate-limit duration header ("1s", "6m0s", "20ms", "2.5") to seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _retry_after(headers: httpx.Headers) -> float | None:
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after"))
+
+
+def _remaining_fraction(headers: httpx.Headers) -> tuple[float, float | None] | None:
+    """Lowest remaining/limit ratio across request and token quotas, with its reset."""
+    worst = None
+    for kind in ("requests", "tokens"):
+        try:
+            remaining = float(headers[f"x-ratelimit-remaining-{kind}"])
+            limit = float(headers[f"x-ratelimit-limit-{kind}"])
+        except (KeyError, ValueError):
+            continue
+        if limit <= 0:
+            continue
+        fraction = remaining / limit
+        if worst is None or fraction < worst[0]:
+            worst = (fraction, parse_duration(headers.get(f"x-ratelimit-reset-{kind}")))
+    return worst
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit fed by rate-limit response headers.
+
+    Thread-safe; usable from sync code (acquire) and from asyncio (acquire_async).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+    ):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _can_start(self, now: float) -> bool:
+        return now >= self.blocked_until and self.in_flight < int(self.limit)
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if not self._can_start(time.monotonic()):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self) -> None:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._can_start(now):
+                    self.in_flight += 1
+                    return
+                wait = self.blocked_until - now if now < self.blocked_until else None
+                self._cond.wait(timeout=wait)
+
+    async def acquire_async(self) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep(ASYNC_POLL_INTERVAL)
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def observe(self, status_code: int, headers: httpx.Headers) -> None:
+        """Adjust the limit from one response's status and headers."""
+        now = time.monotonic()
+        with self._cond:
+            if status_code == 429:
+                pause = _retry_after(headers)
+                if pause:
+                    self.blocked_until = max(self.blocked_until, now + pause)
+                self._decrease(now)
+            else:
+                remaining = _remaining_fraction(headers)
+                if remaining is not None and remaining[0] < LOW_WATERMARK:
+                    fraction, reset = remaining
+                    if fraction <= 0 and reset:
+                        self.blocked_until = max(self.blocked_until, now + reset)
+                    self._decrease(now)
+                elif status_code < 500:
+                    # +1 per round of `limit` successful responses
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self, now: float) -> None:
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        old = self.limit
+        self.limit = max(float(self.minimum), self.limit / 2)
+        logger.info("%s concurrency %d -> %d (rate limited)", self.name, old, self.limit)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _once(fn):
+    done = threading.Event()
+
+    def wrapper():
+        if not done.is_set():
+            done.set()
+            fn()
+    return wrapper
+
+
+class LimitedTransport(httpx.BaseTransport):
+    """Holds a limiter slot from request start until the response body is closed."""
+
+    def __init__(self, limiter: AdaptiveLimiter, transport: httpx.BaseTransport):
+        self.limiter = limiter
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.limiter.acquire()
+        release = _once(self.limiter.release)
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            release()
+            raise
+        self.limiter.observe(response.status_code, response.headers)
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncLimitedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of LimitedTransport."""
+
+    def __init__(self, limiter: AdaptiveLimiter, transport: httpx.AsyncBaseTransport):
+        self.limiter = limiter
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.limiter.acquire_async()
+        release = _once(self.limiter.release)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        self.limiter.observe(response.status_code, response.headers)
+        response.stream = _AsyncReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def make_clients(config: dict) -> tuple[OpenAI, AsyncOpenAI]:
+    """Build the LLM (sync) and TTS (async) clients used by the pipeline."""
+    llm_limiter = AdaptiveLimiter("llm", maximum=config.get("llm_max_concurrency", 32))
+    tts_limiter = AdaptiveLimiter("tts", maximum=config.get("tts_max_concurrency", 16))
+    base_url = config.get("base_url")
+
+    llm_client = OpenAI(
+        api_key=config["api_key"],
+        base_url=base_url,
+        http_client=httpx.Client(
+            transport=LimitedTransport(
+                llm_limiter, httpx.HTTPTransport(limits=HTTP_LIMITS),
+            ),
+            timeout=HTTP_TIMEOUT,
+        ),
+    )
+    tts_client = AsyncOpenAI(
+        api_key=config["api_key"],
+        base_url=base_url,
+        http_client=httpx.AsyncClient(
+            transport=AsyncLimitedTransport(
+                tts_limiter, httpx.AsyncHTTPTransport(limits=HTTP_LIMITS),
+            ),
+            timeout=HTTP_TIMEOUT,
+        ),
+    )
+    return llm_client, tts_client
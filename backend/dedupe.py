@@ -0,0 +1,120 @@
+"""Near-duplicate story detection (word shingles + MinHash + LSH banding).
+
+With several feeds the same event shows up more than once, each copy
+costing six LLM calls and three TTS renders. Stories are clustered on
+their normalized full text before any of that, and only the first story of
+each cluster (feed priority order) is kept.
+"""
+
+import hashlib
+import logging
+import random
+import re
+from collections import defaultdict
+
+from backend.models import RawStory
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 similarity almost always collide
+DEFAULT_THRESHOLD = 0.5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1701)  # fixed seed: signatures must be comparable across runs
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> list[str]:
+    """Case-folded word tokens with punctuation and markup noise removed."""
+    return _WORD.findall(text.casefold())
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[int]:
+    """Hashed word n-grams of the normalized text."""
+    words = normalize(text)
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    return {
+        int.from_bytes(
+            hashlib.blake2b(" ".join(words[i:i + size]).encode(), digest_size=4).digest(),
+            "big",
+        )
+        for i in range(len(words) - size + 1)
+    }
+
+
+def minhash_signature(text: str) -> tuple[int, ...]:
+    """MinHash signature; matching positions estimate Jaccard similarity."""
+    hashed = shingles(text)
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashed)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def cluster_stories(
+    stories: list[RawStory], threshold: float = DEFAULT_THRESHOLD,
+) -> list[list[RawStory]]:
+    """Group near-duplicate stories. Clusters and their members keep input order."""
+    signatures = [minhash_signature(s.full_text) for s in stories]
+    parent = list(range(len(stories)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    # Same article id from two feeds (e.g. DW categories) is always a duplicate
+    first_by_id: dict[str, int] = {}
+    for i, story in enumerate(stories):
+        union(i, first_by_id.setdefault(story.id, i))
+
+    # LSH: only pairs sharing at least one identical band get compared
+    rows = NUM_PERM // BANDS
+    buckets: dict[tuple, list[int]] = defaultdict(list)
+    for i, sig in enumerate(signatures):
+        for band in range(BANDS):
+            buckets[(band, sig[band * rows:(band + 1) * rows])].append(i)
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if find(i) != find(j) and (
+                    estimate_similarity(signatures[i], signatures[j]) >= threshold
+                ):
+                    union(i, j)
+
+    clusters: dict[int, list[RawStory]] = {}
+    for i, story in enumerate(stories):
+        clusters.setdefault(find(i), []).append(story)
+    return list(clusters.values())
+
+
+def dedupe_stories(
+    stories: list[RawStory], threshold: float = DEFAULT_THRESHOLD,
+) -> list[RawStory]:
+    """Keep one representative (the earliest) per near-duplicate cluster."""
+    clusters = cluster_stories(stories, threshold)
+    for cluster in clusters:
+        if len(cluster) > 1:
+            logger.info(
+                "Near-duplicates of %s dropped: %s",
+                cluster[0].id, ", ".join(s.id for s in cluster[1:]),
+            )
+    return [cluster[0] for cluster in clusters]
@@ -0,0 +1,176 @@
+"""Tap-to-translate glossary, built once per word for the whole archive.
+
+Every word form in a story's levels is looked up in a persistent dictionary
+store (output/glossary/dictionary.json):
+
+    {"schema_version", "forms": {form: lemma}, "lemmas": {lemma: gloss}}
+
+Forms the store doesn't know yet are glossed in one keyed request per story
+(GLOSSARY_PROMPT, the same {"items": {...}} shape as packed translation),
+which returns each form's lemma and a short English gloss. A form needed by
+several of today's stories is only requested by the first. The build then
+publishes a shard with just the forms used today, in the store's shape, as
+{date}/glossary.json next to the digest; the frontend loads it once and
+looks words up locally. A shard only grows during its day, so watch mode
+can add one story at a time.
+
+Forms are keyed as written, so a sentence-initial "Die" is its own form;
+the frontend falls back to the lowercase form. A form whose gloss can't be
+obtained is left out and requested again by the next build.
+
+Glossing runs unlocked; the store and shard are then re-read, merged and
+written under a lock, so concurrent calls (watch mode's workers) don't
+drop each other's entries.
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from openai import OpenAI
+
+from backend.cefr import words
+from backend.levels import call_llm, items_problems
+from backend.prompts import GLOSSARY_PROMPT
+from backend.routing import ModelRoutes
+from backend.storage import read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+GLOSSARY_SCHEMA_VERSION = 1
+GLOSSARY_TASK = "glossary"
+# Stories glossed at once
+GLOSSARY_WORKERS = 8
+
+# Serializes read-merge-write of the store and shards within the process
+_files_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class Dictionary:
+    forms: dict[str, str] = field(default_factory=dict)  # form -> lemma
+    lemmas: dict[str, str] = field(default_factory=dict)  # lemma -> English gloss
+
+    @classmethod
+    def load(cls, path: Path) -> "Dictionary":
+        if not path.exists():
+            return cls()
+        data = read_json(path)
+        return cls(data["forms"], data["lemmas"])
+
+    def save(self, path: Path) -> None:
+        write_json_atomic(path, self.to_dict())
+
+    def knows(self, form: str) -> bool:
+        return self.forms.get(form) in self.lemmas
+
+    def add(self, form: str, lemma: str, gloss: str) -> None:
+        self.forms[form] = lemma
+        self.lemmas.setdefault(lemma, gloss)
+
+    def shard(self, forms: list[str]) -> "Dictionary":
+        """The subset of the dictionary covering forms."""
+        known = {f: self.forms[f] for f in forms if self.knows(f)}
+        return Dictionary(known, {lemma: self.lemmas[lemma] for lemma in known.values()})
+
+    def to_dict(self) -> dict:
+        return {
+            "schema_version": GLOSSARY_SCHEMA_VERSION,
+            "forms": self.forms,
+            "lemmas": self.lemmas,
+        }
+
+
+def extract_vocabulary(texts: list[str]) -> list[str]:
+    """Distinct word forms in texts, in order of first appearance."""
+    forms = dict.fromkeys(w for text in texts for w in words(text) if len(w) > 1)
+    return list(forms)
+
+
+def gloss_forms(
+    client: OpenAI, model: str | ModelRoutes, forms: list[str],
+) -> dict[str, tuple[str, str]]:
+    """Lemma and English gloss for each form, in one request.
+
+    Forms the response leaves out or gets wrong are missing from the result.
+    """
+    prompt = GLOSSARY_PROMPT.format(forms_json=json.dumps(forms, ensure_ascii=False))
+    items = call_llm(client, model, prompt, GLOSSARY_TASK, items_problems).get("items")
+    glosses = {}
+    for form in forms:
+        item = items.get(form) if isinstance(items, dict) else None
+        if not isinstance(item, dict):
+            continue
+        lemma, gloss = item.get("lemma"), item.get("en")
+        if isinstance(lemma, str) and lemma.strip() and isinstance(gloss, str) and gloss.strip():
+            glosses[form] = (lemma.strip(), gloss.strip())
+    return glosses
+
+
+def build_glossary(
+    stories: dict[str, list[str]],
+    client: OpenAI,
+    model: str | ModelRoutes,
+    store_path: Path,
+    shard_path: Path,
+) -> int:
+    """Gloss the new words of {story_id: level texts}; write store and shard.
+
+    Returns the number of forms in the shard. A story whose request fails
+    is logged; its new words are simply missing from today's shard.
+    """
+    dictionary = Dictionary.load(store_path)
+    vocabulary = {sid: extract_vocabulary(texts) for sid, texts in stories.items()}
+
+    requested: set[str] = set()
+    missing: dict[str, list[str]] = {}
+    glossed: dict[str, tuple[str, str]] = {}
+    for story_id, forms in vocabulary.items():
+        new = [f for f in forms if not dictionary.knows(f) and f not in requested]
+        if new:
+            missing[story_id] = new
+            requested.update(new)
+
+    if missing:
+        logger.info(
+            "Glossing %d new word forms across %d stories", len(requested), len(missing),
+        )
+        with ThreadPoolExecutor(GLOSSARY_WORKERS) as pool:
+            futures = {
+                sid: pool.submit(gloss_forms, client, model, forms)
+                for sid, forms in missing.items()
+            }
+        for story_id, future in futures.items():
+            try:
+                glosses = future.result()
+            except Exception:
+                logger.exception("Glossary request for story %s failed", story_id)
+                continue
+            glossed.update(glosses)
+            if len(glosses) < len(missing[story_id]):
+                logger.warning(
+                    "Story %s: %d/%d word forms glossed",
+                    story_id, len(glosses), len(missing[story_id]),
+                )
+
+    with _files_lock:
+        # Re-read both files: another call may have saved them meanwhile
+        dictionary = Dictionary.load(store_path)
+        if glossed:
+            for form, (lemma, gloss) in glossed.items():
+                dictionary.add(form, lemma, gloss)
+            dictionary.save(store_path)
+
+        today = [f for forms in vocabulary.values() for f in forms]
+        if shard_path.exists():
+            today += Dictionary.load(shard_path).forms
+        shard = dictionary.shard(today)
+        shard.save(shard_path)
+    logger.info(
+        "Wrote %s: %d forms, %d lemmas (dictionary: %d forms)",
+        shard_path, len(shard.forms), len(shard.lemmas), len(dictionary.forms),
+    )
+    return len(shard.forms)
@@ -1,83 +1,345 @@
 import json
 import logging
+import threading
+import time
+from collections.abc import Callable
 
 from openai import OpenAI
 
+from backend.cefr import LEVEL_RULES, validate_level
+from backend.metrics import metrics
 from backend.models import LevelContent, ProcessedStory, RawStory
 from backend.prompts import (
+    CORRECTION_PROMPT,
     LEVEL_PROMPTS,
+    REPAIR_PROMPT,
+    SENTENCE_TRANSLATION_PROMPT,
     SYSTEM_PROMPT,
     TRANSLATION_PROMPT,
 )
+from backend.responses import ResponseError, parse, response_for, response_format
+from backend.routing import ModelRoutes, Route, as_routes
+from backend.translation_memory import TranslationMemory, join, segment
 
 logger = logging.getLogger(__name__)
 
+# Task names, used as prompt cache keys and for usage metrics
+LEVEL_TASKS = {3: "c1", 2: "b1", 1: "a1"}
+TRANSLATE_TASK = "translate"
+SENTENCE_TRANSLATE_TASK = "translate-sentences"
 
-def _call_llm(client: OpenAI, model: str, prompt: str) -> dict:
-    """Call OpenAI with a prompt and return parsed JSON response."""
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.3,
+
+class GenerationCancelled(Exception):
+    """Level generation was stopped because its cancel event was set."""
+
+
+def chat_params(
+    model: str,
+    prompt: str,
+    task: str | None = None,
+    repair: tuple[str, list[str]] | None = None,
+) -> dict:
+    """Keyword arguments for a JSON chat completion with our system prompt.
+
+    Tasks with a response model (backend.responses) get its strict JSON
+    schema, others JSON-object mode. Calls for the same task share a prompt
+    prefix; the task name is passed as the prompt cache key so the provider
+    routes them to the same cache. repair is (reply, problems) of an
+    unusable reply to this prompt, appended as a follow-up turn.
+    """
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+    if repair is not None:
+        reply, problems = repair
+        messages += [
+            {"role": "assistant", "content": reply},
+            {"role": "user", "content": REPAIR_PROMPT.format(
+                problems="\n".join(f"- {p}" for p in problems),
+            )},
+        ]
+    response = response_for(task)
+    params = {
+        "model": model,
+        "messages": messages,
+        "response_format": (
+            response_format(response) if response else {"type": "json_object"}
+        ),
+        "temperature": 0.3,
+    }
+    if task:
+        params["prompt_cache_key"] = f"langsame-nachrichten-{task}"
+    return params
+
+
+def expects(key: str) -> Callable[[dict], list[str]]:
+    """Check for call_llm: the result has a non-empty string under key."""
+    def check(result: dict) -> list[str]:
+        value = result.get(key) if isinstance(result, dict) else None
+        if isinstance(value, str) and value.strip():
+            return []
+        return [f"missing {key!r}"]
+    return check
+
+
+def _request(
+    client: OpenAI,
+    model: str,
+    prompt: str,
+    task: str | None,
+    repair: tuple[str, list[str]] | None = None,
+) -> str:
+    start = time.monotonic()
+    response = client.chat.completions.create(**chat_params(model, prompt, task, repair))
+    metrics.record_llm(
+        task or "other", model, response.usage, time.monotonic() - start,
+    )
+    return response.choices[0].message.content or ""
+
+
+def _complete(client: OpenAI, model: str, prompt: str, task: str | None) -> dict:
+    return json.loads(_request(client, model, prompt, task))
+
+
+def escalate(
+    client: OpenAI, route: Route, prompt: str, task: str | None, problems: list[str],
+) -> dict:
+    """Resend a prompt whose output failed validation to the stronger model."""
+    logger.info(
+        "Escalating %s from %s to %s: %s",
+        task, route.primary, route.escalation, "; ".join(problems),
+    )
+    metrics.record_escalation(task or "other", route.primary, route.escalation)
+    return _complete(client, route.escalation, prompt, task)
+
+
+def call_llm(
+    client: OpenAI,
+    model: str | ModelRoutes,
+    prompt: str,
+    task: str | None = None,
+    check: Callable[[dict], list[str]] | None = None,
+) -> dict:
+    """Call the task's model with a prompt and return the parsed JSON response.
+
+    check lists problems with a parsed result. If the JSON doesn't parse or
+    check finds problems, and the task's route has an escalation model, the
+    prompt is resent there once. Without one, JSON errors propagate and a
+    result with problems is returned as is.
+    """
+    route = as_routes(model).for_task(task)
+    try:
+        result = _complete(client, route.primary, prompt, task)
+    except json.JSONDecodeError as e:
+        if route.escalation is None:
+            raise
+        problems = [f"invalid JSON: {e}"]
+    else:
+        problems = check(result) if check else []
+        if not problems or route.escalation is None:
+            return result
+    return escalate(client, route, prompt, task, problems)
+
+
+def repair(
+    client: OpenAI, route: Route, prompt: str, task: str, reply: str, problems: list[str],
+):
+    """One targeted repair of a reply that doesn't parse into the task's response.
+
+    The reply and its problems go back as a follow-up turn, to the
+    escalation model if the route has one. Returns the parsed response;
+    raises ResponseError if the repaired reply is unusable too.
+    """
+    model = route.escalation or route.primary
+    logger.info("Repairing %s reply on %s: %s", task, model, "; ".join(problems))
+    metrics.record_repair(task)
+    if route.escalation:
+        metrics.record_escalation(task, route.primary, route.escalation)
+    return parse(response_for(task), _request(client, model, prompt, task, (reply, problems)))
+
+
+def call_structured(client: OpenAI, model: str | ModelRoutes, prompt: str, task: str):
+    """Call the task's model and parse the reply into the task's response model.
+
+    A reply that doesn't parse gets one repair call (see repair) rather than
+    failing the story.
+    """
+    route = as_routes(model).for_task(task)
+    reply = _request(client, route.primary, prompt, task)
+    try:
+        return parse(response_for(task), reply)
+    except ResponseError as e:
+        return repair(client, route, prompt, task, reply, e.problems)
+
+
+def items_problems(result: dict) -> list[str]:
+    """Check for call_llm: the result has an "items" object."""
+    items = result.get("items") if isinstance(result, dict) else None
+    return [] if isinstance(items, dict) else ["missing 'items'"]
+
+
+def translate_text(
+    client: OpenAI,
+    model: str | ModelRoutes,
+    text_de: str,
+    memory: TranslationMemory | None = None,
+) -> str:
+    """Translate a German level text into English.
+
+    With a translation memory, remembered sentences are reused and only the
+    rest are sent, keyed by position; if any of those comes back missing,
+    the whole text is translated in one call as without a memory.
+    """
+    if memory is not None:
+        sentences, separators = segment(text_de)
+        english: list[str | None] = []
+        pending: dict[str, str] = {}
+        exact = 0
+        for i, sentence in enumerate(sentences):
+            match = memory.lookup(sentence)
+            english.append(match[0] if match else None)
+            if match is None:
+                pending[str(i)] = sentence
+            elif match[1]:
+                exact += 1
+        metrics.record_memory(exact, len(sentences) - exact - len(pending), len(pending))
+        if not pending:
+            return join(english, separators)
+
+        prompt = SENTENCE_TRANSLATION_PROMPT.format(
+            items_json=json.dumps(pending, ensure_ascii=False, indent=2),
+        )
+        try:
+            items = call_llm(
+                client, model, prompt, SENTENCE_TRANSLATE_TASK, items_problems,
+            )["items"]
+        except Exception:
+            logger.exception("Sentence translation of %d items failed", len(pending))
+            items = {}
+        translated = {
+            key: items[key].strip() for key in pending
+            if isinstance(items.get(key), str) and items[key].strip()
+        }
+        if len(translated) == len(pending):
+            for key, text_en in translated.items():
+                memory.add(pending[key], text_en)
+                english[int(key)] = text_en
+            return join(english, separators)
+        logger.warning(
+            "Sentence translation missing %d/%d items, translating whole text",
+            len(pending) - len(translated), len(pending),
+        )
+
+    trans_prompt = TRANSLATION_PROMPT.format(text_de=text_de)
+    return call_structured(client, model, trans_prompt, TRANSLATE_TASK).text_en
+
+
+def enforce_level(
+    client: OpenAI, model: str | ModelRoutes, level: int, text_de: str,
+) -> str:
+    """Validate a level locally; on failure, make one targeted corrective call.
+
+    Returns the corrected text if it has fewer problems than the original,
+    otherwise the original (logged, so the build can still publish it).
+    The corrective call goes to the level's escalation model, if it has one.
+    """
+    problems = validate_level(level, text_de)
+    if not problems:
+        return text_de
+
+    rules = LEVEL_RULES[level]
+    logger.info("Level %s failed validation, correcting: %s", rules.name, problems)
+    prompt = CORRECTION_PROMPT.format(
+        level_name=rules.name,
+        problems="\n".join(f"- {p}" for p in problems),
+        text_de=text_de,
     )
-    content = response.choices[0].message.content
-    return json.loads(content)
+    task = f"correct-{LEVEL_TASKS[level]}"
+    route = as_routes(model).for_task(task)
+    corrected = call_structured(
+        client, route.escalation or route.primary, prompt, task,
+    ).text_de
+    remaining = validate_level(level, corrected)
+    if remaining:
+        logger.warning("Level %s still fails validation: %s", rules.name, remaining)
+    return corrected if len(remaining) < len(problems) else text_de
 
 
 def generate_levels(
-    story: RawStory, client: OpenAI, model: str
+    story: RawStory,
+    client: OpenAI,
+    model: str | ModelRoutes,
+    translate: bool = True,
+    validate: bool = True,
+    memory: TranslationMemory | None = None,
+    progress: Callable[[ProcessedStory], None] | None = None,
+    cancel: threading.Event | None = None,
 ) -> ProcessedStory:
     """Generate 3 CEFR-aligned difficulty levels for a story.
 
     Generation order: top-down sequential (C1 → B1 → A1).
     Levels are numbered 1 (A1), 2 (B1), 3 (C1).
+    With translate=False, text_en is left empty for a later packed
+    translation pass (backend.packing). With validate=True, each simplified
+    level is checked by backend.cefr and corrected before anything is built
+    on it. model is one model for every task, or per-task routes. memory
+    is an optional sentence-level translation memory for translate_text.
+    progress, if given, is called with the story so far once the C1 call
+    has returned the headlines and again after each level. Once cancel is
+    set, GenerationCancelled is raised before the next LLM call; a thread
+    whose task was cancelled stops instead of paying for discarded levels.
     """
     levels: dict[int, LevelContent] = {}
-    headline_de = ""
-    headline_en = ""
-    summary_en = ""
+
+    def check_cancelled() -> None:
+        if cancel is not None and cancel.is_set():
+            raise GenerationCancelled(f"Story {story.id} cancelled")
+
+    def snapshot() -> ProcessedStory:
+        return ProcessedStory(
+            id=story.id,
+            headline_de=result_c1.headline_de or story.title,
+            headline_en=result_c1.headline_en,
+            summary_en=result_c1.summary_en,
+            source_url=story.link,
+            levels=dict(levels),
+        )
 
     # Level 3 (C1) — start from original article
+    check_cancelled()
     prompt_c1 = LEVEL_PROMPTS[3].format(article_text=story.full_text)
-    result_c1 = _call_llm(client, model, prompt_c1)
-
-    headline_de = result_c1.get("headline_de", story.title)
-    headline_en = result_c1.get("headline_en", "")
-    summary_en = result_c1.get("summary_en", "")
-    text_de_c1 = result_c1["text_de"]
+    result_c1 = call_structured(client, model, prompt_c1, LEVEL_TASKS[3])
+    if progress is not None:
+        progress(snapshot())
+    text_de_c1 = result_c1.text_de
 
     # Translate C1
-    trans_prompt = TRANSLATION_PROMPT.format(text_de=text_de_c1)
-    trans_result = _call_llm(client, model, trans_prompt)
-    text_en_c1 = trans_result["text_en"]
+    check_cancelled()
+    text_en_c1 = translate_text(client, model, text_de_c1, memory) if translate else ""
 
     levels[3] = LevelContent(text_de=text_de_c1, text_en=text_en_c1)
     logger.info("Story %s: Level 3 (C1) generated", story.id)
+    if progress is not None:
+        progress(snapshot())
 
     # Level 2 (B1) — simplify from C1
     previous_text = text_de_c1
     for level_num in [2, 1]:
         prompt = LEVEL_PROMPTS[level_num].format(previous_text=previous_text)
-        result = _call_llm(client, model, prompt)
-        text_de = result["text_de"]
+        check_cancelled()
+        text_de = call_structured(client, model, prompt, LEVEL_TASKS[level_num]).text_de
+        if validate:
+            check_cancelled()
+            text_de = enforce_level(client, model, level_num, text_de)
 
-        trans_prompt = TRANSLATION_PROMPT.format(text_de=text_de)
-        trans_result = _call_llm(client, model, trans_prompt)
-        text_en = trans_result["text_en"]
+        check_cancelled()
+        text_en = translate_text(client, model, text_de, memory) if translate else ""
 
         levels[level_num] = LevelContent(text_de=text_de, text_en=text_en)
         previous_text = text_de
         logger.info("Story %s: Level %d generated", story.id, level_num)
+        if progress is not None:
+            progress(snapshot())
 
-    return ProcessedStory(
-        id=story.id,
-        headline_de=headline_de,
-        headline_en=headline_en,
-        summary_en=summary_en,
-        source_url=story.link,
-        levels=levels,
-    )
+    return snapshot()
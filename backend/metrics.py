@@ -0,0 +1,235 @@
+"""Per-build usage metrics: LLM tokens (incl. prompt-cache hits), latency, TTS chars.
+
+LLM usage is kept per route, i.e. per (task, model), along with how often
+each task escalated from its primary model (see backend.routing) and
+needed a repair call for a reply that didn't match its schema.
+Translation-memory lookups are counted per sentence (see
+backend.translation_memory).
+
+One BuildMetrics instance per process (`metrics`), reset at the start of a
+build and written to output/metrics/{date}.json at the end. That file is
+kept out of the published content tree.
+
+Usage recorded inside story_scope(story_id) is also counted per story
+(story_usage), for backend.budget. The scope is a context variable, so it
+follows the story into asyncio tasks and asyncio.to_thread calls.
+"""
+
+import logging
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class LlmUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds: float = 0.0
+
+
+@dataclass(slots=True)
+class StoryUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tts_chars: int = 0
+
+
+_current_story: ContextVar[str | None] = ContextVar("current_story", default=None)
+
+
+@contextmanager
+def story_scope(story_id: str) -> Iterator[None]:
+    """Attribute usage recorded within the block to story_id."""
+    token = _current_story.set(story_id)
+    try:
+        yield
+    finally:
+        _current_story.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for German/English prose (~4 chars per token)."""
+    return len(text) // 4 + 1
+
+
+def _count(value) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def usage_counts(usage) -> tuple[int, int, int]:
+    """(prompt, cached, completion) tokens from an OpenAI usage object, if any."""
+    if usage is None:
+        return 0, 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = _count(getattr(details, "cached_tokens", 0)) if details else 0
+    return (
+        _count(getattr(usage, "prompt_tokens", 0)),
+        cached,
+        _count(getattr(usage, "completion_tokens", 0)),
+    )
+
+
+class BuildMetrics:
+    """Thread-safe accumulator; LLM usage is keyed by (task, model)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.llm: dict[tuple[str, str], LlmUsage] = {}
+            self.escalations: dict[tuple[str, str, str], int] = {}
+            self.repairs: dict[str, int] = {}
+            self.tts_requests = 0
+            self.tts_chars = 0
+            self.source_stories = 0
+            self.source_tokens = 0
+            self.memory_exact = 0
+            self.memory_fuzzy = 0
+            self.memory_missed = 0
+            self.stories: dict[str, StoryUsage] = {}
+
+    def _story(self) -> StoryUsage | None:
+        story_id = _current_story.get()
+        if story_id is None:
+            return None
+        return self.stories.setdefault(story_id, StoryUsage())
+
+    def record_llm(self, task: str, model: str, usage, latency: float) -> None:
+        prompt, cached, completion = usage_counts(usage)
+        with self._lock:
+            entry = self.llm.setdefault((task, model), LlmUsage())
+            entry.calls += 1
+            entry.prompt_tokens += prompt
+            entry.cached_tokens += cached
+            entry.completion_tokens += completion
+            entry.latency_seconds += latency
+            story = self._story()
+            if story is not None:
+                story.prompt_tokens += prompt
+                story.completion_tokens += completion
+        logger.info(
+            "LLM %s (%s): %d prompt tokens (%d cached), %d completion tokens, %.1fs",
+            task, model, prompt, cached, completion, latency,
+        )
+
+    def record_escalation(self, task: str, from_model: str, to_model: str) -> None:
+        with self._lock:
+            key = (task, from_model, to_model)
+            self.escalations[key] = self.escalations.get(key, 0) + 1
+
+    def record_repair(self, task: str) -> None:
+        """Count a repair call for a reply that didn't match its schema."""
+        with self._lock:
+            self.repairs[task] = self.repairs.get(task, 0) + 1
+
+    def record_memory(self, exact: int, fuzzy: int, missed: int) -> None:
+        """Count a translation's sentences by how the memory matched them."""
+        with self._lock:
+            self.memory_exact += exact
+            self.memory_fuzzy += fuzzy
+            self.memory_missed += missed
+
+    def record_source(self, text: str) -> None:
+        """Count an input article; output/input ratios are learned from this."""
+        with self._lock:
+            self.source_stories += 1
+            self.source_tokens += estimate_tokens(text)
+
+    def record_tts(self, chars: int) -> None:
+        with self._lock:
+            self.tts_requests += 1
+            self.tts_chars += chars
+            story = self._story()
+            if story is not None:
+                story.tts_chars += chars
+
+    def story_usage(self, story_id: str) -> StoryUsage:
+        """What a story has used so far (within story_scope)."""
+        with self._lock:
+            return StoryUsage(**asdict(self.stories.get(story_id, StoryUsage())))
+
+    def totals(self) -> LlmUsage:
+        total = LlmUsage()
+        with self._lock:
+            for entry in self.llm.values():
+                total.calls += entry.calls
+                total.prompt_tokens += entry.prompt_tokens
+                total.cached_tokens += entry.cached_tokens
+                total.completion_tokens += entry.completion_tokens
+                total.latency_seconds += entry.latency_seconds
+        return total
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            llm = [
+                {"task": task, "model": model, **asdict(entry)}
+                for (task, model), entry in sorted(self.llm.items())
+            ]
+            escalations = [
+                {"task": task, "from_model": src, "to_model": dst, "count": count}
+                for (task, src, dst), count in sorted(self.escalations.items())
+            ]
+            repairs = [
+                {"task": task, "count": count} for task, count in sorted(self.repairs.items())
+            ]
+            tts = {"requests": self.tts_requests, "chars": self.tts_chars}
+            sources = {"stories": self.source_stories, "tokens": self.source_tokens}
+            memory = {
+                "exact": self.memory_exact,
+                "fuzzy": self.memory_fuzzy,
+                "missed": self.memory_missed,
+            }
+        totals = asdict(self.totals())
+        return {
+            "llm": llm,
+            "llm_totals": totals,
+            "escalations": escalations,
+            "repairs": repairs,
+            "tts": tts,
+            "sources": sources,
+            "translation_memory": memory,
+        }
+
+    def log_summary(self) -> None:
+        with self._lock:
+            routes = sorted(self.llm.items())
+            escalations = dict(self.escalations)
+            repairs = dict(self.repairs)
+        for (task, model), entry in routes:
+            logger.info(
+                "Route %s -> %s: %d calls, %d prompt + %d completion tokens, "
+                "%.1fs total (%.2fs/call)",
+                task, model, entry.calls, entry.prompt_tokens,
+                entry.completion_tokens, entry.latency_seconds,
+                entry.latency_seconds / entry.calls if entry.calls else 0.0,
+            )
+        for (task, src, dst), count in sorted(escalations.items()):
+            logger.info("Route %s escalated %s -> %s %d times", task, src, dst, count)
+        for task, count in sorted(repairs.items()):
+            logger.info("Route %s needed %d repair calls", task, count)
+        reused = self.memory_exact + self.memory_fuzzy
+        if reused + self.memory_missed:
+            logger.info(
+                "Translation memory: %d/%d sentences reused (%d fuzzy)",
+                reused, reused + self.memory_missed, self.memory_fuzzy,
+            )
+        total = self.totals()
+        hit_rate = total.cached_tokens / total.prompt_tokens if total.prompt_tokens else 0.0
+        logger.info(
+            "Usage: %d LLM calls, %d prompt tokens (%d cached, %.0f%%), "
+            "%d completion tokens; %d TTS requests, %d chars",
+            total.calls, total.prompt_tokens, total.cached_tokens, hit_rate * 100,
+            total.completion_tokens, self.tts_requests, self.tts_chars,
+        )
+
+
+metrics = BuildMetrics()
@@ -11,12 +11,33 @@ class RawStory:
     published_date: datetime
 
 
+@dataclass(frozen=True, slots=True)
+class AudioFile:
+    url: str
+    mime_type: str
+    size_bytes: int
+
+
+@dataclass(frozen=True, slots=True)
+class SentenceTiming:
+    """Where one sentence sits in text_de (chars) and in the audio (seconds)."""
+
+    char_start: int
+    char_end: int
+    start: float
+    end: float
+
+
 @dataclass(frozen=True, slots=True)
 class LevelContent:
     text_de: str
     text_en: str
     audio_url: str | None = None
     audio_duration_seconds: float | None = None
+    # Every rendition of the audio, in order of preference; audio_url is the MP3
+    audio_files: tuple[AudioFile, ...] = ()
+    # Per-sentence seek index, when audio was synthesized sentence by sentence
+    sentences: tuple[SentenceTiming, ...] = ()
 
 
 @dataclass(frozen=True, slots=True)
@@ -0,0 +1,239 @@
+"""Frame-level MP3 reading and splicing, without ffmpeg.
+
+An MP3 file is a sequence of self-contained frames, optionally wrapped in
+ID3 tags, with the first frame often a Xing/Info (LAME) or VBRI header
+that carries no audio. read() parses the frame headers, drops tags and
+header frames and keeps the audio frames; splice() joins the frames of
+several streams into one file with a fresh Info (CBR) or Xing (VBR) header
+giving the frame count, byte count and a seek table. Duration is exact:
+frames × samples per frame / sample rate.
+
+Only MPEG-1/2/2.5 Layer III is handled, and spliced streams must share
+version, sample rate and channel count; anything else raises ValueError so
+callers can fall back to ffmpeg.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bitrates (kbps) by index, for MPEG-1 and MPEG-2/2.5 Layer III
+_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+_VERSION_BITS = {0b11: 1, 0b10: 2, 0b00: 2.5}
+_MONO = 0b11
+
+# Xing header flags
+_FRAMES_FLAG, _BYTES_FLAG, _TOC_FLAG = 0x1, 0x2, 0x4
+_TAG_FIELDS_BYTES = 4 + 4 + 4 + 4 + 100  # tag, flags, frames, bytes, TOC
+
+
+@dataclass(frozen=True, slots=True)
+class FrameHeader:
+    raw: int
+    version: float  # 1, 2 or 2.5
+    bitrate: int  # kbps
+    sample_rate: int
+    padding: bool
+    crc: bool
+    channel_mode: int
+
+    @property
+    def mono(self) -> bool:
+        return self.channel_mode == _MONO
+
+    @property
+    def samples(self) -> int:
+        return 1152 if self.version == 1 else 576
+
+    @property
+    def length(self) -> int:
+        coefficient = 144 if self.version == 1 else 72
+        return coefficient * self.bitrate * 1000 // self.sample_rate + self.padding
+
+    @property
+    def side_info_bytes(self) -> int:
+        if self.version == 1:
+            return 17 if self.mono else 32
+        return 9 if self.mono else 17
+
+    def same_format(self, other: "FrameHeader") -> bool:
+        return (self.version, self.sample_rate, self.mono) == (
+            other.version, other.sample_rate, other.mono,
+        )
+
+
+def parse_header(data: bytes, pos: int) -> FrameHeader | None:
+    """The Layer III frame header at data[pos:], or None if there isn't one."""
+    if pos + 4 > len(data):
+        return None
+    raw = int.from_bytes(data[pos:pos + 4], "big")
+    if raw >> 21 != 0x7FF or (raw >> 17) & 0b11 != 0b01:  # sync, Layer III
+        return None
+    version = _VERSION_BITS.get((raw >> 19) & 0b11)
+    bitrate_index = (raw >> 12) & 0xF
+    rate_index = (raw >> 10) & 0b11
+    if version is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved, free-format or bad values
+    return FrameHeader(
+        raw=raw,
+        version=version,
+        bitrate=_BITRATES[1 if version == 1 else 2][bitrate_index],
+        sample_rate=_SAMPLE_RATES[version][rate_index],
+        padding=bool((raw >> 9) & 1),
+        crc=not (raw >> 16) & 1,
+        channel_mode=(raw >> 6) & 0b11,
+    )
+
+
+def _id3v2_size(data: bytes, pos: int) -> int:
+    """Size of an ID3v2 tag starting at pos, or 0."""
+    if data[pos:pos + 3] != b"ID3" or len(data) < pos + 10:
+        return 0
+    size = 0
+    for byte in data[pos + 6:pos + 10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[pos + 5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_header_frame(data: bytes, pos: int, header: FrameHeader) -> bool:
+    """Whether the frame at pos is a Xing/Info or VBRI header, not audio."""
+    offset = pos + 4 + (2 if header.crc else 0) + header.side_info_bytes
+    return data[offset:offset + 4] in (b"Xing", b"Info") or data[pos + 36:pos + 40] == b"VBRI"
+
+
+@dataclass(slots=True)
+class Mp3Stream:
+    """The audio frames of one MP3 file: (offset, header) into data."""
+
+    data: bytes
+    frames: list[tuple[int, FrameHeader]] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        if not self.frames:
+            return 0.0
+        header = self.frames[0][1]
+        return len(self.frames) * header.samples / header.sample_rate
+
+    @property
+    def audio_bytes(self) -> int:
+        return sum(h.length for _, h in self.frames)
+
+    def matches(self, sample_rate: int, bitrate: int, mono: bool = True) -> bool:
+        """Whether every frame is already in the given CBR format."""
+        return bool(self.frames) and all(
+            h.sample_rate == sample_rate and h.bitrate == bitrate and h.mono == mono
+            for _, h in self.frames
+        )
+
+
+def parse(data: bytes) -> Mp3Stream:
+    """Audio frames of an MP3 file's bytes; raises ValueError if there are none."""
+    stream = Mp3Stream(data)
+    pos = 0
+    while size := _id3v2_size(data, pos):
+        pos += size
+    first: FrameHeader | None = None
+    skipped = 0
+    while pos + 4 <= len(data):
+        header = parse_header(data, pos)
+        end = pos + header.length if header else pos
+        if header is not None and end <= len(data) and (
+            first.same_format(header) if first
+            # Before the first frame, confirm the sync with the next header
+            else end == len(data) or parse_header(data, end) is not None
+        ):
+            if first is None:
+                first = header
+                if _is_header_frame(data, pos, header):
+                    pos = end
+                    continue
+            stream.frames.append((pos, header))
+            pos = end
+            continue
+        if data[pos:pos + 3] == b"TAG" and len(data) - pos == 128:
+            break  # ID3v1
+        pos += 1
+        skipped += 1
+    if not stream.frames:
+        raise ValueError("no MPEG Layer III frames found")
+    if skipped:
+        logger.debug("Skipped %d bytes outside MP3 frames", skipped)
+    return stream
+
+
+def read(path: Path) -> Mp3Stream:
+    return parse(path.read_bytes())
+
+
+def duration(path: Path) -> float:
+    """Exact duration of an MP3 file from its frame count."""
+    return read(path).duration
+
+
+def _header_frame(template: FrameHeader, frames: int, total_bytes: int, toc: bytes,
+                  vbr: bool) -> bytes:
+    """An Info/Xing header frame in template's format."""
+    needed = 4 + template.side_info_bytes + _TAG_FIELDS_BYTES
+    table = _BITRATES[1 if template.version == 1 else 2]
+    for index, bitrate in enumerate(table[1:], start=1):
+        header = parse_header(
+            (template.raw & ~(0xF << 12) & ~(1 << 9) | (1 << 16) | (index << 12))
+            .to_bytes(4, "big"),
+            0,
+        )
+        if header.length >= needed:
+            break
+    frame = bytearray(header.length)
+    frame[0:4] = header.raw.to_bytes(4, "big")
+    offset = 4 + header.side_info_bytes
+    frame[offset:offset + _TAG_FIELDS_BYTES] = (
+        (b"Xing" if vbr else b"Info")
+        + (_FRAMES_FLAG | _BYTES_FLAG | _TOC_FLAG).to_bytes(4, "big")
+        + frames.to_bytes(4, "big")
+        + (total_bytes + header.length).to_bytes(4, "big")
+        + toc
+    )
+    return bytes(frame)
+
+
+def splice(streams: list[Mp3Stream], output_path: Path) -> float:
+    """Join streams' audio frames into one MP3 with an Info/Xing header.
+
+    Returns the duration of the result.
+    """
+    frames = [(s.data, pos, h) for s in streams for pos, h in s.frames]
+    if not frames:
+        raise ValueError("nothing to splice")
+    template = frames[0][2]
+    if not all(template.same_format(h) for _, _, h in frames):
+        raise ValueError("streams differ in MPEG version, sample rate or channels")
+
+    offsets = []
+    total = 0
+    for _, _, header in frames:
+        offsets.append(total)
+        total += header.length
+    toc = bytes(
+        min(255, offsets[i * len(frames) // 100] * 256 // total) for i in range(100)
+    )
+    vbr = len({h.bitrate for _, _, h in frames}) > 1
+    header_frame = _header_frame(template, len(frames), total, toc, vbr)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(header_frame)
+        for data, pos, header in frames:
+            f.write(data[pos:pos + header.length])
+    return len(frames) * template.samples / template.sample_rate
@@ -0,0 +1,125 @@
+"""Cross-story request packing for translation.
+
+Instead of one TRANSLATION_PROMPT call per level per story, pending German
+texts from many stories are grouped into keyed requests up to a token
+budget. Every item is checked on the way back; anything missing or empty
+falls back to a single-item translate_text call.
+"""
+
+import json
+import logging
+from dataclasses import replace
+
+from openai import OpenAI
+
+from backend.levels import call_llm, items_problems, translate_text
+from backend.metrics import estimate_tokens
+from backend.models import ProcessedStory
+from backend.prompts import PACKED_TRANSLATION_PROMPT
+from backend.routing import ModelRoutes
+
+logger = logging.getLogger(__name__)
+
+PACKED_TRANSLATE_TASK = "translate-packed"
+
+
+def pack_items(items: dict[str, str], token_budget: int) -> list[dict[str, str]]:
+    """Greedily group items, in order, into packs of at most token_budget tokens.
+
+    An item larger than the budget on its own gets a pack to itself.
+    """
+    packs: list[dict[str, str]] = []
+    current: dict[str, str] = {}
+    used = 0
+    for key, text in items.items():
+        cost = estimate_tokens(text)
+        if current and used + cost > token_budget:
+            packs.append(current)
+            current, used = {}, 0
+        current[key] = text
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _translate_pack(
+    client: OpenAI, model: str | ModelRoutes, pack: dict[str, str],
+) -> dict:
+    prompt = PACKED_TRANSLATION_PROMPT.format(
+        items_json=json.dumps(pack, ensure_ascii=False, indent=2),
+    )
+    try:
+        items = call_llm(
+            client, model, prompt, PACKED_TRANSLATE_TASK, items_problems,
+        ).get("items")
+    except Exception:
+        logger.exception("Packed translation of %d items failed", len(pack))
+        return {}
+    return items if isinstance(items, dict) else {}
+
+
+def translate_packed(
+    client: OpenAI, model: str | ModelRoutes, items: dict[str, str], token_budget: int,
+) -> dict[str, str]:
+    """Translate {key: text_de} to {key: text_en}.
+
+    Keys whose translation can't be obtained even by the per-item fallback
+    are left out of the result.
+    """
+    results: dict[str, str] = {}
+    packs = pack_items(items, token_budget)
+    for pack in packs:
+        returned = _translate_pack(client, model, pack)
+        for key, text_de in pack.items():
+            text_en = returned.get(key)
+            if isinstance(text_en, str) and text_en.strip():
+                results[key] = text_en
+                continue
+            logger.warning("Packed translation missing item %s, translating alone", key)
+            try:
+                results[key] = translate_text(client, model, text_de)
+            except Exception:
+                logger.exception("Fallback translation failed for %s", key)
+    logger.info(
+        "Translated %d/%d items in %d packed requests",
+        len(results), len(items), len(packs),
+    )
+    return results
+
+
+def _item_key(story_id: str, level: int) -> str:
+    return f"{story_id}:{level}"
+
+
+def fill_translations(
+    stories: list[ProcessedStory],
+    client: OpenAI,
+    model: str | ModelRoutes,
+    token_budget: int,
+) -> list[ProcessedStory]:
+    """Add English to every level of stories generated with translate=False.
+
+    A story with any level left untranslated is dropped, as it would have
+    been had its translation call failed inside generate_levels.
+    """
+    items = {
+        _item_key(story.id, level): content.text_de
+        for story in stories
+        for level, content in sorted(story.levels.items(), reverse=True)
+        if not content.text_en
+    }
+    translations = translate_packed(client, model, items, token_budget)
+
+    complete = []
+    for story in stories:
+        levels = dict(story.levels)
+        for level, content in story.levels.items():
+            key = _item_key(story.id, level)
+            if key in translations:
+                levels[level] = replace(content, text_en=translations[key])
+        if all(c.text_en for c in levels.values()):
+            complete.append(replace(story, levels=levels))
+        else:
+            logger.error("Dropping story %s: translation incomplete", story.id)
+    return complete
@@ -0,0 +1,105 @@
+"""Progressive publishing: headlines first, levels and audio as they finish.
+
+Without it, run_pipeline writes the digest once, after the last story's
+last audio file. With it, digest.json and latest.json are republished
+(atomically, so readers never see a torn file) every time a story makes
+progress: as soon as its C1 call returns the headlines, again as each
+level's text is done, and as each level's audio is. Until the final
+write, the digest carries "in_progress": true and every level of an
+unfinished story a status:
+
+    "pending"  — not generated yet; the level has no other fields
+    "text"     — text published, audio still being generated
+
+Finished stories and the final digest (written as before, by
+write_digest_streaming) carry no status. The publisher is closed before
+that write, and ignores stories it discarded, so a level thread that
+outlives its cancelled story can't republish a stale digest. The frontend polls latest.json
+while in_progress is set. The archive index is only updated by the
+final write.
+
+Only the content directory is republished; to make the partial digests
+visible, serve it live (backend.serve) or sync it (backend.publish) as
+often as needed.
+"""
+
+import logging
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+
+from backend.storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+LEVEL_PENDING = "pending"
+LEVEL_TEXT = "text"
+LEVELS = ("1", "2", "3")
+
+
+def with_status(story: dict) -> dict:
+    """A story_to_dict() of an unfinished story, with per-level statuses."""
+    levels = {}
+    for level in LEVELS:
+        content = story["levels"].get(level)
+        if content is None:
+            levels[level] = {"status": LEVEL_PENDING}
+        elif content.get("audio_url") is None:
+            levels[level] = {**content, "status": LEVEL_TEXT}
+        else:
+            levels[level] = content
+    return {**story, "levels": levels}
+
+
+class ProgressivePublisher:
+    """Keeps the day's partial digest and republishes it on every update.
+
+    header supplies the digest's fields but "stories"; stories are
+    published in `order` (feed order), then any others. Thread-safe:
+    updates come from the event loop and from level-generation threads.
+    Updates after close(), or for a discarded story, are ignored.
+    """
+
+    def __init__(self, header: dict, content_dir: Path, order: list[str]):
+        self.header = header
+        self.content_dir = content_dir
+        self.order = {story_id: i for i, story_id in enumerate(order)}
+        self._stories: dict[str, dict] = {}
+        self._discarded: set[str] = set()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def update(self, story: dict, done: bool = False) -> None:
+        """Publish a story's progress; done means every level is final."""
+        with self._lock:
+            if self._closed or story["id"] in self._discarded:
+                return
+            self._stories[story["id"]] = story if done else with_status(story)
+            self._write()
+
+    def discard(self, story_id: str) -> None:
+        """Unpublish a story that failed or was deferred."""
+        with self._lock:
+            self._discarded.add(story_id)
+            if not self._closed and self._stories.pop(story_id, None) is not None:
+                self._write()
+
+    def close(self) -> None:
+        """Stop republishing; the final digest is written elsewhere."""
+        with self._lock:
+            self._closed = True
+
+    def _write(self) -> None:
+        stories = sorted(
+            self._stories.values(),
+            key=lambda s: self.order.get(s["id"], len(self.order)),
+        )
+        digest = {
+            **self.header,
+            "generated_at": datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "in_progress": True,
+            "stories": stories,
+        }
+        write_json_atomic(self.content_dir / "digest.json", digest)
+        write_json_atomic(self.content_dir.parent / "latest.json", digest)
+        logger.debug("Republished %d stories in progress", len(stories))
@@ -2,6 +2,18 @@
 
 Generation order: top-down sequential (C1 → B1 → A1).
 3 levels: 1 (A1 Einfach), 2 (B1 Mittel), 3 (C1 Original).
+
+Every template puts its fixed instructions, grammar rules and JSON schema
+first and the variable article/text last. Calls for the same task then share
+one identical prefix (system prompt + instructions), which is what
+provider-side prompt caching matches on.
+
+The provider only caches prompts of 1024 tokens or more, and these fixed
+prefixes are far shorter: a few hundred tokens for the level templates and
+about 60 for translation. So across stories the prefix alone is never
+cached. Hits come from calls that resend a whole long prompt, such as a
+repair turn on the same model. The cached-token counts in the build
+metrics show what caching actually saves.
 """
 
 SYSTEM_PROMPT = """\
@@ -10,9 +22,10 @@ simplification. You transform German news articles into precisely graded \
 difficulty levels for language learners. Always respond in valid JSON."""
 
 LEVEL_5_C1_PROMPT = """\
-Take this German news article and lightly edit it for clarity. Keep the full \
-news register, all complex grammar, and domain vocabulary. Only fix obvious \
-errors or unclear phrasing. This is Level 5 (C1 — "Original").
+Take the German news article at the end of this message and lightly edit it \
+for clarity. Keep the full news register, all complex grammar, and domain \
+vocabulary. Only fix obvious errors or unclear phrasing. This is Level 5 \
+(C1 — "Original").
 
 ALLOWED GRAMMAR: Everything — Konjunktiv I (indirect speech), extended \
 participial constructions, nominalization, complex multi-clause sentences, \
@@ -24,23 +37,20 @@ CONSTRAINTS:
 - Maintain all domain-specific vocabulary
 - No sentence length limit
 
-ARTICLE:
-{article_text}
-
 Respond with JSON:
 {{
   "text_de": "The C1-level German text",
   "headline_de": "A concise German headline for this story",
   "headline_en": "English translation of the headline",
   "summary_en": "1-2 sentence English summary of the story"
-}}"""
+}}
 
-LEVEL_4_B2_PROMPT = """\
-Simplify this German text from C1 to B2 level. Remove the most complex \
-features while keeping sophisticated news language.
+ARTICLE:
+{article_text}"""
 
-CURRENT TEXT (C1):
-{previous_text}
+LEVEL_4_B2_PROMPT = """\
+Simplify the German text at the end of this message from C1 to B2 level. \
+Remove the most complex features while keeping sophisticated news language.
 
 CHANGES TO MAKE:
 - Replace Konjunktiv I (indirect speech) with direct speech or indicative
@@ -57,14 +67,14 @@ clauses, Präteritum, passive voice, domain vocabulary.
 Respond with JSON:
 {{
   "text_de": "The B2-level German text"
-}}"""
-
-LEVEL_3_B1_PROMPT = """\
-Simplify this German text from C1 to B1 level. This is the middle ground — \
-clear news language without advanced grammar.
+}}
 
 CURRENT TEXT (C1):
-{previous_text}
+{previous_text}"""
+
+LEVEL_3_B1_PROMPT = """\
+Simplify the German text at the end of this message from C1 to B1 level. \
+This is the middle ground — clear news language without advanced grammar.
 
 CHANGES TO MAKE:
 - Replace Konjunktiv II with simpler alternatives (würde + infinitive or indicative)
@@ -81,14 +91,14 @@ clauses, common Konjunktiv II (wäre, hätte, könnte), weil/dass/wenn clauses.
 Respond with JSON:
 {{
   "text_de": "The B1-level German text"
-}}"""
+}}
 
-LEVEL_2_A2_PROMPT = """\
-Simplify this German text from B1 to A2 level. Use only basic past tense \
-and simple subordinate clauses.
+CURRENT TEXT (C1):
+{previous_text}"""
 
-CURRENT TEXT (B1):
-{previous_text}
+LEVEL_2_A2_PROMPT = """\
+Simplify the German text at the end of this message from B1 to A2 level. \
+Use only basic past tense and simple subordinate clauses.
 
 CHANGES TO MAKE:
 - Replace Präteritum with Perfekt (except sein/haben/werden/modal verbs)
@@ -107,16 +117,16 @@ declension. Conjunctions: und, oder, aber, weil, dass, wenn.
 Respond with JSON:
 {{
   "text_de": "The A2-level German text"
-}}"""
-
-LEVEL_1_A1_PROMPT = """\
-Simplify this German text from B1 to A1 level. Use only the most basic \
-German. This should be understandable by a true beginner. Cover ALL the \
-main points of the story — do not shorten or summarize. Use more sentences \
-with simpler words to explain the same content.
+}}
 
 CURRENT TEXT (B1):
-{previous_text}
+{previous_text}"""
+
+LEVEL_1_A1_PROMPT = """\
+Simplify the German text at the end of this message from B1 to A1 level. \
+Use only the most basic German. This should be understandable by a true \
+beginner. Cover ALL the main points of the story — do not shorten or \
+summarize. Use more sentences with simpler words to explain the same content.
 
 CHANGES TO MAKE:
 - Use present tense ONLY (no Perfekt, no past tense)
@@ -133,19 +143,99 @@ basic vocabulary, no subordination.
 Respond with JSON:
 {{
   "text_de": "The A1-level German text"
-}}"""
+}}
+
+CURRENT TEXT (B1):
+{previous_text}"""
 
 TRANSLATION_PROMPT = """\
-Translate this German text into natural, fluent English. Keep the same level \
-of complexity and register as the German original.
+Translate the German text at the end of this message into natural, fluent \
+English. Keep the same level of complexity and register as the German original.
+
+Respond with JSON:
+{{
+  "text_en": "The English translation"
+}}
 
 GERMAN TEXT:
-{text_de}
+{text_de}"""
+
+# Follow-up turn after a reply that didn't match the task's response schema;
+# the original prompt and reply come first, so the prefix stays cached
+REPAIR_PROMPT = """\
+That reply can't be used:
+{problems}
+
+Reply again with the complete JSON object in the required format. Keep the \
+content you already wrote and fix only these problems."""
+
+CORRECTION_PROMPT = """\
+The German text at the end of this message was written for a CEFR level but \
+breaks that level's rules. Rewrite it so it follows the rules. Fix exactly \
+the problems listed; keep all the content, facts and the order of the story.
 
 Respond with JSON:
 {{
-  "text_en": "The English translation"
-}}"""
+  "text_de": "The corrected German text"
+}}
+
+TARGET LEVEL: {level_name}
+
+PROBLEMS:
+{problems}
+
+TEXT:
+{text_de}"""
+
+PACKED_TRANSLATION_PROMPT = """\
+Translate each German text in the JSON object at the end of this message into \
+natural, fluent English. Keep the same level of complexity and register as \
+each German original. Translate every item separately and return every key \
+exactly as given.
+
+Respond with JSON:
+{{
+  "items": {{
+    "<key>": "The English translation of that item"
+  }}
+}}
+
+GERMAN TEXTS:
+{items_json}"""
+
+SENTENCE_TRANSLATION_PROMPT = """\
+The JSON object at the end of this message holds sentences of one German \
+news text, keyed by their position in the text (some sentences are left \
+out). Translate each sentence into natural, fluent English, keeping the \
+register of the German original; use the other sentences as context, but \
+translate each one on its own and return every key exactly as given.
+
+Respond with JSON:
+{{
+  "items": {{
+    "<key>": "The English translation of that sentence"
+  }}
+}}
+
+SENTENCES:
+{items_json}"""
+
+GLOSSARY_PROMPT = """\
+For each German word form in the JSON list at the end of this message, give \
+its dictionary form (lemma: infinitive for verbs, nominative singular with \
+article for nouns, e.g. "der Hund", positive for adjectives) and a short \
+English gloss of the lemma (a few words; the most common meaning for news \
+text). Return every word form exactly as given as a key.
+
+Respond with JSON:
+{{
+  "items": {{
+    "<word form>": {{"lemma": "The lemma", "en": "Short English gloss"}}
+  }}
+}}
+
+WORD FORMS:
+{forms_json}"""
 
 # Map level numbers to their prompts (3 = C1 first, down to 1 = A1)
 LEVEL_PROMPTS = {
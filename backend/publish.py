@@ -0,0 +1,459 @@
+"""Incremental publishing of the content tree.
+
+Usage:
+    python -m backend.publish DEST [--source DIR] [--delete] [--workers N]
+
+DEST is a local directory, or s3://bucket/prefix for an S3-compatible
+store (S3_ENDPOINT_URL, AWS_REGION, AWS_ACCESS_KEY_ID and
+AWS_SECRET_ACCESS_KEY from the environment; requests are signed with
+SigV4 over httpx). The default source is output/content.
+
+The destination keeps a manifest of what it holds ({path: sha256, size}),
+at MANIFEST_NAME under its root. A publish hashes the source tree, diffs
+it against that manifest and transfers only new and changed files, in
+parallel. Media goes first and JSON (digests, indexes) last, so a reader
+never gets a digest that points at audio not uploaded yet. The manifest is
+written last, with whatever made it, so an interrupted publish is resumed
+by the next one. Files missing from the source are kept (a CI build only
+has today's content) unless --delete is given. For the same reason a
+changed archive index is first merged with the published one (see
+archive.merge_published), so the published archive keeps its past days.
+
+Source hashes are cached by size and mtime under output/publish/, so only
+files that changed on disk are read. Publish time and transfer therefore
+follow the size of the day's change, not of the archive.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from backend import build
+from backend.archive import merge_published
+from backend.serve import MIME_TYPES, cache_control
+from backend.storage import read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".publish-manifest.json"
+MANIFEST_SCHEMA_VERSION = 1
+PUBLISH_WORKERS = 16
+HASH_CHUNK_BYTES = 1024 * 1024
+ARCHIVE_INDEX = "archive/index.json"
+
+
+@dataclass(frozen=True, slots=True)
+class FileEntry:
+    sha256: str
+    size: int
+
+
+@dataclass(slots=True)
+class PublishResult:
+    uploaded: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    bytes_uploaded: int = 0
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan(source: Path, cache_path: Path | None = None) -> dict[str, FileEntry]:
+    """{relative path: entry} for every file under source.
+
+    With a cache file, a file whose size and mtime are unchanged since the
+    last scan isn't read again.
+    """
+    cache = read_json(cache_path) if cache_path and cache_path.exists() else {}
+    entries: dict[str, FileEntry] = {}
+    updated = {}
+    hashed = 0
+    for path in sorted(p for p in source.rglob("*") if p.is_file()):
+        key = path.relative_to(source).as_posix()
+        if key == MANIFEST_NAME:
+            continue
+        stat = path.stat()
+        cached = cache.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            sha256 = cached[2]
+        else:
+            sha256 = _sha256_file(path)
+            hashed += 1
+        entries[key] = FileEntry(sha256, stat.st_size)
+        updated[key] = [stat.st_size, stat.st_mtime_ns, sha256]
+    if cache_path is not None:
+        write_json_atomic(cache_path, updated)
+    logger.info("Scanned %d files under %s (%d hashed)", len(entries), source, hashed)
+    return entries
+
+
+def diff(
+    local: dict[str, FileEntry], published: dict[str, FileEntry],
+) -> tuple[list[str], list[str]]:
+    """(new or changed paths, paths only in published)."""
+    changed = [key for key, entry in local.items() if published.get(key) != entry]
+    removed = [key for key in published if key not in local]
+    return changed, removed
+
+
+def content_type(key: str) -> str:
+    suffix = Path(key).suffix
+    return MIME_TYPES.get(suffix) or mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+def _manifest_to_dict(files: dict[str, FileEntry]) -> dict:
+    return {
+        "schema_version": MANIFEST_SCHEMA_VERSION,
+        "files": {k: {"sha256": e.sha256, "size": e.size} for k, e in sorted(files.items())},
+    }
+
+
+def _manifest_from_dict(data: dict) -> dict[str, FileEntry]:
+    return {k: FileEntry(e["sha256"], e["size"]) for k, e in data["files"].items()}
+
+
+class Destination(ABC):
+    """Base class: where published files go, keyed by relative path."""
+
+    @abstractmethod
+    def read_manifest(self) -> dict | None:
+        """The stored manifest, or None if nothing was published yet."""
+
+    @abstractmethod
+    def write_manifest(self, manifest: dict) -> None:
+        """Store the manifest."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """The published file at key, or None if there is none."""
+
+    @abstractmethod
+    def put(self, key: str, path: Path, entry: FileEntry) -> None:
+        """Upload the file at path as key, replacing any previous version."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key; a missing key is not an error."""
+
+
+class LocalDestination(Destination):
+    """A directory, e.g. a web root or a mounted bucket."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def read_manifest(self) -> dict | None:
+        path = self.root / MANIFEST_NAME
+        return read_json(path) if path.exists() else None
+
+    def write_manifest(self, manifest: dict) -> None:
+        write_json_atomic(self.root / MANIFEST_NAME, manifest)
+
+    def get(self, key: str) -> bytes | None:
+        path = self.root / key
+        return path.read_bytes() if path.exists() else None
+
+    def put(self, key: str, path: Path, entry: FileEntry) -> None:
+        target = self.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp_name)
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def delete(self, key: str) -> None:
+        (self.root / key).unlink(missing_ok=True)
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def sign_v4(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    payload_sha256: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    service: str = "s3",
+    now: datetime | None = None,
+) -> dict[str, str]:
+    """headers plus the AWS Signature Version 4 headers for a request.
+
+    url must already be URI-encoded, as sent. Every header given (and Host)
+    is signed.
+    """
+    now = now or datetime.now(UTC)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    day = amz_date[:8]
+    parts = urlsplit(url)
+    signed = {
+        **{k.lower(): " ".join(v.split()) for k, v in headers.items()},
+        "host": parts.netloc,
+        "x-amz-content-sha256": payload_sha256,
+        "x-amz-date": amz_date,
+    }
+    names = sorted(signed)
+    query = "&".join(sorted(
+        pair if "=" in pair else pair + "=" for pair in parts.query.split("&") if pair
+    ))
+    canonical_request = "\n".join([
+        method,
+        parts.path or "/",
+        query,
+        "".join(f"{name}:{signed[name]}\n" for name in names),
+        ";".join(names),
+        payload_sha256,
+    ])
+    scope = f"{day}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256",
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+    key = _hmac(("AWS4" + secret_key).encode(), day)
+    for part in (region, service, "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return {
+        **headers,
+        "x-amz-content-sha256": payload_sha256,
+        "x-amz-date": amz_date,
+        "Authorization": (
+            f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+            f"SignedHeaders={';'.join(names)}, Signature={signature}"
+        ),
+    }
+
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+class S3Destination(Destination):
+    """A bucket prefix on an S3-compatible store, addressed path-style."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        prefix: str = "",
+        region: str = "us-east-1",
+        access_key: str = "",
+        secret_key: str = "",
+        client: httpx.Client | None = None,
+    ):
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.client = client or httpx.Client(
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=PUBLISH_WORKERS),
+        )
+
+    def _url(self, key: str) -> str:
+        return f"{self.endpoint}/{self.bucket}/{quote(self.prefix + key, safe='/-_.~')}"
+
+    def _request(
+        self,
+        method: str,
+        key: str,
+        body: bytes = b"",
+        payload_sha256: str = EMPTY_SHA256,
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        url = self._url(key)
+        signed = sign_v4(
+            method, url, headers or {}, payload_sha256,
+            self.access_key, self.secret_key, self.region,
+        )
+        return self.client.request(method, url, content=body, headers=signed)
+
+    def read_manifest(self) -> dict | None:
+        response = self._request("GET", MANIFEST_NAME)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _put_bytes(self, key: str, body: bytes, sha256: str, kind: str, cache: str) -> None:
+        response = self._request(
+            "PUT", key, body, sha256,
+            {"Content-Type": kind, "Cache-Control": cache},
+        )
+        response.raise_for_status()
+
+    def write_manifest(self, manifest: dict) -> None:
+        body = json.dumps(manifest, ensure_ascii=False).encode()
+        self._put_bytes(
+            MANIFEST_NAME, body, hashlib.sha256(body).hexdigest(),
+            "application/json", "no-cache",
+        )
+
+    def get(self, key: str) -> bytes | None:
+        response = self._request("GET", key)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+    def put(self, key: str, path: Path, entry: FileEntry) -> None:
+        self._put_bytes(
+            key, path.read_bytes(), entry.sha256, content_type(key),
+            cache_control(Path(key)),
+        )
+
+    def delete(self, key: str) -> None:
+        response = self._request("DELETE", key)
+        if response.status_code != 404:
+            response.raise_for_status()
+
+
+def make_destination(spec: str, env: dict | None = None) -> Destination:
+    """A destination from "s3://bucket/prefix" or a directory path."""
+    env = os.environ if env is None else env
+    if not spec.startswith("s3://"):
+        return LocalDestination(Path(spec))
+    bucket, _, prefix = spec[len("s3://"):].partition("/")
+    region = env.get("AWS_REGION", "us-east-1")
+    return S3Destination(
+        env.get("S3_ENDPOINT_URL") or f"https://s3.{region}.amazonaws.com",
+        bucket,
+        prefix,
+        region,
+        env.get("AWS_ACCESS_KEY_ID", ""),
+        env.get("AWS_SECRET_ACCESS_KEY", ""),
+    )
+
+
+def _merge_archive(source: Path, destination: Destination) -> None:
+    """Merge the published archive into the source's before it replaces it."""
+    def read(key: str) -> dict | None:
+        data = destination.get(key)
+        return json.loads(data) if data is not None else None
+
+    published = read(ARCHIVE_INDEX)
+    if published is not None:
+        merge_published(source, published, lambda month: read(f"archive/{month}.json"))
+
+
+def publish(
+    source: Path,
+    destination: Destination,
+    state_dir: Path | None = None,
+    delete: bool = False,
+    workers: int = PUBLISH_WORKERS,
+) -> PublishResult:
+    """Bring destination up to date with source, transferring only the diff."""
+    local = scan(source, state_dir / "hashes.json" if state_dir else None)
+    manifest = destination.read_manifest()
+    published = _manifest_from_dict(manifest) if manifest else {}
+    changed, removed = diff(local, published)
+    if ARCHIVE_INDEX in changed and ARCHIVE_INDEX in published:
+        _merge_archive(source, destination)
+        local = scan(source, state_dir / "hashes.json" if state_dir else None)
+        changed, removed = diff(local, published)
+    result = PublishResult(unchanged=len(local) - len(changed))
+    logger.info(
+        "Publishing %d changed files (%d unchanged, %d only at destination)",
+        len(changed), result.unchanged, len(removed),
+    )
+
+    def put(key: str) -> str:
+        destination.put(key, source / key, local[key])
+        return key
+
+    # Media first, then the JSON that references it
+    phases = (
+        [k for k in changed if not k.endswith(".json")],
+        [k for k in changed if k.endswith(".json")],
+    )
+    with ThreadPoolExecutor(workers) as pool:
+        for keys in phases:
+            futures = {key: pool.submit(put, key) for key in keys}
+            for key, future in futures.items():
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception("Failed to publish %s", key)
+                    result.failed.append(key)
+                    continue
+                published[key] = local[key]
+                result.uploaded.append(key)
+                result.bytes_uploaded += local[key].size
+            if result.failed:
+                break  # keep the JSON back; the next publish retries
+        if delete and not result.failed:
+            for key, future in {k: pool.submit(destination.delete, k) for k in removed}.items():
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception("Failed to delete %s", key)
+                    continue
+                del published[key]
+                result.deleted.append(key)
+
+    if result.uploaded or result.deleted or manifest is None:
+        destination.write_manifest(_manifest_to_dict(published))
+    logger.info(
+        "Published %d files (%.1f MB), deleted %d, failed %d",
+        len(result.uploaded), result.bytes_uploaded / 1e6,
+        len(result.deleted), len(result.failed),
+    )
+    return result
+
+
+def main() -> None:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dest", help="directory or s3://bucket/prefix")
+    parser.add_argument("--source", type=Path, default=build.OUTPUT_DIR / "content")
+    parser.add_argument("--delete", action="store_true",
+                        help="delete published files missing from the source")
+    parser.add_argument("--workers", type=int, default=PUBLISH_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    result = publish(
+        args.source, make_destination(args.dest), build.OUTPUT_DIR / "publish",
+        args.delete, args.workers,
+    )
+    if result.failed:
+        raise SystemExit(f"{len(result.failed)} files failed to publish")
+
+
+if __name__ == "__main__":
+    main()
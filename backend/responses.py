@@ -0,0 +1,152 @@
+"""Typed response models for the level and translation calls.
+
+Each model is a dataclass; json_schema() derives the strict JSON schema the
+provider enforces (structured outputs), and parse() validates a reply back
+into the dataclass. The schema marks every field required, as strict mode
+demands, but parse() only insists on the fields without a default: a reply
+missing a headline still gives a usable story, one missing its text doesn't.
+
+parse() tolerates what models get wrong even under a schema — a Markdown
+code fence, or the object wrapped in one stray outer key — and raises
+ResponseError listing the problems otherwise, so backend.levels can send
+one targeted repair instead of dropping the story.
+
+Calls answered with a keyed {"items": {...}} object (packed and sentence
+translations, glossing) keep JSON-object mode: strict schemas can't
+describe free-form keys.
+"""
+
+import json
+import re
+import typing
+from dataclasses import MISSING, dataclass, fields
+from functools import cache
+
+
+class ResponseError(ValueError):
+    """A reply that doesn't parse into its response model."""
+
+    def __init__(self, problems: list[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+@dataclass(frozen=True, slots=True)
+class LevelResponse:
+    """C1 rewrite of the source article, with the story's headlines."""
+
+    text_de: str
+    headline_de: str = ""
+    headline_en: str = ""
+    summary_en: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class TextResponse:
+    """A simplified or corrected level text."""
+
+    text_de: str
+
+
+@dataclass(frozen=True, slots=True)
+class TranslationResponse:
+    text_en: str
+
+
+_TASK_RESPONSES: dict[str, type] = {
+    "c1": LevelResponse,
+    "b1": TextResponse,
+    "a1": TextResponse,
+    "translate": TranslationResponse,
+}
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+_JSON_TYPES = {str: "string", int: "integer", float: "number"}
+
+
+def response_for(task: str | None) -> type | None:
+    """The response model of a task, or None for JSON-object mode."""
+    if task is None:
+        return None
+    return _TASK_RESPONSES.get(task.removeprefix("correct-"))
+
+
+@cache
+def _spec(response: type) -> tuple[tuple[str, type, bool, object], ...]:
+    """(name, type, required, default) per field, resolved once per model."""
+    hints = typing.get_type_hints(response)
+    return tuple(
+        (f.name, hints[f.name], f.default is MISSING, f.default) for f in fields(response)
+    )
+
+
+@cache
+def json_schema(response: type) -> dict:
+    """Strict JSON schema of a response model: all fields, nothing else."""
+    spec = _spec(response)
+    return {
+        "type": "object",
+        "properties": {name: {"type": _JSON_TYPES[hint]} for name, hint, _, _ in spec},
+        "required": [name for name, _, _, _ in spec],
+        "additionalProperties": False,
+    }
+
+
+def response_format(response: type) -> dict:
+    """The response_format parameter enforcing response's schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response.__name__,
+            "strict": True,
+            "schema": json_schema(response),
+        },
+    }
+
+
+def _unwrap(obj, required: list[str]):
+    """obj, or the object inside a single stray wrapper key that has the fields."""
+    if (
+        isinstance(obj, dict) and len(obj) == 1
+        and not any(name in obj for name in required)
+    ):
+        (inner,) = obj.values()
+        if isinstance(inner, dict):
+            return inner
+    return obj
+
+
+def parse(response: type, content: str | None):
+    """Validate a reply into an instance of response; raises ResponseError."""
+    if not content or not content.strip():
+        raise ResponseError(["empty reply"])
+    try:
+        obj = json.loads(_FENCE.sub("", content.strip()))
+    except json.JSONDecodeError as e:
+        raise ResponseError([f"invalid JSON: {e}"]) from None
+
+    spec = _spec(response)
+    obj = _unwrap(obj, [name for name, _, required, _ in spec if required])
+    if not isinstance(obj, dict):
+        raise ResponseError([f"expected a JSON object, got {type(obj).__name__}"])
+
+    values, problems = {}, []
+    for name, hint, required, default in spec:
+        value = obj.get(name)
+        if value is None:
+            if required:
+                problems.append(f"missing {name!r}")
+            else:
+                values[name] = default
+        elif not isinstance(value, hint):
+            problems.append(f"{name!r} is not a {_JSON_TYPES[hint]}")
+        elif hint is str:
+            if required and not value.strip():
+                problems.append(f"empty {name!r}")
+            else:
+                values[name] = value.strip()
+        else:
+            values[name] = value
+    if problems:
+        raise ResponseError(problems)
+    return response(**values)
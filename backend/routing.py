@@ -0,0 +1,72 @@
+"""Per-task LLM model routing.
+
+Each task (c1, b1, a1, translate, glossary) has a primary model and,
+optionally, a stronger escalation model that is only called when the
+primary's output fails validation: a reply that doesn't match the task's
+response schema (the repair call goes to the escalation model, see
+backend.responses) or a CEFR check (so does the corrective call). Most
+calls can then go to a smaller, faster model without downgrading the ones
+that need more.
+
+Routes are configured as "task=primary" or "task=primary>escalation",
+comma-separated, e.g.
+
+    LLM_ROUTES="b1=gpt-4.1-mini>gpt-4o,a1=gpt-4.1-mini>gpt-4o,translate=gpt-4.1-nano"
+
+Tasks without a route use LLM_MODEL and never escalate. Derived tasks use
+their base task's route: "correct-b1" routes as b1, "translate-packed" as
+translate.
+"""
+
+from dataclasses import dataclass, field
+
+ROUTED_TASKS = ("c1", "b1", "a1", "translate", "glossary")
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    primary: str
+    escalation: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ModelRoutes:
+    default: Route
+    routes: dict[str, Route] = field(default_factory=dict)
+
+    def for_task(self, task: str | None) -> Route:
+        if task:
+            for name in (task, *task.split("-")):
+                if name in self.routes:
+                    return self.routes[name]
+        return self.default
+
+    def to_dict(self) -> dict:
+        return {
+            task: {"primary": r.primary, "escalation": r.escalation}
+            for task, r in {"default": self.default, **self.routes}.items()
+        }
+
+
+def as_routes(model: "str | ModelRoutes") -> ModelRoutes:
+    """Routes for a model argument; a plain model name routes every task to it."""
+    if isinstance(model, ModelRoutes):
+        return model
+    return ModelRoutes(Route(model))
+
+
+def parse_routes(spec: str, default_model: str) -> ModelRoutes:
+    """Parse an LLM_ROUTES value (see module docstring)."""
+    routes: dict[str, Route] = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        task, sep, models = entry.partition("=")
+        task = task.strip()
+        primary, _, escalation = models.partition(">")
+        if not sep or not primary.strip():
+            raise ValueError(f"Bad route {entry.strip()!r}; expected task=model[>model]")
+        if task not in ROUTED_TASKS:
+            raise ValueError(f"Unknown task {task!r} in routes; expected one of {ROUTED_TASKS}")
+        routes[task] = Route(primary.strip(), escalation.strip() or None)
+    return ModelRoutes(Route(default_model), routes)
@@ -0,0 +1,193 @@
+"""Cost-model story scheduling: longest jobs first, within a publish deadline.
+
+A story's wall time is dominated by its chain of sequential LLM calls
+(C1 → B1 → A1 plus translations) and then its audio, all roughly
+proportional to the length of the source article. Per-task output ratios
+(completion tokens per source token) and speeds (seconds per completion
+token) are learned from past builds' output/metrics/*.json, with defaults
+until there is history. Prompt tokens per source token are learned the
+same way, for backend.budget's spend projections.
+
+Stories are started longest first (LPT), which keeps one long article
+started last from setting the build's finish time. If the projected finish
+is past the deadline, stories too long to finish in time at all are
+deferred, then the lowest-priority ones (latest in feed order) until the
+projection fits.
+"""
+
+import heapq
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from backend.levels import LEVEL_TASKS, TRANSLATE_TASK
+from backend.metrics import estimate_tokens
+from backend.models import RawStory
+from backend.storage import read_json
+
+logger = logging.getLogger(__name__)
+
+# Completion tokens per source token, by task (translate covers all levels)
+DEFAULT_OUTPUT_RATIOS = {"c1": 0.9, "b1": 0.6, "a1": 0.35, "translate": 1.7}
+# Prompt tokens per source token: each call's instructions plus its input
+DEFAULT_PROMPT_RATIOS = {"c1": 1.4, "b1": 1.3, "a1": 1.0, "translate": 3.0}
+DEFAULT_SECONDS_PER_TOKEN = 0.015
+# TTS runs per level in parallel; the C1 text (~4 chars per token) is the tail
+TTS_SECONDS_PER_CHAR = 0.004
+HISTORY_BUILDS = 14
+
+_TASKS = (*LEVEL_TASKS.values(), TRANSLATE_TASK)
+
+
+@dataclass(slots=True)
+class CostModel:
+    output_ratios: dict[str, float] = field(
+        default_factory=lambda: dict(DEFAULT_OUTPUT_RATIOS)
+    )
+    seconds_per_token: dict[str, float] = field(
+        default_factory=lambda: dict.fromkeys(_TASKS, DEFAULT_SECONDS_PER_TOKEN)
+    )
+    prompt_ratios: dict[str, float] = field(
+        default_factory=lambda: dict(DEFAULT_PROMPT_RATIOS)
+    )
+
+    def estimate_seconds(self, story: RawStory) -> float:
+        """Projected wall time to generate one story's levels and audio."""
+        tokens = estimate_tokens(story.full_text)
+        llm = sum(
+            ratio * tokens * self.seconds_per_token.get(task, DEFAULT_SECONDS_PER_TOKEN)
+            for task, ratio in self.output_ratios.items()
+        )
+        tts_chars = self.output_ratios.get("c1", 0.0) * tokens * 4
+        return llm + tts_chars * TTS_SECONDS_PER_CHAR
+
+
+def load_cost_model(metrics_dir: Path, history: int = HISTORY_BUILDS) -> CostModel:
+    """Learn a CostModel from the most recent build metrics files.
+
+    Tasks with no usable history keep their defaults.
+    """
+    model = CostModel()
+    files = sorted(metrics_dir.glob("*.json"))[-history:]
+    source_tokens = 0
+    completion = dict.fromkeys(_TASKS, 0)
+    prompt = dict.fromkeys(_TASKS, 0)
+    latency = dict.fromkeys(_TASKS, 0.0)
+    for path in files:
+        try:
+            data = read_json(path)
+        except (OSError, ValueError):
+            logger.warning("Skipping unreadable metrics file %s", path)
+            continue
+        tokens = data.get("sources", {}).get("tokens", 0)
+        for row in data.get("llm", []):
+            if row.get("task") not in completion:
+                continue
+            latency[row["task"]] += row.get("latency_seconds", 0.0)
+            # Ratios need the source size, which older files don't record
+            if tokens:
+                completion[row["task"]] += row.get("completion_tokens", 0)
+                prompt[row["task"]] += row.get("prompt_tokens", 0)
+        source_tokens += tokens
+
+    for task in _TASKS:
+        if source_tokens and completion[task]:
+            model.output_ratios[task] = completion[task] / source_tokens
+            model.seconds_per_token[task] = latency[task] / completion[task]
+        if source_tokens and prompt[task]:
+            model.prompt_ratios[task] = prompt[task] / source_tokens
+    if files:
+        logger.info(
+            "Cost model from %d builds: ratios %s",
+            len(files),
+            {t: round(r, 2) for t, r in model.output_ratios.items()},
+        )
+    return model
+
+
+def seconds_until(
+    publish_at: str, margin: float = 0.0, now: datetime | None = None,
+) -> float | None:
+    """Seconds from now until the next publish time ("HH:MM"), minus a margin.
+
+    A time already past today means tomorrow's: a nightly build started at
+    23:00 for 06:00 has seven hours. Returns None if the publish time is
+    less than the margin away: the build is late anyway and should publish
+    whatever it can as soon as it can.
+    """
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in publish_at.split(":"))
+    deadline = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if deadline <= now:
+        deadline += timedelta(days=1)
+    remaining = (deadline - now).total_seconds() - margin
+    return remaining if remaining > 0 else None
+
+
+def projected_makespan(durations: list[float], slots: int) -> float:
+    """Finish time of running durations in order on `slots` parallel workers."""
+    if not durations:
+        return 0.0
+    workers = [0.0] * min(slots, len(durations))
+    for duration in durations:
+        heapq.heapreplace(workers, workers[0] + duration)
+    return max(workers)
+
+
+@dataclass(slots=True)
+class Schedule:
+    order: list[RawStory]  # start order, longest first
+    deferred: list[RawStory]
+    estimates: dict[str, float]
+    projected_seconds: float
+
+    def to_dict(self) -> dict:
+        return {
+            "order": [s.id for s in self.order],
+            "deferred": [s.id for s in self.deferred],
+            "estimates": {k: round(v, 1) for k, v in self.estimates.items()},
+            "projected_seconds": round(self.projected_seconds, 1),
+        }
+
+
+def plan(
+    stories: list[RawStory],
+    model: CostModel,
+    slots: int | None = None,
+    budget_seconds: float | None = None,
+) -> Schedule:
+    """Order stories longest first; defer stories to fit the budget.
+
+    Stories are given in priority order (most important first). slots is the
+    number of stories processed at once (None: all of them). At least one
+    story is always kept.
+    """
+    estimates = {s.id: model.estimate_seconds(s) for s in stories}
+    kept = list(stories)
+    deferred: list[RawStory] = []
+
+    def makespan(candidates: list[RawStory]) -> float:
+        durations = sorted((estimates[s.id] for s in candidates), reverse=True)
+        return projected_makespan(durations, slots or len(candidates))
+
+    if budget_seconds is not None:
+        # A story that can't finish in time on its own can't be saved by
+        # dropping others
+        too_long = [s for s in kept if estimates[s.id] > budget_seconds]
+        if len(too_long) == len(kept):
+            too_long = too_long[1:]
+        deferred = too_long
+        kept = [s for s in kept if s not in too_long]
+        while makespan(kept) > budget_seconds and len(kept) > 1:
+            deferred.append(kept.pop())
+
+    if deferred:
+        logger.warning(
+            "Projected %.0fs exceeds budget of %.0fs; deferring %s",
+            makespan(kept + deferred), budget_seconds,
+            ", ".join(s.id for s in deferred),
+        )
+    order = sorted(kept, key=lambda s: estimates[s.id], reverse=True)
+    deferred.sort(key=stories.index)
+    return Schedule(order, deferred, estimates, makespan(kept))
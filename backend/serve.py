@@ -0,0 +1,280 @@
+"""Local preview server with production-like caching and delivery.
+
+Usage:
+    python -m backend.serve [--port 8000] [--bind 127.0.0.1] [--site DIR] [--output DIR]
+
+Serves the site (default: frontend/, as copied into the Pages artifact) at
+/ and the built content (default: output/content) at /content/, so the
+frontend and its service worker can be exercised and load-tested locally
+without assembling _site. Build the CSS first with Tailwind as in the
+deploy workflow.
+
+Behavior:
+    - HTTP/1.1 keep-alive, one thread per connection
+    - single-range requests (206 / 416) for audio scrubbing
+    - a .br or .gz sibling is sent instead of the file when the client
+      accepts that encoding (never for range requests)
+    - ETag / Last-Modified revalidation (304)
+    - Cache-Control: immutable for content-hashed file names
+      (name.<hex hash>.ext), no-cache for JSON so a new digest shows up
+      immediately, and max-age=600 otherwise, as GitHub Pages does
+    - files of SENDFILE_MIN_BYTES and up are sent with sendfile()
+"""
+
+import argparse
+import email.utils
+import logging
+import os
+import re
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import ClassVar
+from urllib.parse import unquote, urlsplit
+
+from backend import build
+
+logger = logging.getLogger(__name__)
+
+SITE_DIR = Path("frontend")
+SENDFILE_MIN_BYTES = 64 * 1024
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+DEFAULT_CACHE = "public, max-age=600"
+
+# Precompressed siblings, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+MIME_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".ogg": "audio/ogg",
+    ".webm": "audio/webm",
+    ".json": "application/json",
+    ".ndjson": "application/x-ndjson",
+    ".js": "text/javascript",
+    ".css": "text/css",
+    ".svg": "image/svg+xml",
+}
+
+
+def cache_control(path: Path) -> str:
+    if _HASHED_NAME.search(path.name):
+        return IMMUTABLE
+    if path.suffix == ".json":
+        return REVALIDATE
+    return DEFAULT_CACHE
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """(first, last) byte positions of a single-range header, inclusive.
+
+    Returns None for a header we don't honor (multiple ranges, other units),
+    in which case the whole file is sent. Raises ValueError if the range is
+    unsatisfiable.
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError(f"range starts past end of {size}-byte file")
+    return first, last
+
+
+def _accepts(header: str, coding: str) -> bool:
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """Serves site_dir at / and content_dir at /content/."""
+
+    protocol_version = "HTTP/1.1"
+    extensions_map: ClassVar[dict[str, str]] = {
+        **SimpleHTTPRequestHandler.extensions_map, **MIME_TYPES,
+    }
+
+    def __init__(self, *args, site_dir: Path, content_dir: Path, **kwargs):
+        self.site_dir = site_dir
+        self.content_dir = content_dir
+        super().__init__(*args, directory=str(site_dir), **kwargs)
+
+    def resolve(self, url: str) -> Path | None:
+        """Filesystem path for a request URL, or None if it's outside the roots."""
+        parts = [p for p in unquote(urlsplit(url).path).split("/") if p not in ("", ".")]
+        if any(p == ".." or "\\" in p or "\0" in p for p in parts):
+            return None
+        root = self.site_dir
+        if parts[:1] == ["content"]:
+            root, parts = self.content_dir, parts[1:]
+        path = root.joinpath(*parts)
+        if path.is_dir():
+            path = path / "index.html"
+        return path
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s " + format, self.address_string(), *args)
+
+    def do_GET(self) -> None:
+        self._serve(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._serve(send_body=False)
+
+    def _pick_encoding(self, path: Path) -> tuple[Path, str | None]:
+        if "Range" in self.headers:
+            return path, None
+        accepted = self.headers.get("Accept-Encoding", "")
+        for coding, suffix in ENCODINGS:
+            sibling = path.with_name(path.name + suffix)
+            if _accepts(accepted, coding) and sibling.is_file():
+                return sibling, coding
+        return path, None
+
+    def _serve(self, send_body: bool) -> None:
+        path = self.resolve(self.path)
+        if path is None or not path.is_file():
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        has_variants = any(path.with_name(path.name + s).is_file() for _, s in ENCODINGS)
+        body_path, coding = self._pick_encoding(path)
+        try:
+            fd = os.open(body_path, os.O_RDONLY)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        with open(fd, "rb") as f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}{"-" + coding if coding else ""}"'
+            last_modified = self.date_time_string(stat.st_mtime)
+
+            status, first, last = HTTPStatus.OK, 0, size - 1
+            if self._not_modified(etag, stat.st_mtime):
+                status = HTTPStatus.NOT_MODIFIED
+            elif "Range" in self.headers and self._if_range_ok(etag, last_modified):
+                try:
+                    byte_range = parse_range(self.headers["Range"], size)
+                except ValueError:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if byte_range is not None:
+                    status = HTTPStatus.PARTIAL_CONTENT
+                    first, last = byte_range
+
+            self.send_response(status)
+            self.send_header("Content-Type", self.guess_type(str(path)))
+            self.send_header("Cache-Control", cache_control(path))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Accept-Ranges", "bytes")
+            if has_variants:
+                self.send_header("Vary", "Accept-Encoding")
+            if coding:
+                self.send_header("Content-Encoding", coding)
+            if status == HTTPStatus.NOT_MODIFIED:
+                self.end_headers()
+                return
+            if status == HTTPStatus.PARTIAL_CONTENT:
+                self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+            length = last - first + 1
+            self.send_header("Content-Length", str(length))
+            self.end_headers()
+            if send_body and length > 0:
+                self._send_file(f, first, length)
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        if "If-None-Match" in self.headers:
+            tags = [t.strip() for t in self.headers["If-None-Match"].split(",")]
+            return etag in tags or "*" in tags
+        if "If-Modified-Since" in self.headers:
+            try:
+                since = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since.timestamp()
+        return False
+
+    def _if_range_ok(self, etag: str, last_modified: str) -> bool:
+        """A stale If-Range means the client wants the whole (new) file."""
+        if_range = self.headers.get("If-Range")
+        return if_range is None or if_range in (etag, last_modified)
+
+    def _send_file(self, f, offset: int, length: int) -> None:
+        if length >= SENDFILE_MIN_BYTES:
+            # Zero-copy from the page cache to the socket where supported;
+            # socket.sendfile falls back to send() elsewhere
+            self.wfile.flush()
+            self.connection.sendfile(f, offset, length)
+            return
+        f.seek(offset)
+        self.wfile.write(f.read(length))
+
+
+class PreviewServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # room for load-test bursts
+
+
+def make_server(
+    site_dir: Path = SITE_DIR,
+    content_dir: Path = build.OUTPUT_DIR / "content",
+    host: str = "127.0.0.1",
+    port: int = 8000,
+) -> PreviewServer:
+    """A server ready to serve_forever(); port 0 picks a free port."""
+    handler = partial(
+        PreviewHandler, site_dir=site_dir.resolve(), content_dir=content_dir.resolve(),
+    )
+    return PreviewServer((host, port), handler)
+
+
+def main() -> None:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--site", type=Path, default=SITE_DIR)
+    parser.add_argument("--output", type=Path, default=build.OUTPUT_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    server = make_server(args.site, args.output / "content", args.bind, args.port)
+    host, port = server.server_address[:2]
+    logger.info("Serving %s and %s/content at http://%s:%d/", args.site, args.output, host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
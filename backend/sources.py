@@ -1,9 +1,17 @@
+import hashlib
+import html
 import logging
+import re
+from collections.abc import Container, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain, zip_longest
+from urllib.parse import urlparse
 
 import feedparser
 import httpx
 
+from backend.dedupe import dedupe_stories
 from backend.models import RawStory
 
 logger = logging.getLogger(__name__)
@@ -12,14 +20,22 @@ DW_RSS_URL = "https://rss.dw.com/xml/rss-de-all"
 DW_API_URL = "https://api.dw.com/api/detail/article/{article_id}"
 HTTP_TIMEOUT = 30.0
 
+_TAG = re.compile(r"<[^>]+>")
 
-def fetch_rss_entries(max_entries: int = 10) -> list[dict]:
-    """Fetch and return the most recent RSS entries from DW."""
-    feed = feedparser.parse(DW_RSS_URL)
+
+def is_dw_feed(feed_url: str) -> bool:
+    """DW feeds get full text from the DW API; other feeds use the RSS body."""
+    host = urlparse(feed_url).hostname or ""
+    return host == "dw.com" or host.endswith(".dw.com")
+
+
+def fetch_rss_entries(max_entries: int = 10, feed_url: str = DW_RSS_URL) -> list[dict]:
+    """Fetch and return the most recent RSS entries from a feed (DW by default)."""
+    feed = feedparser.parse(feed_url)
     if feed.bozo and not feed.entries:
-        raise RuntimeError(f"Failed to parse DW RSS feed: {feed.bozo_exception}")
+        raise RuntimeError(f"Failed to parse RSS feed {feed_url}: {feed.bozo_exception}")
     entries = feed.entries[:max_entries]
-    logger.info("Fetched %d RSS entries from DW", len(entries))
+    logger.info("Fetched %d RSS entries from %s", len(entries), feed_url)
     return entries
 
 
@@ -59,9 +75,31 @@ def fetch_article_text(article_id: str) -> str:
         return text
 
 
-def fetch_stories(max_stories: int = 5) -> list[RawStory]:
-    """Fetch today's stories from DW: RSS discovery + API full text."""
-    entries = fetch_rss_entries(max_entries=max_stories * 2)
+def entry_text(entry: dict) -> str:
+    """Plain text of an RSS entry's body, for feeds without a full-text API."""
+    contents = entry.get("content") or []
+    body = contents[0].get("value", "") if contents else entry.get("summary", "")
+    text = html.unescape(_TAG.sub(" ", body))
+    return " ".join(text.split())
+
+
+def _story_id(parsed: dict, dw: bool) -> str:
+    # Story IDs become directory names; non-DW entry IDs are often URLs
+    if dw:
+        return parsed["id"]
+    return hashlib.sha1((parsed["id"] or parsed["link"]).encode()).hexdigest()[:12]
+
+
+def fetch_feed_stories(
+    feed_url: str, max_stories: int, skip_ids: Container[str] = (),
+) -> list[RawStory]:
+    """Fetch up to max_stories stories with full text from one feed.
+
+    Entries whose story ID is in skip_ids are passed over before their full
+    text is fetched.
+    """
+    dw = is_dw_feed(feed_url)
+    entries = fetch_rss_entries(max_entries=max_stories * 2, feed_url=feed_url)
     stories = []
 
     for entry in entries:
@@ -69,15 +107,20 @@ def fetch_stories(max_stories: int = 5) -> list[RawStory]:
             break
 
         parsed = parse_rss_entry(entry)
+        story_id = _story_id(parsed, dw)
+        if story_id in skip_ids:
+            continue
         try:
-            full_text = fetch_article_text(parsed["id"])
+            full_text = fetch_article_text(parsed["id"]) if dw else entry_text(entry)
+            if not full_text:
+                raise ValueError("empty entry body")
         except Exception:
             logger.warning("Failed to fetch article %s, skipping", parsed["id"])
             continue
 
         stories.append(
             RawStory(
-                id=parsed["id"],
+                id=story_id,
                 title=parsed["title"],
                 link=parsed["link"],
                 full_text=full_text,
@@ -85,5 +128,45 @@ def fetch_stories(max_stories: int = 5) -> list[RawStory]:
             )
         )
 
-    logger.info("Fetched %d stories with full text", len(stories))
+    return stories
+
+
+def fetch_stories(
+    max_stories: int = 5,
+    feeds: list[str] | None = None,
+    dedupe_threshold: float | None = None,
+    skip_ids: Container[str] = (),
+    published: Sequence[RawStory] = (),
+) -> list[RawStory]:
+    """Fetch today's stories: RSS discovery + full text, from every feed at once.
+
+    Feeds are fetched concurrently and interleaved round-robin, so the first
+    feed's top story comes first, then the second feed's, and so on. With a
+    dedupe_threshold, near-duplicate stories are collapsed (keeping the
+    earliest) before the list is cut to max_stories; near-duplicates of the
+    published stories are dropped too. Stories in skip_ids (already
+    published) are not fetched.
+    """
+    feeds = feeds or [DW_RSS_URL]
+
+    def fetch(feed_url: str) -> list[RawStory]:
+        try:
+            return fetch_feed_stories(feed_url, max_stories, skip_ids)
+        except Exception:
+            logger.exception("Failed to fetch feed %s, skipping", feed_url)
+            return []
+
+    with ThreadPoolExecutor(max_workers=len(feeds)) as pool:
+        per_feed = list(pool.map(fetch, feeds))
+
+    stories = [s for s in chain.from_iterable(zip_longest(*per_feed)) if s is not None]
+    if dedupe_threshold:
+        published_ids = {s.id for s in published}
+        stories = [
+            s for s in dedupe_stories([*published, *stories], dedupe_threshold)
+            if s.id not in published_ids
+        ]
+    stories = stories[:max_stories]
+
+    logger.info("Fetched %d stories with full text from %d feeds", len(stories), len(feeds))
     return stories
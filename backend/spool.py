@@ -0,0 +1,124 @@
+"""NDJSON story spool and constant-memory digest assembly.
+
+Each finished story is appended to the spool (one story_to_dict() object per
+line, flushed and fsynced) the moment it completes, so a crash loses at most
+the stories still in flight and a rerun can resume from what is spooled.
+The final digest is then streamed from the spool one story at a time; only
+byte offsets and small per-story summaries for the archive index are held
+in memory.
+"""
+
+import json
+import logging
+import os
+import shutil
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from backend.archive import update_archive
+from backend.storage import atomic_writer
+
+logger = logging.getLogger(__name__)
+
+
+class StorySpool:
+    """Append-only NDJSON file of story dicts."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._repair()
+
+    def _repair(self) -> None:
+        """Drop a torn final line left by a crash mid-append."""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+                logger.warning("Dropped a partial record from %s", self.path)
+
+    def append(self, story: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(story, ensure_ascii=False) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _offsets(self) -> dict[str, int]:
+        """Byte offset of each story's line, by ID (later lines win)."""
+        offsets: dict[str, int] = {}
+        if not self.path.exists():
+            return offsets
+        with open(self.path, "rb") as f:
+            pos = 0
+            for line in f:
+                offsets[json.loads(line)["id"]] = pos
+                pos += len(line)
+        return offsets
+
+    def ids(self) -> set[str]:
+        return set(self._offsets())
+
+    def stories(self, order: Iterable[str] = ()) -> Iterator[dict]:
+        """Spooled stories, one at a time: IDs in `order` first, then the rest."""
+        offsets = self._offsets()
+        ordered = [i for i in dict.fromkeys(order) if i in offsets]
+        first = set(ordered)
+        ordered += [i for i in offsets if i not in first]
+        with open(self.path, "rb") as f:
+            for story_id in ordered:
+                f.seek(offsets[story_id])
+                yield json.loads(f.readline())
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def _story_summary(story: dict) -> dict:
+    return {
+        "id": story["id"],
+        "headline_de": story["headline_de"],
+        "headline_en": story["headline_en"],
+        "levels": {
+            level: {"audio_duration_seconds": content.get("audio_duration_seconds")}
+            for level, content in story["levels"].items()
+        },
+    }
+
+
+def write_digest_streaming(
+    digest: dict, stories: Iterable[dict], content_dir: Path,
+) -> list[dict]:
+    """write_digest for a digest whose stories arrive as an iterable.
+
+    `digest` supplies every field but "stories". Output is identical to
+    write_digest's. Returns per-story summaries (ID, headlines and audio
+    durations per level).
+    """
+    summaries: list[dict] = []
+    digest_path = content_dir / "digest.json"
+    with atomic_writer(digest_path) as f:
+        f.write("{\n")
+        for key, value in digest.items():
+            if key != "stories":
+                dumped = json.dumps(value, ensure_ascii=False, indent=2)
+                f.write(f"  {json.dumps(key)}: " + dumped.replace("\n", "\n  ") + ",\n")
+        f.write('  "stories": [')
+        for story in stories:
+            f.write(",\n" if summaries else "\n")
+            dumped = json.dumps(story, ensure_ascii=False, indent=2)
+            f.write("    " + dumped.replace("\n", "\n    "))
+            summaries.append(_story_summary(story))
+        f.write("\n  ]\n}" if summaries else "]\n}")
+    logger.info("Wrote %s (%d stories)", digest_path, len(summaries))
+
+    # latest.json is a copy at the content root
+    latest_path = content_dir.parent / "latest.json"
+    with atomic_writer(latest_path) as out, open(digest_path, encoding="utf-8") as src:
+        shutil.copyfileobj(src, out)
+    logger.info("Wrote %s", latest_path)
+
+    update_archive({**digest, "stories": summaries}, content_dir.parent)
+    return summaries
@@ -0,0 +1,35 @@
+import json
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TextIO
+
+
+@contextmanager
+def atomic_writer(path: Path) -> Iterator[TextIO]:
+    """Open a temp file next to path; it replaces path only if the block succeeds."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp",
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_json_atomic(path: Path, data: object) -> None:
+    """Write JSON to path via a temp file + rename so readers never see a partial file."""
+    with atomic_writer(path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def read_json(path: Path) -> object:
+    """Read a JSON file."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,426 @@
+"""Streaming level generation: TTS starts while the LLM is still writing.
+
+Chat completions are streamed; finished sentences are pulled out of the
+partially received `text_de` value and sent to TTS immediately. The next
+level's LLM call starts as soon as the previous level's text is complete,
+while that level's audio is still being synthesized and assembled.
+
+With CEFR validation on, only C1 (which isn't validated) is streamed to
+TTS. B1 and A1 are generated, validated and corrected first, so a
+corrected level is synthesized once, from its final text.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Callable
+from dataclasses import replace
+from pathlib import Path
+
+from openai import AsyncOpenAI, OpenAI
+
+from backend.audio import (
+    DEFAULT_FORMATS,
+    assemble_audio,
+    audio_files,
+    audio_url,
+    chunk_text,
+    generate_level_audio,
+    generate_tts_chunk,
+    get_mp3_duration,
+    max_chars,
+    sentence_index,
+    split_sentences,
+    temp_mp3_path,
+)
+from backend.cefr import sentence_breaks
+from backend.levels import (
+    LEVEL_TASKS,
+    call_structured,
+    chat_params,
+    enforce_level,
+    repair,
+    translate_text,
+)
+from backend.metrics import metrics
+from backend.models import LevelContent, ProcessedStory, RawStory, SentenceTiming
+from backend.prompts import LEVEL_PROMPTS
+from backend.responses import ResponseError, parse, response_for
+from backend.routing import ModelRoutes, as_routes
+from backend.translation_memory import TranslationMemory
+from backend.tts import TtsEngine
+
+logger = logging.getLogger(__name__)
+
+# Sentences are grouped until at least this many characters before a TTS
+# call, so an A1 text doesn't turn into dozens of tiny requests.
+STREAM_MIN_CHARS = 200
+
+_ESCAPES = {
+    '"': '"', "\\": "\\", "/": "/",
+    "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t",
+}
+_END = object()
+
+
+class SentenceExtractor:
+    """Incrementally decode one string field of a streamed JSON object into sentences.
+
+    feed() returns the sentences completed by each delta. Breaks follow
+    backend.cefr.sentence_breaks, as in chunk_text: a sentence counts as
+    complete once whitespace follows its final punctuation and the token
+    before it isn't an ordinal or abbreviation ("am 3. Oktober", "z. B.").
+    The text after the last break is held back until the next one arrives.
+    """
+
+    def __init__(self, key: str = "text_de"):
+        self._key_re = re.compile(rf'"{re.escape(key)}"\s*:\s*"')
+        self._raw = ""
+        self._pos: int | None = None
+        self._text = ""
+        self.done = False
+
+    def feed(self, delta: str) -> list[str]:
+        self._raw += delta
+        if self.done:
+            return []
+        if self._pos is None:
+            match = self._key_re.search(self._raw)
+            if not match:
+                return []
+            self._pos = match.end()
+        self._decode()
+        return self._take_sentences()
+
+    def _decode(self) -> None:
+        raw, i = self._raw, self._pos
+        out = []
+        while i < len(raw):
+            c = raw[i]
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            if c != "\\":
+                out.append(c)
+                i += 1
+                continue
+            # Escape sequence — wait for more input if it's cut off
+            if i + 1 >= len(raw):
+                break
+            esc = raw[i + 1]
+            if esc != "u":
+                out.append(_ESCAPES.get(esc, esc))
+                i += 2
+                continue
+            if i + 6 > len(raw):
+                break
+            code = int(raw[i + 2:i + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                if i + 12 > len(raw):
+                    break
+                low = int(raw[i + 8:i + 12], 16)
+                out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                i += 12
+            else:
+                out.append(chr(code))
+                i += 6
+        self._pos = i
+        self._text += "".join(out)
+
+    def _take_sentences(self) -> list[str]:
+        if self.done:
+            complete, self._text = self._text, ""
+        else:
+            breaks = sentence_breaks(self._text)
+            if not breaks:
+                return []
+            cut = breaks[-1].end()
+            complete, self._text = self._text[:cut], self._text[cut:]
+        return split_sentences(complete)
+
+
+async def _stream_chat(client: OpenAI, model: str, prompt: str, task: str):
+    """Yield content deltas of a streamed chat completion.
+
+    The sync client is driven from a worker thread so it shares the LLM
+    client's connection pool and concurrency limiter. If the request fails,
+    the deltas received so far are yielded and the error is raised after.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def produce() -> None:
+        try:
+            start = time.monotonic()
+            usage = None
+            stream = client.chat.completions.create(
+                **chat_params(model, prompt, task),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            for chunk in stream:
+                # The final chunk carries usage and no choices
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    loop.call_soon_threadsafe(
+                        queue.put_nowait, chunk.choices[0].delta.content,
+                    )
+            metrics.record_llm(task, model, usage, time.monotonic() - start)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+
+    producer = asyncio.create_task(asyncio.to_thread(produce))
+    try:
+        while (item := await queue.get()) is not _END:
+            yield item
+    finally:
+        # Re-raises the request's error, if any
+        await producer
+
+
+async def _finish_audio(
+    tts_tasks: list[asyncio.Task],
+    chunk_paths: list[Path],
+    output_path: Path,
+    formats: tuple[str, ...],
+    align_text: str | None = None,
+    chunk_texts: list[str] | None = None,
+) -> tuple[str, float, tuple[SentenceTiming, ...]]:
+    """Assemble the streamed chunks; with align_text, also build a seek index."""
+    durations: list[float] = []
+    try:
+        results = await asyncio.gather(*tts_tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        if align_text is not None:
+            durations = [
+                await asyncio.to_thread(get_mp3_duration, p) for p in chunk_paths
+            ]
+        await asyncio.to_thread(assemble_audio, chunk_paths, output_path, formats)
+    finally:
+        for task in tts_tasks:
+            task.cancel()
+        for p in chunk_paths:
+            p.unlink(missing_ok=True)
+
+    duration = await asyncio.to_thread(get_mp3_duration, output_path)
+    logger.info(
+        "Generated streamed audio: %s (%.1fs, %d chunks)",
+        output_path.name, duration, len(chunk_paths),
+    )
+    sentences = (
+        sentence_index(align_text, chunk_texts, durations, duration)
+        if align_text is not None else ()
+    )
+    return str(output_path), duration, sentences
+
+
+async def _discard(tts_tasks: list[asyncio.Task], chunk_paths: list[Path]) -> None:
+    for task in tts_tasks:
+        task.cancel()
+    await asyncio.gather(*tts_tasks, return_exceptions=True)
+    for p in chunk_paths:
+        p.unlink(missing_ok=True)
+
+
+async def stream_level(
+    llm_client: OpenAI,
+    tts_client: AsyncOpenAI,
+    model: str | ModelRoutes,
+    voice: str,
+    prompt: str,
+    output_path: Path,
+    task: str,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    align: bool = False,
+    engine: TtsEngine | None = None,
+) -> tuple[object, asyncio.Task]:
+    """Stream one level prompt, synthesizing sentences as they arrive.
+
+    Returns the parsed response (backend.responses) as soon as the LLM
+    finishes, plus a task
+    that resolves to (audio_path, duration, sentences) once the audio is
+    assembled. With align, every sentence is its own TTS request and
+    sentences is the seek index; otherwise it is empty.
+
+    The task's primary model is streamed. If its output doesn't parse, the
+    audio synthesized so far is discarded and the reply gets one repair
+    call (backend.levels.repair), not streamed.
+    """
+    route = as_routes(model).for_task(task)
+    extractor = SentenceExtractor()
+    content: list[str] = []
+    tts_tasks: list[asyncio.Task] = []
+    chunk_paths: list[Path] = []
+    chunk_texts: list[str] = []
+
+    def dispatch(text: str) -> None:
+        for chunk in chunk_text(text, max_chars(engine)):
+            path = temp_mp3_path()
+            chunk_paths.append(path)
+            chunk_texts.append(chunk)
+            tts_tasks.append(asyncio.create_task(
+                generate_tts_chunk(tts_client, voice, chunk, path, engine)
+            ))
+
+    try:
+        pending = ""
+        async for delta in _stream_chat(llm_client, route.primary, prompt, task):
+            content.append(delta)
+            for sentence in extractor.feed(delta):
+                pending = f"{pending} {sentence}" if pending else sentence
+                if align or len(pending) >= STREAM_MIN_CHARS:
+                    dispatch(pending)
+                    pending = ""
+        if pending:
+            dispatch(pending)
+
+        reply = "".join(content)
+        try:
+            result = parse(response_for(task), reply)
+        except ResponseError as e:
+            await _discard(tts_tasks, chunk_paths)
+            tts_tasks.clear()
+            chunk_paths.clear()
+            chunk_texts.clear()
+            result = await asyncio.to_thread(
+                repair, llm_client, route, prompt, task, reply, e.problems,
+            )
+        text_de = result.text_de
+        if not tts_tasks:
+            # The field never showed up in a form we could stream; fall back
+            for sentence in split_sentences(text_de) if align else [text_de]:
+                dispatch(sentence)
+    except BaseException:
+        await _discard(tts_tasks, chunk_paths)
+        raise
+
+    audio_task = asyncio.create_task(_finish_audio(
+        tts_tasks, chunk_paths, output_path, formats,
+        text_de if align else None, chunk_texts,
+    ))
+    return result, audio_task
+
+
+async def generate_levels_streaming(
+    story: RawStory,
+    llm_client: OpenAI,
+    tts_client: AsyncOpenAI,
+    model: str | ModelRoutes,
+    voice: str,
+    output_dir: Path,
+    translate: bool = True,
+    validate: bool = True,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    align: bool = False,
+    engine: TtsEngine | None = None,
+    memory: TranslationMemory | None = None,
+    progress: Callable[[ProcessedStory], None] | None = None,
+) -> ProcessedStory:
+    """Streaming counterpart of generate_levels + generate_audio_for_story.
+
+    Same C1 → B1 → A1 order and output, including translate, validate and
+    progress (called as each level's German text is final, then, once the
+    translations are in, as each level's audio is done). With validate, B1
+    and A1 are not streamed: their audio starts once the text has passed
+    (or been corrected by) validation. Raises if any level's text fails; a
+    level whose audio fails keeps its text without audio.
+    """
+    texts: dict[int, str] = {}
+    audio_tasks: dict[int, asyncio.Task] = {}
+    translations: dict[int, asyncio.Task] = {}
+
+    try:
+        prompt = LEVEL_PROMPTS[3].format(article_text=story.full_text)
+        for level_num in (3, 2, 1):
+            output_path = output_dir / story.id / f"level-{level_num}.mp3"
+            if validate and level_num < 3:
+                result = await asyncio.to_thread(
+                    call_structured, llm_client, model, prompt, LEVEL_TASKS[level_num],
+                )
+                texts[level_num] = await asyncio.to_thread(
+                    enforce_level, llm_client, model, level_num, result.text_de,
+                )
+                audio_tasks[level_num] = asyncio.create_task(generate_level_audio(
+                    tts_client, voice, texts[level_num], output_path, formats, align,
+                    engine,
+                ))
+            else:
+                result, audio_tasks[level_num] = await stream_level(
+                    llm_client, tts_client, model, voice, prompt, output_path,
+                    LEVEL_TASKS[level_num], formats, align, engine,
+                )
+                texts[level_num] = result.text_de
+            if level_num == 3:
+                result_c1 = result
+            if translate:
+                translations[level_num] = asyncio.create_task(asyncio.to_thread(
+                    translate_text, llm_client, model, texts[level_num], memory,
+                ))
+            logger.info("Story %s: Level %d text streamed", story.id, level_num)
+            if progress is not None:
+                progress(_story(story, result_c1, {
+                    n: LevelContent(text_de=text, text_en="") for n, text in texts.items()
+                }))
+            if level_num > 1:
+                prompt = LEVEL_PROMPTS[level_num - 1].format(
+                    previous_text=texts[level_num],
+                )
+
+        english = await asyncio.gather(*translations.values()) if translate else []
+    except BaseException:
+        for task in audio_tasks.values():
+            task.cancel()
+        await asyncio.gather(*audio_tasks.values(), return_exceptions=True)
+        raise
+
+    english_by_level = dict(zip(translations, english))
+    levels = {
+        n: LevelContent(text_de=texts[n], text_en=english_by_level.get(n, ""))
+        for n in (3, 2, 1)
+    }
+    level_of = {task: level_num for level_num, task in audio_tasks.items()}
+    remaining = set(level_of)
+    try:
+        while remaining:
+            finished, remaining = await asyncio.wait(
+                remaining, return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in finished:
+                level_num = level_of[task]
+                if task.exception() is not None:
+                    logger.warning(
+                        "TTS failed for story %s level %d: %s",
+                        story.id, level_num, task.exception(),
+                    )
+                    continue
+                audio_path, duration, sentences = task.result()
+                levels[level_num] = replace(
+                    levels[level_num],
+                    audio_url=audio_url(audio_path, output_dir),
+                    audio_duration_seconds=round(duration, 1),
+                    audio_files=audio_files(audio_path, output_dir, formats),
+                    sentences=sentences,
+                )
+            if progress is not None:
+                progress(_story(story, result_c1, dict(levels)))
+    finally:
+        # Cancelled while waiting: don't leave TTS running
+        for task in remaining:
+            task.cancel()
+
+    return _story(story, result_c1, levels)
+
+
+def _story(story: RawStory, result_c1, levels: dict[int, LevelContent]) -> ProcessedStory:
+    return ProcessedStory(
+        id=story.id,
+        headline_de=result_c1.headline_de or story.title,
+        headline_en=result_c1.headline_en,
+        summary_en=result_c1.summary_en,
+        source_url=story.link,
+        levels=levels,
+    )
@@ -0,0 +1,128 @@
+"""Sentence-level translation memory for level translations.
+
+The three levels of a story share sentences (C1 keeps much of the source,
+B1 much of C1), and running stories recur across days. Translations are
+therefore remembered per German sentence, keyed by its normalized form
+(NFC, whitespace collapsed), in output/memory/translations.json:
+
+    {"schema_version", "sentences": {german: english}}
+
+A sentence matches exactly, or fuzzily when it has the same words and
+numbers as a remembered one, ignoring case and punctuation, and a difflib
+ratio of at least `similarity` (default 0.97). A changed word, even just an
+inflection, is never a match. Candidates come from an index by those word
+tokens, so a lookup doesn't scan the memory. Sentences are split with
+backend.cefr's rule, which keeps "am 3. Oktober" and "z. B." whole.
+backend.levels.translate_text then sends only the unmatched sentences, as
+one keyed request, and reassembles the English in order.
+
+One instance is shared by a build's stories (lookups and additions are
+thread-safe) and saved at the end; saving merges with the file on disk, so
+concurrent workers don't drop each other's sentences.
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from backend.cefr import sentence_breaks
+from backend.storage import read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+MEMORY_SCHEMA_VERSION = 1
+DEFAULT_SIMILARITY = 0.97
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(sentence: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", sentence)).strip()
+
+
+def _tokens(key: str) -> str:
+    """Words and numbers of a normalized sentence, without case or punctuation."""
+    return " ".join(_TOKEN.findall(key.casefold()))
+
+
+def segment(text: str) -> tuple[list[str], list[str]]:
+    """Split text into sentences and the separators between them.
+
+    Joining sentences with separators (sentence, sep, sentence, ...) gives
+    back the stripped text, paragraph breaks included.
+    """
+    text = text.strip()
+    breaks = sentence_breaks(text)
+    bounds = [0, *(i for m in breaks for i in m.span()), len(text)]
+    return [text[a:b] for a, b in zip(bounds[::2], bounds[1::2])], [m.group() for m in breaks]
+
+
+def join(sentences: list[str], separators: list[str]) -> str:
+    out = [sentences[0]]
+    for separator, sentence in zip(separators, sentences[1:]):
+        out += [separator, sentence]
+    return "".join(out)
+
+
+class TranslationMemory:
+    def __init__(self, path: Path | None = None, similarity: float = DEFAULT_SIMILARITY):
+        self.path = path
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._sentences: dict[str, str] = {}
+        self._by_tokens: dict[str, list[str]] = {}
+        if path is not None and path.exists():
+            for german, english in read_json(path)["sentences"].items():
+                self._insert(german, english)
+            logger.info("Loaded %d remembered translations", len(self._sentences))
+
+    def __len__(self) -> int:
+        return len(self._sentences)
+
+    def _insert(self, key: str, english: str) -> None:
+        if key not in self._sentences:
+            self._by_tokens.setdefault(_tokens(key), []).append(key)
+        self._sentences[key] = english
+
+    def _fuzzy(self, key: str) -> str | None:
+        matcher = SequenceMatcher(None, b=key, autojunk=False)
+        best, best_ratio = None, self.similarity
+        for candidate in self._by_tokens.get(_tokens(key), ()):
+            matcher.set_seq1(candidate)
+            if matcher.ratio() >= best_ratio:
+                best, best_ratio = candidate, matcher.ratio()
+        return best
+
+    def lookup(self, sentence: str) -> tuple[str, bool] | None:
+        """(english, exact) for a remembered sentence, or None."""
+        key = normalize(sentence)
+        with self._lock:
+            if key in self._sentences:
+                return self._sentences[key], True
+            if self.similarity < 1:
+                match = self._fuzzy(key)
+                if match is not None:
+                    return self._sentences[match], False
+        return None
+
+    def add(self, sentence: str, english: str) -> None:
+        key = normalize(sentence)
+        with self._lock:
+            self._insert(key, english)
+
+    def save(self) -> None:
+        """Write the memory, merged with whatever is on disk by now."""
+        if self.path is None:
+            return
+        with self._lock:
+            on_disk = read_json(self.path)["sentences"] if self.path.exists() else {}
+            sentences = {**on_disk, **self._sentences}
+            write_json_atomic(
+                self.path,
+                {"schema_version": MEMORY_SCHEMA_VERSION, "sentences": sentences},
+            )
+        logger.info("Saved %d remembered translations to %s", len(sentences), self.path)
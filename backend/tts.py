@@ -0,0 +1,144 @@
+"""TTS engines: text in, MP3 bytes out.
+
+Each engine declares its limits: max_chars per request (backend.audio chunks
+text to fit) and max_concurrency (requests in flight at once, enforced
+here). OpenAiEngine is the production voice. EspeakEngine runs the local
+espeak-ng synthesizer, for fast offline preview builds, deterministic
+benchmarks, and a degraded-but-available mode during API outages.
+"""
+
+import asyncio
+import os
+import weakref
+from abc import ABC, abstractmethod
+
+from openai import AsyncOpenAI
+
+from backend.metrics import metrics
+
+ENGINES = ("openai", "espeak")
+
+
+class TtsEngine(ABC):
+    """Base class; subclasses implement _synthesize."""
+
+    name = "base"
+
+    def __init__(self, max_chars: int, max_concurrency: int):
+        self.max_chars = max_chars
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def synthesize(self, text: str, voice: str) -> bytes:
+        """MP3 audio of text spoken by voice (engine-specific voice name)."""
+        if len(text) > self.max_chars:
+            raise ValueError(
+                f"{self.name} TTS takes at most {self.max_chars} chars, got {len(text)}"
+            )
+        async with self._slots:
+            return await self._synthesize(text, voice)
+
+    @abstractmethod
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        """MP3 audio of text (within max_chars), one request."""
+
+
+class OpenAiEngine(TtsEngine):
+    name = "openai"
+
+    def __init__(
+        self, client: AsyncOpenAI, model: str = "tts-1", max_concurrency: int = 16,
+    ):
+        super().__init__(max_chars=4096, max_concurrency=max_concurrency)
+        self.client = client
+        self.model = model
+
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        metrics.record_tts(len(text))
+        response = await self.client.audio.speech.create(
+            model=self.model,
+            voice=voice,
+            input=text,
+        )
+        return response.content
+
+
+async def _run(cmd: list[str], stdin: bytes) -> bytes:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate(stdin)
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"{cmd[0]} exited with {proc.returncode}: {stderr.decode(errors='replace')}"
+        )
+    return stdout
+
+
+class EspeakEngine(TtsEngine):
+    """Local espeak-ng, piped through ffmpeg to MP3.
+
+    The voice passed to synthesize() is an OpenAI voice name and is ignored;
+    the espeak voice is fixed per engine.
+    """
+
+    name = "espeak"
+
+    def __init__(
+        self,
+        voice: str = "de",
+        words_per_minute: int = 140,
+        max_concurrency: int | None = None,
+        binary: str = "espeak-ng",
+    ):
+        super().__init__(
+            max_chars=100_000, max_concurrency=max_concurrency or os.cpu_count() or 4,
+        )
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+        self.binary = binary
+
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        wav = await _run(
+            [
+                self.binary, "-v", self.voice, "-s", str(self.words_per_minute),
+                "--stdin", "--stdout",
+            ],
+            text.encode(),
+        )
+        return await _run(
+            [
+                "ffmpeg", "-i", "pipe:0", "-ac", "1", "-ar", "22050", "-ab", "48k",
+                "-f", "mp3", "pipe:1",
+            ],
+            wav,
+        )
+
+
+_default_engines: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def default_engine(client: AsyncOpenAI) -> OpenAiEngine:
+    """The OpenAiEngine shared by every caller that passes client but no engine.
+
+    One per client, so those requests share one concurrency limit too.
+    """
+    engine = _default_engines.get(client)
+    if engine is None:
+        engine = _default_engines[client] = OpenAiEngine(client)
+    return engine
+
+
+def make_tts_engine(config: dict, tts_client: AsyncOpenAI) -> TtsEngine:
+    """The engine named by config["tts_engine"] (default: openai)."""
+    name = config.get("tts_engine") or "openai"
+    if name == "openai":
+        return OpenAiEngine(
+            tts_client, max_concurrency=config.get("tts_max_concurrency") or 16,
+        )
+    if name == "espeak":
+        return EspeakEngine(voice=config.get("espeak_voice") or "de")
+    raise ValueError(f"Unknown TTS engine {name!r}; expected one of {ENGINES}")
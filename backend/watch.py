@@ -0,0 +1,274 @@
+"""Watch mode: poll the feeds and publish new stories within minutes.
+
+Usage:
+    python -m backend.watch [--interval SECONDS] [--max-per-day N] [--output DIR]
+
+Feeds are polled every --interval seconds. Article IDs not seen yet today
+go onto a priority queue (newest first, so breaking news jumps ahead of a
+backlog) and are processed through levels and audio by a few concurrent
+workers. Each finished story is merged into today's digest, newest first,
+and digest.json/latest.json are republished atomically. Beyond --max-per-day
+stories the oldest are evicted together with their audio.
+
+Configuration is the same environment as backend.build. Stories published
+today are kept in output/watch/{date}.json, so a restart doesn't reprocess
+them, and later near-duplicates of them (the same event from another feed,
+or a rewritten article) are dropped. A story that fails is picked up again
+by the next poll.
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import shutil
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+from openai import AsyncOpenAI, OpenAI
+
+from backend import build
+from backend.clients import make_clients
+from backend.glossary import build_glossary
+from backend.models import ProcessedStory, RawStory
+from backend.sources import fetch_stories
+from backend.storage import read_json, write_json_atomic
+from backend.translation_memory import TranslationMemory
+from backend.tts import TtsEngine, make_tts_engine
+from backend.worker import raw_story_from_dict, raw_story_to_dict
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 300
+MAX_STORIES_PER_DAY = 20
+WATCH_WORKERS = 2
+
+
+class SeenIds:
+    """Stories handled on one day, by article ID.
+
+    published ones are persisted across restarts. queued ones are only kept
+    in memory until they're published (done) or fail (release), so a failed
+    story is retried by the next poll.
+    """
+
+    def __init__(self, state_dir: Path, day: str):
+        self.day = day
+        self.path = state_dir / f"{day}.json"
+        self.published: dict[str, RawStory] = {}
+        if self.path.exists():
+            self.published = {
+                d["id"]: raw_story_from_dict(d) for d in read_json(self.path)
+            }
+        self.queued: dict[str, RawStory] = {}
+
+    def known(self) -> set[str]:
+        """IDs not to queue again: published or in progress."""
+        return self.published.keys() | self.queued.keys()
+
+    def stories(self) -> list[RawStory]:
+        """Published and in-progress stories, to drop near-duplicates of."""
+        return [*self.published.values(), *self.queued.values()]
+
+    def add_new(self, stories: list[RawStory]) -> list[RawStory]:
+        """Mark stories queued, returning the ones not known before."""
+        known = self.known()
+        new = [s for s in stories if s.id not in known]
+        self.queued.update((s.id, s) for s in new)
+        return new
+
+    def done(self, story_id: str) -> None:
+        """Record a queued story as published."""
+        self.published[story_id] = self.queued.pop(story_id)
+        write_json_atomic(
+            self.path, [raw_story_to_dict(s) for s in self.published.values()],
+        )
+
+    def release(self, story_id: str) -> None:
+        """Forget a story that failed, so it's queued again."""
+        self.queued.pop(story_id, None)
+
+
+def publish_story(
+    story: ProcessedStory, content_dir: Path, day: str, max_stories: int,
+) -> list[str]:
+    """Merge a story into the day's digest and republish it.
+
+    The story goes first (replacing an older version with the same ID).
+    Returns the IDs of stories evicted to stay within max_stories.
+    """
+    digest_path = content_dir / "digest.json"
+    stories = read_json(digest_path)["stories"] if digest_path.exists() else []
+    stories = [build.story_to_dict(story)] + [s for s in stories if s["id"] != story.id]
+    evicted = [s["id"] for s in stories[max_stories:]]
+
+    digest = build.build_digest([], day)
+    digest["generated_at"] = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+    digest["stories"] = stories[:max_stories]
+    if (content_dir / "glossary.json").exists():
+        digest["glossary"] = f"{day}/glossary.json"
+    build.write_digest(digest, content_dir)
+
+    for story_id in evicted:
+        shutil.rmtree(content_dir / story_id, ignore_errors=True)
+    if evicted:
+        logger.info("Evicted %s from %s", ", ".join(evicted), day)
+    return evicted
+
+
+async def add_to_glossary(
+    story: ProcessedStory,
+    llm_client: OpenAI,
+    config: dict,
+    output_dir: Path,
+    content_dir: Path,
+) -> None:
+    """Add a story's words to the day's glossary shard; failures are logged."""
+    try:
+        await asyncio.to_thread(
+            build_glossary,
+            {story.id: [c.text_de for c in story.levels.values()]},
+            llm_client, build.llm_routes(config),
+            output_dir / "glossary" / "dictionary.json",
+            content_dir / "glossary.json",
+        )
+    except Exception:
+        logger.exception("Failed to add story %s to the glossary", story.id)
+
+
+_sequence = itertools.count()  # tie-breaker so stories are never compared
+
+
+def _priority(story: RawStory) -> float:
+    return -story.published_date.timestamp()
+
+
+async def poll_once(
+    queue: asyncio.PriorityQueue, seen: SeenIds, config: dict, max_per_day: int,
+) -> int:
+    """Fetch the feeds once and queue unseen stories. Returns how many."""
+    stories = await asyncio.to_thread(
+        fetch_stories,
+        max_stories=max_per_day,
+        feeds=config.get("feeds"),
+        dedupe_threshold=config.get("dedupe_threshold"),
+        skip_ids=seen.known(),
+        published=seen.stories(),
+    )
+    new = seen.add_new(stories)
+    for story in new:
+        queue.put_nowait((_priority(story), next(_sequence), seen, story))
+    if new:
+        logger.info("Queued %d new stories: %s", len(new), ", ".join(s.id for s in new))
+    return len(new)
+
+
+async def _poller(
+    queue: asyncio.PriorityQueue,
+    state_dir: Path,
+    config: dict,
+    interval: float,
+    max_per_day: int,
+) -> None:
+    seen = None
+    while True:
+        today = date.today().isoformat()
+        if seen is None or seen.day != today:
+            seen = SeenIds(state_dir, today)
+        try:
+            await poll_once(queue, seen, config, max_per_day)
+        except Exception:
+            logger.exception("Polling failed, retrying in %.0fs", interval)
+        await asyncio.sleep(interval)
+
+
+async def _worker(
+    queue: asyncio.PriorityQueue,
+    llm_client: OpenAI,
+    tts_client: AsyncOpenAI,
+    engine: TtsEngine,
+    memory: TranslationMemory | None,
+    config: dict,
+    output_dir: Path,
+    max_per_day: int,
+) -> None:
+    while True:
+        _, _, seen, raw = await queue.get()
+        day = seen.day
+        content_dir = output_dir / "content" / day
+        try:
+            story = await build.process_story(
+                raw, llm_client, tts_client, config, content_dir, engine, memory,
+            )
+            if memory is not None:
+                await asyncio.to_thread(memory.save)
+            if config.get("glossary"):
+                await add_to_glossary(story, llm_client, config, output_dir, content_dir)
+            publish_story(story, content_dir, day, max_per_day)
+            seen.done(raw.id)
+        except Exception:
+            logger.exception("Failed to process story %s, will retry", raw.id)
+            seen.release(raw.id)
+        finally:
+            queue.task_done()
+
+
+async def watch(
+    config: dict,
+    output_dir: Path,
+    interval: float = POLL_INTERVAL_SECONDS,
+    max_per_day: int = MAX_STORIES_PER_DAY,
+    workers: int = WATCH_WORKERS,
+) -> None:
+    """Run until cancelled."""
+    llm_client, tts_client = make_clients(config)
+    engine = make_tts_engine(config, tts_client)
+    memory = build.translation_memory(config, output_dir)
+    # Stories are published one at a time, so there is nothing to pack across
+    config = {**config, "translation_pack_tokens": 0}
+    queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+    tasks = [
+        asyncio.create_task(
+            _poller(queue, output_dir / "watch", config, interval, max_per_day)
+        ),
+        *(
+            asyncio.create_task(
+                _worker(
+                    queue, llm_client, tts_client, engine, memory, config,
+                    output_dir, max_per_day,
+                )
+            )
+            for _ in range(workers)
+        ),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def main() -> None:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL_SECONDS)
+    parser.add_argument("--max-per-day", type=int, default=MAX_STORIES_PER_DAY)
+    parser.add_argument("--workers", type=int, default=WATCH_WORKERS)
+    parser.add_argument("--output", type=Path, default=build.OUTPUT_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    try:
+        asyncio.run(watch(
+            build.get_config(), args.output, args.interval, args.max_per_day,
+            args.workers,
+        ))
+    except KeyboardInterrupt:
+        logger.info("Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compact frequency-ranked list of basic German vocabulary (~550 base forms).
+
+Roughly the most frequent words of general German, most frequent first:
+function words, then high-frequency verbs, nouns, adjectives and adverbs.
+Used by backend.cefr to check the "top 500 words" A1 constraint.
+"""
+
+
+def _words(block: str) -> list[str]:
+    """The whitespace-separated words of a block of text."""
+    return block.split()
+
+
+FREQUENT_WORDS: tuple[str, ...] = tuple(_words("""
+der die das und sein in ein zu haben ich werden sie von nicht mit es sich
+auch auf für an er so dass können dies als ihr ja wie bei oder wir aber
+dann man da noch nach was also aus all wenn nur müssen sagen um über machen
+kein du mein schon gehen hier wissen geben sollen jetzt doch immer viel
+wollen durch mal kommen vor zum zur gut sehen ganz einmal unser neu groß
+weil lassen bis mehr uns heute ihm ihn ihnen mir mich dich dir euch
+wieder ob dort selbst alt erst nun stehen anderer finden bleiben liegen
+denn heißen denken nehmen tun dürfen glauben halten nennen mögen zeigen
+führen sprechen bringen leben fahren meinen fragen kennen gelten stellen
+spielen arbeiten brauchen folgen lernen bestehen verstehen setzen bekommen
+beginnen erzählen versuchen schreiben laufen erklären entsprechen sitzen
+ziehen scheinen fallen gehören entstehen erhalten treffen suchen legen
+vorstellen handeln erreichen tragen schaffen lesen verlieren darstellen
+erkennen entwickeln reden aussehen erscheinen bilden anfangen erwarten
+wohnen betreffen warten vergehen helfen gewinnen schließen fühlen bieten
+interessieren erinnern ergeben anbieten studieren verbinden ansehen fehlen
+bedeuten vergleichen kaufen essen trinken schlafen öffnen rufen hören
+zahlen bezahlen kosten antworten wählen fliegen schicken bauen tanken
+mann frau kind jahr tag zeit welt land stadt leben haus hand mensch
+leute teil ende frage problem beispiel arbeit weg recht seite geld
+woche monat stunde minute morgen abend nacht mittag regierung präsident
+kanzler kanzlerin minister ministerin partei staat polizei krieg frieden
+hilfe wasser schule auto zug bahn straße platz geschichte wort zahl
+name familie vater mutter sohn tochter bruder schwester freund freundin
+eltern arzt ärztin krankenhaus firma unternehmen markt preis prozent
+euro million milliarde nachricht nachrichten zeitung sport spiel
+mannschaft wetter regen sonne schnee wind grad sommer winter frühling
+herbst januar februar märz april mai juni juli august september oktober
+november dezember montag dienstag mittwoch donnerstag freitag samstag
+sonntag deutschland europa land länder welt volk bürger bürgerin menschen
+gesetz wahl wahlen stimme ziel grund sache art fall punkt meter kilometer
+energie strom gas öl klima umwelt wald tier baum essen brot milch
+kaffee tee bier wein zimmer tür fenster büro telefon handy computer
+internet bild film musik lied buch brief karte ticket flughafen
+flugzeug schiff bus fahrrad reise urlaub hotel grenze angst freude
+glück gesundheit krankheit körper kopf auge herz
+gut schlecht klein lang kurz hoch tief neu alt jung schnell langsam
+wichtig richtig falsch schön einfach schwer leicht stark schwach frei
+voll leer warm kalt heiß früh spät nah weit klar sicher möglich
+deutsch international national politisch wirtschaftlich teuer billig
+reich arm krank gesund froh traurig müde wahr ganz genau eigen gleich
+letzter nächster erster zweiter dritter viele wenige beide jeder
+manche andere einige mehrere etwas nichts alles jemand niemand wer
+wo wann warum wohin woher welcher hier dort oben unten links rechts
+heute morgen gestern bald schon noch nie oft manchmal immer wieder
+zusammen allein sehr zu mehr weniger fast nur auch ebenfalls vielleicht
+natürlich wirklich gerade zurzeit jetzt damals danach dann zuerst
+später endlich leider gern gerne ja nein nicht doch sogar etwa
+eins zwei drei vier fünf sechs sieben acht neun zehn elf zwölf zwanzig
+dreißig hundert tausend halb
+ohne gegen unter zwischen neben hinter seit während wegen trotz
+ab außer bis gegenüber entlang um statt
+sondern denn oder aber und
+"""))
+
+# Closed-class forms: articles, pronouns and auxiliaries in every inflection,
+# so the stem matcher doesn't have to guess them.
+FUNCTION_FORMS: frozenset[str] = frozenset(_words("""
+der die das den dem des ein eine einen einem einer eines kein keine keinen
+keinem keiner keines mein meine meinen meinem meiner meines dein deine
+sein seine seinen seinem seiner seines ihr ihre ihren ihrem ihrer ihres
+unser unsere unseren unserem unserer euer eure euren eurem eurer
+ich du er sie es wir ihr mich dich sich uns euch mir dir ihm ihn ihnen
+dieser diese dieses diesen diesem jeder jede jedes jeden jedem
+bin bist ist sind seid war warst waren wart habe hast hat haben habt
+hatte hatten werde wirst wird werden werdet wurde wurden
+kann kannst können könnt muss musst müssen müsst will willst wollen
+wollt soll sollst sollen sollt darf darfst dürfen dürft mag magst mögen
+möchte möchtest möchten am im ins zum zur vom beim aufs ans
+"""))
+
+FREQUENT_SET: frozenset[str] = frozenset(FREQUENT_WORDS) | FUNCTION_FORMS
@@ -0,0 +1,255 @@
+"""Sharded build: a lock-free file-based work queue shared by many workers.
+
+Usage:
+    python -m backend.worker enqueue QUEUE_DIR   # fetch stories, one job each
+    python -m backend.worker work QUEUE_DIR      # claim and process jobs until empty
+    python -m backend.worker requeue QUEUE_DIR   # return stale claims to pending
+    python -m backend.worker merge QUEUE_DIR     # assemble digest.json from results
+
+QUEUE_DIR (and the output directory, for audio) must be on storage shared by
+every worker. Any number of `work` processes, on any number of machines, can
+run at once. A job is claimed by atomically renaming it from pending/ to
+claimed/ — whoever wins the rename owns the job, no locks needed.
+While processing, a worker refreshes its claim's mtime every
+HEARTBEAT_SECONDS; only claims left unrefreshed for STALE_CLAIM_SECONDS
+(dead workers) are requeued.
+
+Layout:
+    queue.json           build date, fixed at enqueue time
+    pending/{seq}-{id}.json
+    claimed/{seq}-{id}.json
+    results/{seq}-{id}.json   story_to_dict() output
+    failed/{seq}-{id}.json    raw story + error
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from backend import build
+from backend.clients import make_clients
+from backend.metrics import metrics
+from backend.models import ProcessedStory, RawStory
+from backend.sources import fetch_stories
+from backend.spool import write_digest_streaming
+from backend.storage import read_json, write_json_atomic
+from backend.tts import make_tts_engine
+
+logger = logging.getLogger(__name__)
+
+STALE_CLAIM_SECONDS = 30 * 60
+# How often a worker refreshes the claims it is processing, well within
+# STALE_CLAIM_SECONDS so long stories aren't requeued while still running
+HEARTBEAT_SECONDS = 60
+
+
+def raw_story_to_dict(story: RawStory) -> dict:
+    """Convert a RawStory to a JSON-serializable dict."""
+    return {
+        "id": story.id,
+        "title": story.title,
+        "link": story.link,
+        "full_text": story.full_text,
+        "published_date": story.published_date.isoformat(),
+    }
+
+
+def raw_story_from_dict(data: dict) -> RawStory:
+    """Inverse of raw_story_to_dict."""
+    return RawStory(
+        id=data["id"],
+        title=data["title"],
+        link=data["link"],
+        full_text=data["full_text"],
+        published_date=datetime.fromisoformat(data["published_date"]),
+    )
+
+
+def _job_name(seq: int, story_id: str) -> str:
+    safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in story_id)
+    return f"{seq:05d}-{safe_id}.json"
+
+
+class FileQueue:
+    """Work queue backed by a directory; claims are atomic renames."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.pending = root / "pending"
+        self.claimed = root / "claimed"
+        self.results = root / "results"
+        self.failed = root / "failed"
+
+    def init(self, today: str) -> None:
+        for d in (self.pending, self.claimed, self.results, self.failed):
+            d.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(self.root / "queue.json", {"date": today})
+
+    @property
+    def date(self) -> str:
+        return read_json(self.root / "queue.json")["date"]
+
+    def enqueue(self, stories: list[RawStory]) -> None:
+        """Add one job per story; sequence numbers preserve feed order."""
+        start = len(list(self._all_jobs()))
+        for seq, story in enumerate(stories, start=start):
+            write_json_atomic(
+                self.pending / _job_name(seq, story.id), raw_story_to_dict(story),
+            )
+        logger.info("Enqueued %d stories in %s", len(stories), self.root)
+
+    def claim(self) -> Path | None:
+        """Claim the next pending job, or return None if there are none left."""
+        for path in sorted(self.pending.glob("*.json")):
+            target = self.claimed / path.name
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue  # another worker won the race
+            # rename keeps the old mtime; reset it so the claim isn't seen as stale
+            if not self.heartbeat(target):
+                continue  # requeue_stale moved it back in between
+            return target
+        return None
+
+    def heartbeat(self, claim: Path) -> bool:
+        """Mark a claim as still being worked on; False if it's gone."""
+        try:
+            os.utime(claim)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(self, claim: Path, story: ProcessedStory) -> None:
+        write_json_atomic(self.results / claim.name, build.story_to_dict(story))
+        claim.unlink(missing_ok=True)
+
+    def fail(self, claim: Path, error: str) -> None:
+        data = read_json(claim)
+        write_json_atomic(self.failed / claim.name, {"story": data, "error": error})
+        claim.unlink(missing_ok=True)
+
+    def requeue_stale(self, max_age: float = STALE_CLAIM_SECONDS) -> int:
+        """Move claims older than max_age seconds (dead workers) back to pending."""
+        cutoff = time.time() - max_age
+        count = 0
+        for path in self.claimed.glob("*.json"):
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                os.rename(path, self.pending / path.name)
+            except FileNotFoundError:
+                continue
+            count += 1
+        if count:
+            logger.info("Requeued %d stale claims", count)
+        return count
+
+    def result_paths(self) -> list[Path]:
+        return sorted(self.results.glob("*.json"))
+
+    def _all_jobs(self):
+        for d in (self.pending, self.claimed, self.results, self.failed):
+            yield from d.glob("*.json")
+
+
+async def _keep_alive(queue: FileQueue, claim: Path, interval: float) -> None:
+    """Refresh claim every interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        if not queue.heartbeat(claim):
+            logger.warning("Claim %s was requeued while processing", claim.name)
+            return
+
+
+async def run_worker(queue: FileQueue, config: dict, output_dir: Path) -> int:
+    """Process jobs until the queue is empty. Returns the number processed."""
+    content_dir = output_dir / "content" / queue.date
+    content_dir.mkdir(parents=True, exist_ok=True)
+    llm_client, tts_client = make_clients(config)
+    engine = make_tts_engine(config, tts_client)
+    memory = build.translation_memory(config, output_dir)
+    # Each worker sees one story at a time, so there is nothing to pack across
+    config = {**config, "translation_pack_tokens": 0}
+
+    count = 0
+    while (claim := queue.claim()) is not None:
+        raw = raw_story_from_dict(read_json(claim))
+        heartbeat = asyncio.create_task(_keep_alive(queue, claim, HEARTBEAT_SECONDS))
+        try:
+            story = await build.process_story(
+                raw, llm_client, tts_client, config, content_dir, engine, memory,
+            )
+        except Exception as e:
+            logger.exception("Failed to process story %s", raw.id)
+            queue.fail(claim, repr(e))
+            continue
+        finally:
+            heartbeat.cancel()
+        queue.complete(claim, story)
+        count += 1
+
+    if memory is not None:
+        memory.save()
+    logger.info("Worker done: %d stories processed", count)
+    metrics.log_summary()
+    return count
+
+
+def merge(queue: FileQueue, output_dir: Path) -> list[dict]:
+    """Assemble one digest from the per-story results, in feed order.
+
+    Results are streamed into the digest one at a time. Returns the
+    per-story summaries from write_digest_streaming.
+    """
+    today = queue.date
+    paths = queue.result_paths()
+    if not paths:
+        raise RuntimeError("No story results in queue. Aborting.")
+    return write_digest_streaming(
+        build.build_digest([], today),
+        (read_json(p) for p in paths),
+        output_dir / "content" / today,
+    )
+
+
+def main() -> None:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["enqueue", "work", "requeue", "merge"])
+    parser.add_argument("queue_dir", type=Path)
+    parser.add_argument("--output", type=Path, default=build.OUTPUT_DIR)
+    parser.add_argument("--stale-after", type=float, default=STALE_CLAIM_SECONDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    queue = FileQueue(args.queue_dir)
+
+    if args.command == "enqueue":
+        config = build.get_config()
+        stories = fetch_stories(
+            max_stories=config["max_stories"],
+            feeds=config["feeds"],
+            dedupe_threshold=config["dedupe_threshold"],
+        )
+        if not stories:
+            raise RuntimeError("No stories fetched from DW. Aborting.")
+        queue.init(date.today().isoformat())
+        queue.enqueue(stories)
+    elif args.command == "work":
+        asyncio.run(run_worker(queue, build.get_config(), args.output))
+    elif args.command == "requeue":
+        queue.requeue_stale(args.stale_after)
+    else:
+        merge(queue, args.output)
+
+
+if __name__ == "__main__":
+    main()
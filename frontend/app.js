@@ -7,8 +7,8 @@
   // --- State ---
   let digest = null;
   let currentStoryIndex = null;
-  const audio = new Audio();
-  audio.preservesPitch = true;
+  // Player for the current level, swapped on a level switch (see Level Players)
+  let audio = createPlayer();
 
   // --- Preferences (localStorage) ---
   function getLevel() {
@@ -54,34 +54,154 @@
     return m + ":" + (s < 10 ? "0" : "") + s;
   }
 
+  // --- Level Status ---
+  // While a build is still publishing (digest.in_progress), a level is
+  // "pending" (nothing yet) or "text" (audio still coming); finished
+  // levels carry no status.
+  function levelStatus(levelData) {
+    return levelData ? levelData.status || "ready" : "pending";
+  }
+
+  const PENDING_NOTES = {
+    pending: "Dieses Niveau wird gerade erstellt …",
+    text: "Audio folgt in Kürze …",
+  };
+
+  // --- Audio Format Selection ---
+  // audio_files lists renditions most preferred (smallest) first; take the
+  // first the browser can play, falling back to the MP3 in audio_url.
+  function pickAudioFile(levelData) {
+    const files = levelData.audio_files || [];
+    for (const file of files) {
+      if (audio.canPlayType(file.type)) return file;
+    }
+    return { url: levelData.audio_url, bytes: null };
+  }
+
+  // --- Level Players ---
+  // One audio element per level of the open story, keyed by URL, so a level
+  // switch swaps elements instead of starting a cold download. While one
+  // level plays, the adjacent levels are preloaded if their files fit the
+  // prefetch budget (and the user hasn't asked to save data); otherwise
+  // they only load metadata.
+  const PREFETCH_BUDGET_BYTES = 2 * 1024 * 1024;
+  let players = new Map();
+
+  function createPlayer() {
+    const el = new Audio();
+    el.preservesPitch = true;
+    el.preload = "metadata";
+    bindPlayer(el);
+    return el;
+  }
+
+  function playerFor(levelData) {
+    const url = "./" + pickAudioFile(levelData).url;
+    if (!players.has(url)) {
+      const el = createPlayer();
+      el.src = url;
+      players.set(url, el);
+    }
+    return players.get(url);
+  }
+
+  function prefetchAdjacent(story, level) {
+    const saveData = navigator.connection && navigator.connection.saveData;
+    let budget = saveData ? 0 : PREFETCH_BUDGET_BYTES;
+    [level - 1, level + 1].forEach((adjacent) => {
+      const levelData = story.levels[String(adjacent)];
+      if (!levelData || !levelData.audio_url) return;
+      const bytes = pickAudioFile(levelData).bytes;
+      const el = playerFor(levelData);
+      if (bytes && bytes <= budget) {
+        budget -= bytes;
+        el.preload = "auto";
+      }
+    });
+  }
+
+  function releasePlayers() {
+    players.forEach((el) => {
+      el.pause();
+      el.removeAttribute("src");
+      el.load(); // drops the buffered audio
+    });
+    players = new Map();
+  }
+
+  // Where to resume after a level switch. Levels have different sentences,
+  // so resume at the start of the sentence at the same relative position in
+  // the story; without seek indexes, at the same fraction of the duration.
+  function mapPosition(fromData, toData, time) {
+    const from = (fromData && fromData.sentences) || [];
+    const to = toData.sentences || [];
+    if (from.length && to.length) {
+      let i = from.findIndex((s) => time < s.end);
+      if (i < 0) i = from.length - 1;
+      const j = Math.min(to.length - 1, Math.floor((i / from.length) * to.length));
+      return to[j].start;
+    }
+    const fromDuration = fromData && fromData.audio_duration_seconds;
+    const toDuration = toData.audio_duration_seconds;
+    if (!fromDuration || !toDuration) return 0;
+    return Math.min(toDuration, (time / fromDuration) * toDuration);
+  }
+
+  function seekWhenReady(el, time) {
+    if (el.readyState >= HTMLMediaElement.HAVE_METADATA) {
+      el.currentTime = time;
+    } else {
+      el.addEventListener("loadedmetadata", () => { el.currentTime = time; }, { once: true });
+    }
+  }
+
   // --- Level Selector ---
   function updateLevelUI() {
     const level = getLevel();
+    const story = currentStoryIndex !== null ? digest.stories[currentStoryIndex] : null;
     $$(".level-pill").forEach((btn) => {
       btn.classList.toggle("active", btn.dataset.level === String(level));
+      btn.classList.toggle(
+        "pending", !!story && levelStatus(story.levels[btn.dataset.level]) === "pending",
+      );
     });
   }
 
   levelSelector.addEventListener("click", (e) => {
     const btn = e.target.closest(".level-pill");
     if (!btn) return;
+    const fromLevel = getLevel();
     setLevel(parseInt(btn.dataset.level, 10));
     updateLevelUI();
 
-    // If viewing a story, update the displayed text and audio
+    // If viewing a story, switch text and audio, resuming at the same place
     if (currentStoryIndex !== null) {
-      renderStoryDetail(currentStoryIndex);
+      renderStoryDetail(currentStoryIndex, fromLevel);
     }
   });
 
   // --- Fetch Data ---
+  // Always revalidated, so an unchanged digest costs a 304. Returns whether
+  // the digest changed.
+  let digestText = null;
+
+  async function loadDigest() {
+    const resp = await fetch("./content/latest.json", { cache: "no-cache" });
+    if (!resp.ok) throw new Error("Fetch failed: " + resp.status);
+    const text = await resp.text();
+    if (text === digestText) return false;
+    digestText = text;
+    digest = JSON.parse(text);
+    return true;
+  }
+
   async function fetchDigest() {
     try {
-      const resp = await fetch("./content/latest.json");
-      if (!resp.ok) throw new Error("Fetch failed: " + resp.status);
-      digest = await resp.json();
+      await loadDigest();
       loadingState.classList.add("hidden");
       renderStoryList();
+      fetchGlossary();
+      schedulePoll();
     } catch (err) {
       console.error("Failed to fetch digest:", err);
       loadingState.classList.add("hidden");
@@ -89,6 +209,52 @@
     }
   }
 
+  // --- Progressive Updates ---
+  // While the digest is in progress, poll for new stories, levels and
+  // audio (not while the tab is hidden). The list re-renders; an open
+  // story only when its current level's status changed, so reading and
+  // playback aren't interrupted.
+  const POLL_MS = 20000;
+
+  function schedulePoll() {
+    if (digest.in_progress) setTimeout(pollDigest, POLL_MS);
+  }
+
+  async function pollDigest() {
+    if (document.hidden) {
+      schedulePoll();
+      return;
+    }
+    const previous = digest;
+    try {
+      if (await loadDigest()) applyUpdate(previous);
+    } catch (err) {
+      console.warn("Digest poll failed:", err);
+    }
+    schedulePoll();
+  }
+
+  function applyUpdate(previous) {
+    if (!glossary) fetchGlossary();
+    if (currentStoryIndex === null) {
+      renderStoryList();
+      return;
+    }
+    const open = previous.stories[currentStoryIndex];
+    const index = digest.stories.findIndex((s) => s.id === open.id);
+    if (index < 0) {
+      renderStoryList();
+      return;
+    }
+    currentStoryIndex = index;
+    const level = String(getLevel());
+    if (levelStatus(open.levels[level]) !== levelStatus(digest.stories[index].levels[level])) {
+      renderStoryDetail(index);
+    } else {
+      updateLevelUI();
+    }
+  }
+
   // --- Render Story List ---
   function renderStoryList() {
     storyList.innerHTML = "";
@@ -96,7 +262,9 @@
     storyList.classList.remove("hidden");
     audioPlayer.classList.add("hidden");
     audio.pause();
+    releasePlayers();
     currentStoryIndex = null;
+    updateLevelUI();
 
     $("#date-display").textContent = formatDateDE(digest.date);
 
@@ -105,7 +273,7 @@
       const levelData = story.levels[String(level)];
       const duration = levelData && levelData.audio_duration_seconds
         ? Math.ceil(levelData.audio_duration_seconds / 60) + " Min."
-        : "";
+        : PENDING_NOTES[levelStatus(levelData)] || "";
 
       const item = document.createElement("div");
       item.className = "story-entry py-4 cursor-pointer";
@@ -146,40 +314,187 @@
     renderStoryDetail(index);
   }
 
-  function renderStoryDetail(index) {
+  // fromLevel is set on a level switch: playback moves to the new level's
+  // player at the matching position, and keeps playing if it was.
+  function renderStoryDetail(index, fromLevel) {
     const story = digest.stories[index];
     const level = getLevel();
-    const levelData = story.levels[String(level)];
+    const status = levelStatus(story.levels[String(level)]);
+    const levelData = status === "pending" ? null : story.levels[String(level)];
+    updateLevelUI();
+    const note = $("#pending-note");
+    note.textContent = PENDING_NOTES[status] || "";
+    note.classList.toggle("hidden", !PENDING_NOTES[status]);
 
     // Headline
     const headlineDe = levelData ? levelData.text_de : story.headline_de;
     $("#detail-headline").textContent = story.headline_de;
 
     // Text content
-    $("#german-content").textContent = levelData ? levelData.text_de : "";
+    hideGloss();
+    renderGermanText(levelData);
     $("#english-content").textContent = levelData ? levelData.text_en : "";
 
-    // Load audio
+    // Load audio. The current level only loads metadata up front: the
+    // browser fetches audio with range requests as playback (or a sentence
+    // jump) reaches it.
+    const wasPlaying = !audio.paused;
+    const fromTime = audio.currentTime;
     audio.pause();
     if (levelData && levelData.audio_url) {
-      audio.src = "./" + levelData.audio_url;
-      audio.preload = "auto";
+      const fromData = fromLevel !== undefined ? story.levels[String(fromLevel)] : null;
+      const time = fromData ? mapPosition(fromData, levelData, fromTime) : 0;
+      audio = playerFor(levelData);
       audio.playbackRate = getSpeed();
+      seekWhenReady(audio, time);
       updatePlayButton(false);
-      $("#total-time").textContent = levelData.audio_duration_seconds
-        ? formatTime(levelData.audio_duration_seconds)
-        : "0:00";
-      $("#current-time").textContent = "0:00";
-      $("#progress-fill").style.width = "0%";
+      const duration = levelData.audio_duration_seconds;
+      $("#total-time").textContent = duration ? formatTime(duration) : "0:00";
+      $("#current-time").textContent = formatTime(time);
+      $("#progress-fill").style.width = duration ? (time / duration) * 100 + "%" : "0%";
+      highlightSentence(time);
+      if (fromData && wasPlaying) {
+        audio.play().catch((err) => console.error("Audio play failed:", err));
+      }
+      prefetchAdjacent(story, level);
     } else {
-      audio.src = "";
+      audio = createPlayer();
       updatePlayButton(false);
     }
   }
 
+  // --- Sentence-Aligned Text ---
+  // With a seek index, each sentence is its own span: tap to play from it,
+  // and the one being spoken is highlighted.
+  let sentenceSpans = [];
+
+  function renderGermanText(levelData) {
+    const container = $("#german-content");
+    container.textContent = "";
+    sentenceSpans = [];
+    if (!levelData) return;
+
+    const text = levelData.text_de;
+    const sentences = levelData.sentences || [];
+    if (!sentences.length) {
+      container.textContent = text;
+      return;
+    }
+
+    let pos = 0;
+    sentences.forEach((s) => {
+      if (s.char_start > pos) {
+        container.appendChild(document.createTextNode(text.slice(pos, s.char_start)));
+      }
+      const span = document.createElement("span");
+      span.className = "sentence";
+      span.textContent = text.slice(s.char_start, s.char_end);
+      span.addEventListener("click", () => {
+        if (!audio.src) return;
+        audio.currentTime = s.start;
+        audio.play().catch((err) => console.error("Audio play failed:", err));
+      });
+      container.appendChild(span);
+      sentenceSpans.push({ span, start: s.start, end: s.end });
+      pos = s.char_end;
+    });
+    if (pos < text.length) {
+      container.appendChild(document.createTextNode(text.slice(pos)));
+    }
+  }
+
+  // --- Glossary ---
+  // Tap a word for its lemma and English gloss, looked up in the day's
+  // glossary shard (loaded once). The word under the tap is found from the
+  // caret position, so the text stays plain text nodes. Tapping the same
+  // word again closes the gloss and falls through to the sentence jump.
+  let glossary = null;
+  let glossedWord = null;
+  const glossPopup = $("#gloss-popup");
+  const LETTER = /\p{L}/u;
+
+  async function fetchGlossary() {
+    if (!digest.glossary) return;
+    try {
+      const resp = await fetch("./content/" + digest.glossary);
+      if (!resp.ok) throw new Error("Fetch failed: " + resp.status);
+      const data = await resp.json();
+      glossary = {
+        forms: new Map(Object.entries(data.forms)),
+        lemmas: new Map(Object.entries(data.lemmas)),
+      };
+    } catch (err) {
+      console.warn("Glossary unavailable:", err);
+    }
+  }
+
+  function lookupWord(word) {
+    const lemma = glossary.forms.get(word) || glossary.forms.get(word.toLowerCase());
+    if (!lemma || !glossary.lemmas.has(lemma)) return null;
+    return { lemma, gloss: glossary.lemmas.get(lemma) };
+  }
+
+  function wordAt(x, y) {
+    let node, offset;
+    if (document.caretPositionFromPoint) {
+      const pos = document.caretPositionFromPoint(x, y);
+      if (!pos) return null;
+      node = pos.offsetNode;
+      offset = pos.offset;
+    } else if (document.caretRangeFromPoint) {
+      const range = document.caretRangeFromPoint(x, y);
+      if (!range) return null;
+      node = range.startContainer;
+      offset = range.startOffset;
+    } else {
+      return null;
+    }
+    if (!node || node.nodeType !== Node.TEXT_NODE) return null;
+    const text = node.textContent;
+    let start = offset;
+    let end = offset;
+    while (start > 0 && LETTER.test(text[start - 1])) start--;
+    while (end < text.length && LETTER.test(text[end])) end++;
+    return start < end ? text.slice(start, end) : null;
+  }
+
+  function showGloss(word, entry, x, y) {
+    $("#gloss-lemma").textContent = entry.lemma;
+    $("#gloss-text").textContent = entry.gloss;
+    glossPopup.style.left = Math.max(8, Math.min(x - 40, window.innerWidth - 268)) + "px";
+    glossPopup.style.top = Math.max(8, y - 56) + "px";
+    glossPopup.classList.remove("hidden");
+    glossedWord = word;
+  }
+
+  function hideGloss() {
+    glossPopup.classList.add("hidden");
+    glossedWord = null;
+  }
+
+  // Capture phase, so a shown gloss can stop the sentence span's jump
+  $("#german-content").addEventListener("click", (e) => {
+    const word = glossary ? wordAt(e.clientX, e.clientY) : null;
+    const entry = word ? lookupWord(word) : null;
+    if (!entry || word === glossedWord) {
+      hideGloss();
+      return;
+    }
+    e.stopPropagation();
+    showGloss(word, entry, e.clientX, e.clientY);
+  }, true);
+  window.addEventListener("scroll", hideGloss, { passive: true });
+
+  function highlightSentence(time) {
+    sentenceSpans.forEach((s) => {
+      s.span.classList.toggle("active", time >= s.start && time < s.end);
+    });
+  }
+
   // --- Back Button ---
   $("#back-btn").addEventListener("click", () => {
     audio.pause();
+    hideGloss();
     renderStoryList();
   });
 
@@ -216,20 +531,24 @@
     }
   });
 
-  audio.addEventListener("play", () => updatePlayButton(true));
-  audio.addEventListener("pause", () => updatePlayButton(false));
-  audio.addEventListener("ended", () => updatePlayButton(false));
-
-  audio.addEventListener("timeupdate", () => {
-    if (!audio.duration) return;
-    const pct = (audio.currentTime / audio.duration) * 100;
-    $("#progress-fill").style.width = pct + "%";
-    $("#current-time").textContent = formatTime(audio.currentTime);
-  });
+  // Every player gets these listeners; only the current one drives the UI
+  function bindPlayer(el) {
+    el.addEventListener("play", () => { if (el === audio) updatePlayButton(true); });
+    el.addEventListener("pause", () => { if (el === audio) updatePlayButton(false); });
+    el.addEventListener("ended", () => { if (el === audio) updatePlayButton(false); });
+
+    el.addEventListener("timeupdate", () => {
+      if (el !== audio || !el.duration) return;
+      const pct = (el.currentTime / el.duration) * 100;
+      $("#progress-fill").style.width = pct + "%";
+      $("#current-time").textContent = formatTime(el.currentTime);
+      highlightSentence(el.currentTime);
+    });
 
-  audio.addEventListener("loadedmetadata", () => {
-    $("#total-time").textContent = formatTime(audio.duration);
-  });
+    el.addEventListener("loadedmetadata", () => {
+      if (el === audio) $("#total-time").textContent = formatTime(el.duration);
+    });
+  }
 
   // Progress bar scrubbing
   $("#progress-bar").addEventListener("click", (e) => {
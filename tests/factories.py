@@ -0,0 +1,63 @@
+"""Builders for the stories, API replies and MP3 data tests share.
+
+Stories get fixed, recognizable defaults (a dw.com link after the ID, a
+2026-02-23 date, one A1 level) so tests only spell out what they assert on.
+"""
+
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from backend import mp3
+from backend.models import LevelContent, ProcessedStory, RawStory
+
+# Index of (kbps, Hz) in the MPEG-2 tables: 22050 Hz mono, 48/64 kbps
+_BITRATE_INDEX = {48: 6, 64: 8}
+_RATE_INDEX = {22050: 0, 24000: 1}
+
+
+def make_raw_story(
+    story_id: str, full_text: str = "Text.", published_date: datetime | None = None,
+) -> RawStory:
+    """A feed story titled and linked after its ID."""
+    return RawStory(
+        id=story_id,
+        title=story_id,
+        link=f"https://dw.com/a-{story_id}",
+        full_text=full_text,
+        published_date=published_date or datetime(2026, 2, 23),
+    )
+
+
+def make_processed_story(
+    story_id: str, levels: dict[int, LevelContent] | None = None,
+) -> ProcessedStory:
+    """A processed story with the given levels (default: an A1 level only)."""
+    return ProcessedStory(
+        id=story_id,
+        headline_de="Schlagzeile",
+        headline_en="Headline",
+        summary_en="Summary",
+        source_url=f"https://dw.com/a-{story_id}",
+        levels=levels or {1: LevelContent(text_de="Einfach", text_en="Simple")},
+    )
+
+
+def make_mock_response(content: dict) -> MagicMock:
+    """Create a mock OpenAI chat completion response."""
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = json.dumps(content)
+    return mock_response
+
+
+def mp3_frame(bitrate: int = 48, sample_rate: int = 22050, payload: bytes = b"") -> bytes:
+    """One MPEG-2 Layer III mono frame, payload then padding as its body."""
+    raw = (
+        (0x7FF << 21) | (0b10 << 19) | (0b01 << 17) | (1 << 16)
+        | (_BITRATE_INDEX[bitrate] << 12) | (_RATE_INDEX[sample_rate] << 10)
+        | (0b11 << 6)
+    )
+    header = mp3.parse_header(raw.to_bytes(4, "big"), 0)
+    body = (raw.to_bytes(4, "big") + payload).ljust(header.length, b"\x55")
+    return body[:header.length]
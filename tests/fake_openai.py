@@ -0,0 +1,179 @@
+"""Local stand-in for the OpenAI HTTP API, for tests that need real sockets.
+
+Serves chat completions and speech with configurable rate-limit headers,
+and records peak in-flight concurrency. Also implements the batch protocol
+(/v1/files upload and content, /v1/batches create and retrieve): a batch
+stays in progress for `batch_polls` retrievals, then completes with each
+request answered by `batch_responder`.
+"""
+
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer:
+    def __init__(self):
+        self.delay = 0.0
+        # Responses to serve, in order; once used up, `default` is repeated.
+        # Each is (status, headers, body-dict).
+        self.script: list[tuple[int, dict, dict]] = []
+        self.default_headers: dict[str, str] = {}
+        self.chat_content: dict = {"text_de": "Hallo Welt."}
+        self.requests: list[tuple[str, str, bytes]] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+        self.batch_polls = 1
+        # (custom_id, request body) -> chat content dict, or None for an error
+        self.batch_responder = lambda custom_id, body: self.chat_content
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def chat_body(self) -> dict:
+        return {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o-mini",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(self.chat_content)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        }
+
+    def _upload(self, body: bytes) -> dict:
+        """Store the "file" part of a multipart upload."""
+        delimiter = body.split(b"\r\n", 1)[0]
+        for part in body.split(delimiter):
+            head, _, content = part.partition(b"\r\n\r\n")
+            if b'name="file"' in head:
+                file_id = f"file-{next(self._ids)}"
+                self.files[file_id] = content.removesuffix(b"\r\n")
+                return {"id": file_id, "object": "file", "purpose": "batch",
+                        "bytes": len(self.files[file_id]), "filename": "batch.jsonl"}
+        raise ValueError("no file part in upload")
+
+    def _run_batch(self, batch: dict) -> None:
+        output, errors = [], []
+        for line in self.files[batch["input_file_id"]].decode().splitlines():
+            request = json.loads(line)
+            content = self.batch_responder(request["custom_id"], request["body"])
+            if content is None:
+                errors.append({"custom_id": request["custom_id"], "response": None,
+                               "error": {"code": "server_error", "message": "failed"}})
+                continue
+            completion = self.chat_body()
+            completion["choices"][0]["message"]["content"] = json.dumps(content)
+            output.append({"custom_id": request["custom_id"], "error": None,
+                           "response": {"status_code": 200, "body": completion}})
+        for key, lines in (("output_file_id", output), ("error_file_id", errors)):
+            if lines:
+                file_id = f"file-{next(self._ids)}"
+                self.files[file_id] = "".join(json.dumps(x) + "\n" for x in lines).encode()
+                batch[key] = file_id
+        batch["status"] = "completed"
+
+    def _batch_api(self, method: str, path: str, body: bytes) -> dict | bytes | None:
+        parts = path.split("?")[0].rstrip("/").split("/")[2:]  # after /v1
+        if parts == ["files"] and method == "POST":
+            return self._upload(body)
+        if len(parts) == 3 and parts[0] == "files" and parts[2] == "content":
+            return self.files[parts[1]]
+        if parts == ["batches"] and method == "POST":
+            request = json.loads(body)
+            batch_id = f"batch-{next(self._ids)}"
+            self.batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": request["endpoint"],
+                "input_file_id": request["input_file_id"],
+                "completion_window": request["completion_window"],
+                "status": "in_progress", "created_at": int(time.time()),
+                "polls_left": self.batch_polls,
+            }
+            return self.batches[batch_id]
+        if len(parts) == 2 and parts[0] == "batches":
+            batch = self.batches[parts[1]]
+            if batch["status"] == "in_progress":
+                if batch["polls_left"] > 0:
+                    batch["polls_left"] -= 1
+                else:
+                    self._run_batch(batch)
+            return batch
+        return None
+
+    def handle(self, method: str, path: str, body: bytes) -> tuple[int, dict, bytes]:
+        """Route a request; subclasses and tests may override."""
+        with self._lock:
+            scripted = self.script.pop(0) if self.script else None
+        if scripted is not None:
+            status, headers, payload = scripted
+            return status, headers, json.dumps(payload).encode()
+        if "/files" in path or "/batches" in path:
+            with self._lock:
+                result = self._batch_api(method, path, body)
+            if isinstance(result, bytes):
+                return 200, {"content-type": "application/octet-stream"}, result
+            if result is not None:
+                return 200, {}, json.dumps(result).encode()
+            return 404, {}, json.dumps({"error": {"message": "not found"}}).encode()
+        if path.endswith("/audio/speech"):
+            return 200, {"content-type": "audio/mpeg"}, b"\xff\xfb" + b"\x00" * 64
+        return 200, {}, json.dumps(self.chat_body()).encode()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("content-length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with fake._lock:
+                    fake.requests.append((self.command, self.path, body))
+                    fake.in_flight += 1
+                    fake.peak_in_flight = max(fake.peak_in_flight, fake.in_flight)
+                try:
+                    if fake.delay:
+                        time.sleep(fake.delay)
+                    status, headers, payload = fake.handle(self.command, self.path, body)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+                self.send_response(status)
+                headers = {**fake.default_headers, **headers}
+                headers.setdefault("content-type", "application/json")
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("content-length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _serve
+            do_POST = _serve
+            do_PUT = _serve
+            do_DELETE = _serve
+
+        return Handler
@@ -0,0 +1,92 @@
+from backend.archive import archive_entry, merge_published, update_archive
+from backend.storage import read_json
+
+
+def _digest(day: str, story_ids=("1",)) -> dict:
+    return {
+        "schema_version": 1,
+        "date": day,
+        "stories": [
+            {
+                "id": story_id,
+                "headline_de": f"Schlagzeile {story_id}",
+                "headline_en": f"Headline {story_id}",
+                "levels": {
+                    "1": {"text_de": "A1.", "audio_duration_seconds": 30.5},
+                    "3": {"text_de": "C1.", "audio_duration_seconds": None},
+                },
+            }
+            for story_id in story_ids
+        ],
+    }
+
+
+class TestArchiveEntry:
+    def test_summarizes_digest(self):
+        entry = archive_entry(_digest("2026-02-23", ["7"]))
+        assert entry == {
+            "date": "2026-02-23",
+            "digest": "2026-02-23/digest.json",
+            "stories": [{
+                "id": "7",
+                "headline_de": "Schlagzeile 7",
+                "headline_en": "Headline 7",
+                "levels": {"1": 30.5, "3": None},
+            }],
+        }
+
+
+class TestUpdateArchive:
+    def test_appends_newest_first_and_replaces_rebuilt_day(self, tmp_path):
+        update_archive(_digest("2026-02-22"), tmp_path)
+        update_archive(_digest("2026-02-23"), tmp_path)
+        update_archive(_digest("2026-02-23", ["1", "2"]), tmp_path)
+
+        index = read_json(tmp_path / "archive" / "index.json")
+        assert [e["date"] for e in index["recent"]] == ["2026-02-23", "2026-02-22"]
+        assert len(index["recent"][0]["stories"]) == 2
+        assert index["months"] == []
+
+    def test_rolls_previous_month_into_segment(self, tmp_path):
+        update_archive(_digest("2026-02-27"), tmp_path)
+        update_archive(_digest("2026-02-28"), tmp_path)
+        update_archive(_digest("2026-03-01"), tmp_path)
+
+        index = read_json(tmp_path / "archive" / "index.json")
+        assert [e["date"] for e in index["recent"]] == ["2026-03-01"]
+        assert index["months"] == ["2026-02"]
+        segment = read_json(tmp_path / "archive" / "2026-02.json")
+        assert segment["month"] == "2026-02"
+        assert [d["date"] for d in segment["days"]] == ["2026-02-28", "2026-02-27"]
+
+    def test_rebuild_of_sealed_month_updates_segment(self, tmp_path):
+        update_archive(_digest("2026-02-28"), tmp_path)
+        update_archive(_digest("2026-03-01"), tmp_path)
+        update_archive(_digest("2026-02-28", ["9"]), tmp_path)
+
+        index = read_json(tmp_path / "archive" / "index.json")
+        assert [e["date"] for e in index["recent"]] == ["2026-03-01"]
+        segment = read_json(tmp_path / "archive" / "2026-02.json")
+        assert [s["id"] for s in segment["days"][0]["stories"]] == ["9"]
+
+
+class TestMergePublished:
+    def test_keeps_published_days_and_rolls_them_into_segments(self, tmp_path):
+        published_root, local_root = tmp_path / "published", tmp_path / "local"
+        for day in ("2026-01-31", "2026-02-27", "2026-02-28"):
+            update_archive(_digest(day), published_root)
+        update_archive(_digest("2026-02-28", ["9"]), local_root)
+        update_archive(_digest("2026-03-01"), local_root)
+        published_dir = published_root / "archive"
+
+        merge_published(
+            local_root, read_json(published_dir / "index.json"),
+            lambda month: read_json(published_dir / f"{month}.json"),
+        )
+
+        index = read_json(local_root / "archive" / "index.json")
+        assert [e["date"] for e in index["recent"]] == ["2026-03-01"]
+        assert index["months"] == ["2026-02", "2026-01"]
+        segment = read_json(local_root / "archive" / "2026-02.json")
+        assert [d["date"] for d in segment["days"]] == ["2026-02-28", "2026-02-27"]
+        assert [s["id"] for s in segment["days"][0]["stories"]] == ["9"]
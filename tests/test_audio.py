@@ -1,18 +1,29 @@
 import asyncio
 import tempfile
+import threading
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from backend.audio import (
+    RENDITIONS,
+    assemble_audio,
+    audio_files,
+    audio_formats,
     chunk_text,
+    encode_renditions,
+    generate_aligned_audio,
     generate_audio_for_story,
     generate_single_audio,
     get_mp3_duration,
     reencode_mp3,
+    rendition_path,
+    sentence_index,
+    split_sentences,
 )
 from backend.models import LevelContent, ProcessedStory
+from tests.factories import mp3_frame
 
 
 class TestChunkText:
@@ -57,25 +68,107 @@ class TestReencodeMp3:
         assert args[-1] == "/tmp/output.mp3"
 
 
+class TestEncodeRenditions:
+    @patch("backend.audio.subprocess.run")
+    def test_one_decode_many_outputs(self, mock_run):
+        encode_renditions(
+            Path("/tmp/input.mp3"), Path("/tmp/out/level-1.mp3"),
+            ("opus-webm", "aac-m4a", "mp3"),
+        )
+        mock_run.assert_called_once()
+        args = mock_run.call_args.args[0]
+        assert args.count("-i") == 1
+        assert "libopus" in args
+        outputs = [a for a in args if a.startswith("/tmp/out/")]
+        assert outputs == [
+            "/tmp/out/level-1.webm", "/tmp/out/level-1.m4a", "/tmp/out/level-1.mp3",
+        ]
+
+    def test_renditions_have_distinct_files(self):
+        output = Path("/tmp/out/level-1.mp3")
+        paths = {rendition_path(output, name) for name in RENDITIONS}
+        assert len(paths) == len(RENDITIONS)
+        assert rendition_path(output, "he-aac-m4a").name == "level-1.he.m4a"
+
+    def test_ladder_always_ends_in_mp3(self):
+        assert audio_formats(["opus-webm"]) == ("opus-webm", "mp3")
+        assert audio_formats(["mp3", "opus-ogg"]) == ("mp3", "opus-ogg")
+        with pytest.raises(ValueError, match="flac"):
+            audio_formats(["flac"])
+
+    def test_lists_existing_renditions_in_ladder_order(self, tmp_path):
+        output_dir = tmp_path / "content" / "2026-02-23"
+        (output_dir / "1").mkdir(parents=True)
+        (output_dir / "1" / "level-1.mp3").write_bytes(b"x" * 10)
+        (output_dir / "1" / "level-1.webm").write_bytes(b"x" * 4)
+
+        files = audio_files(
+            output_dir / "1" / "level-1.mp3", output_dir, ("opus-webm", "aac-m4a", "mp3"),
+        )
+
+        assert [(f.url, f.size_bytes) for f in files] == [
+            ("content/2026-02-23/1/level-1.webm", 4),
+            ("content/2026-02-23/1/level-1.mp3", 10),
+        ]
+        assert files[0].mime_type == 'audio/webm; codecs="opus"'
+
+
 class TestGetMp3Duration:
+    def test_exact_duration_from_frames(self, tmp_path):
+        path = tmp_path / "a.mp3"
+        path.write_bytes(mp3_frame() * 50)
+        assert get_mp3_duration(path) == pytest.approx(50 * 576 / 22050)
+
     @patch("backend.audio.MP3")
-    def test_returns_duration(self, mock_mp3_cls):
+    def test_falls_back_to_mutagen(self, mock_mp3_cls, tmp_path):
         mock_audio = MagicMock()
         mock_audio.info.length = 15.5
         mock_mp3_cls.return_value = mock_audio
+        path = tmp_path / "a.mp3"
+        path.write_bytes(b"not frames")
 
-        duration = get_mp3_duration(Path("/tmp/test.mp3"))
+        duration = get_mp3_duration(path)
         assert duration == 15.5
 
 
+class TestAssembleAudio:
+    @patch("backend.audio.encode_renditions")
+    def test_matching_chunks_are_spliced_without_ffmpeg(self, mock_encode, tmp_path):
+        chunks = []
+        for i in range(3):
+            chunks.append(tmp_path / f"chunk-{i}.mp3")
+            chunks[-1].write_bytes(mp3_frame() * 10)
+        out = tmp_path / "level-1.mp3"
+
+        assemble_audio(chunks, out)
+
+        mock_encode.assert_not_called()
+        assert get_mp3_duration(out) == pytest.approx(30 * 576 / 22050)
+
+    @patch("backend.audio.encode_renditions")
+    def test_other_formats_are_spliced_then_encoded_once(self, mock_encode, tmp_path):
+        chunks = []
+        for bitrate in (48, 64):
+            chunks.append(tmp_path / f"chunk-{bitrate}.mp3")
+            chunks[-1].write_bytes(mp3_frame(bitrate) * 10)
+        out = tmp_path / "level-1.mp3"
+
+        assemble_audio(chunks, out)
+
+        mock_encode.assert_called_once()
+        raw_path, output_path, formats = mock_encode.call_args.args
+        assert output_path == out and formats == ("mp3",)
+        assert not raw_path.exists()  # temp file cleaned up
+
+
 class TestGenerateSingleAudio:
     @pytest.mark.asyncio
     @patch("backend.audio.get_mp3_duration", return_value=12.3)
-    @patch("backend.audio.reencode_mp3")
+    @patch("backend.audio.encode_renditions")
     async def test_generates_and_reencodes(self, mock_reencode, mock_duration):
         client = AsyncMock()
         mock_response = MagicMock()
-        mock_response.stream_to_file = MagicMock()
+        mock_response.content = b"mp3 bytes"
         client.audio.speech.create.return_value = mock_response
 
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -91,8 +184,83 @@ class TestGenerateSingleAudio:
                 input="Hallo Welt",
             )
             mock_reencode.assert_called_once()
+            assert path == str(output_path)
             assert duration == 12.3
 
+    @pytest.mark.asyncio
+    async def test_encoding_runs_off_the_event_loop(self, tmp_path):
+        loop_thread = threading.get_ident()
+        threads = []
+
+        async def tts(client, voice, text, path, engine=None):
+            path.write_bytes(b"x")
+
+        def record(*args):
+            threads.append(threading.get_ident())
+            return 1.0
+
+        with patch("backend.audio.generate_tts_chunk", side_effect=tts), \
+                patch("backend.audio.assemble_audio", side_effect=record), \
+                patch("backend.audio.get_mp3_duration", side_effect=record):
+            await generate_single_audio(AsyncMock(), "nova", "Hallo.", tmp_path / "a.mp3")
+
+        assert len(threads) == 2
+        assert loop_thread not in threads
+
+
+class TestSentenceIndex:
+    def test_offsets_and_scaled_times(self):
+        text = "Erster Satz.  Zweiter Satz! Dritter?"
+        sentences = split_sentences(text)
+        assert sentences == ["Erster Satz.", "Zweiter Satz!", "Dritter?"]
+
+        # Raw chunks add up to 4s; the encoded file is 4.4s long
+        index = sentence_index(text, sentences, [2.0, 1.5, 0.5], 4.4)
+
+        assert [text[t.char_start:t.char_end] for t in index] == sentences
+        assert [(t.start, t.end) for t in index] == [(0.0, 2.2), (2.2, 3.85), (3.85, 4.4)]
+
+    def test_ordinals_and_abbreviations_stay_in_their_sentence(self):
+        text = "Am 3. Oktober kam z. B. der Kanzler. Dann ging er."
+        sentences = split_sentences(text)
+        assert sentences == ["Am 3. Oktober kam z. B. der Kanzler.", "Dann ging er."]
+
+        index = sentence_index(text, sentences, [3.0, 1.0], 4.0)
+        assert [(t.char_start, t.start) for t in index] == [(0, 0.0), (37, 3.0)]
+        assert chunk_text(text, max_chars=40) == sentences
+
+
+class TestGenerateAlignedAudio:
+    @pytest.mark.asyncio
+    @patch("backend.audio.encode_renditions")
+    @patch("backend.audio.concat_mp3s")
+    async def test_one_request_per_sentence(self, mock_concat, mock_encode, tmp_path):
+        client = AsyncMock()
+        client.audio.speech.create.return_value = MagicMock()
+        durations = {"Eins.": 1.0, "Zwei.": 2.0}
+        spoken = []
+
+        async def tts(client, voice, text, path, engine=None):
+            spoken.append((text, path))
+
+        def duration(path):
+            if path == tmp_path / "level-1.mp3":
+                return 3.0
+            return next(durations[t] for t, p in spoken if p == path)
+
+        with patch("backend.audio.generate_tts_chunk", side_effect=tts), \
+                patch("backend.audio.get_mp3_duration", side_effect=duration):
+            path, total, index = await generate_aligned_audio(
+                client, "nova", "Eins. Zwei.", tmp_path / "level-1.mp3",
+            )
+
+        assert sorted(t for t, _ in spoken) == ["Eins.", "Zwei."]
+        assert path == str(tmp_path / "level-1.mp3")
+        assert total == 3.0
+        assert [(t.char_start, t.start, t.end) for t in index] == [
+            (0, 0.0, 1.0), (6, 1.0, 3.0),
+        ]
+
 
 class TestGenerateAudioForStory:
     @pytest.mark.asyncio
@@ -168,3 +336,38 @@ class TestGenerateAudioForStory:
             # Level 2 should still exist but without audio
             assert result.levels[2].audio_url is None
             assert result.levels[2].audio_duration_seconds is None
+
+    @pytest.mark.asyncio
+    @patch("backend.audio.generate_single_audio")
+    async def test_reports_each_level_as_it_is_voiced(self, mock_gen, tmp_path):
+        story = ProcessedStory(
+            id="12345",
+            headline_de="Test",
+            headline_en="Test",
+            summary_en="Test",
+            source_url="https://dw.com/a-12345",
+            levels={
+                1: LevelContent(text_de="Einfach", text_en="Simple"),
+                2: LevelContent(text_de="Leicht", text_en="Easy"),
+            },
+        )
+        release_level_2 = asyncio.Event()
+
+        async def generate(client, voice, text, output_path, *args):
+            if text == "Leicht":
+                await release_level_2.wait()
+            return str(output_path), 5.0
+
+        mock_gen.side_effect = generate
+        voiced = []
+
+        def progress(partial: ProcessedStory) -> None:
+            voiced.append(sorted(n for n, c in partial.levels.items() if c.audio_url))
+            release_level_2.set()
+
+        await generate_audio_for_story(
+            story, client=AsyncMock(), voice="nova", output_dir=tmp_path,
+            progress=progress,
+        )
+
+        assert voiced == [[1], [1, 2]]
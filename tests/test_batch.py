@@ -0,0 +1,136 @@
+from datetime import datetime
+
+import pytest
+from openai import OpenAI
+
+from backend.batch import generate_levels_batch
+from backend.models import RawStory
+from backend.routing import parse_routes
+from tests.fake_openai import FakeOpenAIServer
+
+STORIES = [
+    RawStory(
+        id=story_id,
+        title=f"Titel {story_id}",
+        link=f"https://dw.com/a-{story_id}",
+        full_text=f"Artikel {story_id} über deutsche Politik.",
+        published_date=datetime(2026, 2, 23),
+    )
+    for story_id in ("111", "222")
+]
+
+
+def respond(custom_id: str, body: dict) -> dict | None:
+    story_id, task = custom_id.split("/")
+    if task == "c1":
+        return {"text_de": f"Komplex {story_id}.", "headline_de": f"H {story_id}"}
+    if task == "b1":
+        return {"text_de": f"Mittel {story_id}."}
+    if task == "a1":
+        return {"text_de": f"Einfach {story_id}."}
+    return {"text_en": f"English {task[-1]}."}
+
+
+@pytest.fixture
+def fake():
+    with FakeOpenAIServer() as server:
+        server.batch_responder = respond
+        yield server
+
+
+def _client(server: FakeOpenAIServer) -> OpenAI:
+    return OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+
+
+def _batch_creates(server: FakeOpenAIServer) -> list:
+    return [r for r in server.requests if r[0] == "POST" and r[1].endswith("/batches")]
+
+
+class TestGenerateLevelsBatch:
+    def test_runs_one_wave_per_level(self, fake, tmp_path):
+        stories = generate_levels_batch(
+            STORIES, _client(fake), "gpt-4o-mini", tmp_path,
+            validate=False, poll_interval=0,
+        )
+
+        assert len(_batch_creates(fake)) == 4
+        # Each wave is staged as JSONL; B1 prompts are built from C1 output
+        wave2 = (tmp_path / "wave-2.jsonl").read_text()
+        assert "Komplex 111." in wave2
+        assert "111/translate-3" in wave2
+
+        story = stories["222"]
+        assert story.headline_de == "H 222"
+        assert story.source_url == "https://dw.com/a-222"
+        assert story.levels[3].text_de == "Komplex 222."
+        assert story.levels[2].text_de == "Mittel 222."
+        assert story.levels[1].text_de == "Einfach 222."
+        assert [story.levels[n].text_en for n in (3, 2, 1)] == [
+            "English 3.", "English 2.", "English 1.",
+        ]
+
+    def test_routes_models_per_task(self, fake, tmp_path):
+        generate_levels_batch(
+            STORIES, _client(fake), parse_routes("a1=small", "default"), tmp_path,
+            translate=False, validate=False, poll_interval=0,
+        )
+        assert '"model": "small"' in (tmp_path / "wave-3.jsonl").read_text()
+        assert '"model": "small"' not in (tmp_path / "wave-2.jsonl").read_text()
+
+    def test_failed_requests_retry_interactively(self, fake, tmp_path):
+        fake.batch_responder = lambda cid, body: None if cid == "111/a1" else respond(cid, body)
+        fake.chat_content = {"text_de": "Interaktiv."}
+
+        stories = generate_levels_batch(
+            STORIES, _client(fake), "gpt-4o-mini", tmp_path,
+            translate=False, validate=False, poll_interval=0,
+        )
+
+        assert stories["111"].levels[1].text_de == "Interaktiv."
+        assert stories["222"].levels[1].text_de == "Einfach 222."
+        chat_calls = [r for r in fake.requests if r[1].endswith("/chat/completions")]
+        assert len(chat_calls) == 1
+
+    def test_unusable_result_is_repaired(self, fake, tmp_path):
+        fake.batch_responder = lambda cid, body: (
+            {"wrong": "field"} if cid == "222/b1" else respond(cid, body)
+        )
+        fake.chat_content = {"text_de": "Repariert."}
+
+        stories = generate_levels_batch(
+            STORIES, _client(fake), "gpt-4o-mini", tmp_path,
+            translate=False, validate=False, poll_interval=0,
+        )
+
+        assert stories["222"].levels[2].text_de == "Repariert."
+        chat_calls = [r for r in fake.requests if r[1].endswith("/chat/completions")]
+        assert len(chat_calls) == 1
+
+    def test_unrepairable_story_is_dropped(self, fake, tmp_path):
+        fake.batch_responder = lambda cid, body: (
+            {"wrong": "field"} if cid == "222/b1" else respond(cid, body)
+        )
+        fake.chat_content = {"still": "wrong"}
+
+        stories = generate_levels_batch(
+            STORIES, _client(fake), "gpt-4o-mini", tmp_path,
+            translate=False, validate=False, poll_interval=0,
+        )
+
+        assert list(stories) == ["111"]
+
+    def test_rerun_resumes_submitted_batches(self, fake, tmp_path):
+        args = (STORIES, _client(fake), "gpt-4o-mini", tmp_path)
+        first = generate_levels_batch(*args, validate=False, poll_interval=0)
+        second = generate_levels_batch(*args, validate=False, poll_interval=0)
+
+        assert len(_batch_creates(fake)) == 4
+        assert second == first
+
+    def test_rerun_with_other_stories_resubmits(self, fake, tmp_path):
+        args = (_client(fake), "gpt-4o-mini", tmp_path)
+        generate_levels_batch(STORIES, *args, validate=False, poll_interval=0)
+        stories = generate_levels_batch(STORIES[:1], *args, validate=False, poll_interval=0)
+
+        assert len(_batch_creates(fake)) == 8
+        assert list(stories) == ["111"]
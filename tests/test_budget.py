@@ -0,0 +1,113 @@
+import pytest
+
+from backend.budget import (
+    DROP,
+    SKIP_C1_AUDIO,
+    TRIM_INPUT,
+    BudgetGovernor,
+    Usage,
+    trim_text,
+)
+from backend.metrics import metrics, story_scope
+from backend.models import RawStory
+from tests.factories import make_raw_story
+
+
+def _story(story_id: str, chars: int) -> RawStory:
+    return make_raw_story(story_id, "Ein Satz. " * (chars // 10))
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _actions(governor: BudgetGovernor) -> list[tuple[str, str]]:
+    return [(d.story_id, d.action) for d in governor.decisions]
+
+
+class TestTrimText:
+    def test_cuts_at_sentence_end(self):
+        assert trim_text("Eins. Zwei. Drei.", 12) == "Eins. Zwei."
+
+    def test_short_text_unchanged(self):
+        assert trim_text("Eins.", 100) == "Eins."
+
+
+class TestPlan:
+    def test_within_limits_keeps_everything(self):
+        stories = [_story("a", 2000), _story("b", 2000)]
+        governor = BudgetGovernor(Usage(10**6, 10**6, 10**6))
+
+        assert governor.plan(stories) == stories
+        assert governor.decisions == []
+
+    def test_skips_c1_audio_first_lowest_priority_first(self):
+        stories = [_story(s, 2000) for s in ("a", "b", "c")]
+        governor = BudgetGovernor(Usage())
+        full = governor.project(stories[0])
+        skipped = governor.project(stories[0], skip_c1_audio=True)
+        # Room for one story's C1 audio less than all three
+        tts = (2 * full.tts_chars + skipped.tts_chars) / 0.9 + 1
+        governor.limits = Usage(tts_chars=int(tts))
+
+        kept = governor.plan(stories)
+
+        assert kept == stories
+        assert _actions(governor) == [("c", SKIP_C1_AUDIO)]
+        assert governor.skip_audio("c") == {3}
+        assert governor.skip_audio("a") == frozenset()
+
+    def test_trims_then_drops_lowest_priority(self):
+        stories = [_story("a", 3000), _story("b", 3000), _story("c", 12000)]
+        governor = BudgetGovernor(Usage(), trim_chars=3000)
+        one = governor.project(stories[0]).prompt_tokens
+        governor.limits = Usage(prompt_tokens=int(2.5 * one / 0.9))
+
+        kept = governor.plan(stories)
+
+        assert [s.id for s in kept] == ["a", "b"]
+        assert _actions(governor) == [("c", TRIM_INPUT), ("c", DROP)]
+        assert governor.to_dict()["decisions"][-1] == {
+            "story": "c", "action": DROP, "reason": "prompt_tokens",
+        }
+
+    def test_keeps_at_least_one_story(self):
+        governor = BudgetGovernor(Usage(completion_tokens=1))
+        kept = governor.plan([_story("a", 2000), _story("b", 2000)])
+        assert [s.id for s in kept] == ["a"]
+
+
+class TestAdmit:
+    def test_drops_when_actual_usage_ran_over(self):
+        stories = [_story("a", 2000), _story("b", 2000)]
+        governor = BudgetGovernor(Usage(), trim_chars=10**6)
+        governor.limits = Usage(tts_chars=int(3 * governor.project(stories[0]).tts_chars))
+        governor.plan(stories)
+
+        assert governor.admit(stories[0]) == stories[0]
+        governor.finish("a")
+        # The first story cost far more than projected
+        metrics.record_tts(governor.limits.tts_chars)
+
+        assert governor.admit(stories[1]) is None
+        assert _actions(governor)[-2:] == [("b", SKIP_C1_AUDIO), ("b", DROP)]
+        assert governor.to_dict()["actual"]["tts_chars"] == governor.limits.tts_chars
+
+    def test_running_story_usage_is_not_counted_twice(self):
+        stories = [_story("a", 2000), _story("b", 2000)]
+        governor = BudgetGovernor(Usage(), trim_chars=10**6)
+        one = governor.project(stories[0]).tts_chars
+        # Room for both stories, not for a's audio counted twice
+        governor.limits = Usage(tts_chars=int(2.5 * one / 0.9))
+        governor.plan(stories)
+
+        assert governor.admit(stories[0]) == stories[0]
+        # a is still running and has voiced most of its levels
+        with story_scope("a"):
+            metrics.record_tts(int(0.8 * one))
+
+        assert governor.admit(stories[1]) == stories[1]
+        assert governor.decisions == []
@@ -1,6 +1,9 @@
+import asyncio
 import json
 import tempfile
-from datetime import datetime
+import threading
+from dataclasses import replace
+from datetime import date, datetime
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -10,10 +13,20 @@ from backend.build import (
     build_digest,
     get_config,
     run_pipeline,
+    story_from_dict,
     story_to_dict,
     write_digest,
 )
-from backend.models import LevelContent, ProcessedStory, RawStory
+from backend.levels import GenerationCancelled
+from backend.metrics import metrics
+from backend.models import (
+    AudioFile,
+    LevelContent,
+    ProcessedStory,
+    RawStory,
+    SentenceTiming,
+)
+from backend.spool import StorySpool
 
 
 SAMPLE_STORY = ProcessedStory(
@@ -28,6 +41,11 @@ SAMPLE_STORY = ProcessedStory(
             text_en="Simple.",
             audio_url="content/2026-02-23/12345/level-1.mp3",
             audio_duration_seconds=10.5,
+            audio_files=(
+                AudioFile("content/2026-02-23/12345/level-1.webm", "audio/webm", 30000),
+                AudioFile("content/2026-02-23/12345/level-1.mp3", "audio/mpeg", 60000),
+            ),
+            sentences=(SentenceTiming(0, 8, 0.0, 10.5),),
         ),
         3: LevelContent(
             text_de="Komplex.",
@@ -62,6 +80,10 @@ class TestGetConfig:
         assert config["llm_model"] == "gpt-4o-mini"
         assert config["tts_voice"] == "nova"
         assert config["max_stories"] == 3
+        assert config["feeds"] == ["https://rss.dw.com/xml/rss-de-all"]
+        assert config["dedupe_threshold"] == 0.5
+        assert config["cefr_validate"] is True
+        assert config["llm_routes"].for_task("a1").primary == "gpt-4o-mini"
 
     def test_missing_api_key_raises(self, monkeypatch):
         monkeypatch.delenv("OPENAI_API_KEY", raising=False)
@@ -79,6 +101,17 @@ class TestStoryToDict:
         assert result["levels"]["1"]["text_de"] == "Einfach."
         assert result["levels"]["1"]["audio_url"] == "content/2026-02-23/12345/level-1.mp3"
         assert result["levels"]["1"]["audio_duration_seconds"] == 10.5
+        assert result["levels"]["1"]["audio_files"][0] == {
+            "url": "content/2026-02-23/12345/level-1.webm",
+            "type": "audio/webm",
+            "bytes": 30000,
+        }
+
+
+class TestStoryFromDict:
+    def test_roundtrip(self):
+        data = json.loads(json.dumps(story_to_dict(SAMPLE_STORY)))
+        assert story_from_dict(data) == SAMPLE_STORY
 
 
 class TestBuildDigest:
@@ -108,26 +141,25 @@ class TestWriteDigest:
                 assert json.load(f)["schema_version"] == 1
             with open(latest_path) as f:
                 assert json.load(f)["date"] == "2026-02-23"
+            index_path = Path(tmpdir) / "content" / "archive" / "index.json"
+            with open(index_path) as f:
+                assert json.load(f)["recent"][0]["date"] == "2026-02-23"
 
 
 class TestRunPipeline:
     @pytest.mark.asyncio
-    @patch("backend.build.write_digest")
     @patch("backend.build.generate_audio_for_story")
     @patch("backend.build.generate_levels")
     @patch("backend.build.fetch_stories")
-    @patch("backend.build.AsyncOpenAI")
-    @patch("backend.build.OpenAI")
+    @patch("backend.build.make_clients")
     @patch("backend.build.OUTPUT_DIR")
     async def test_full_pipeline(
         self,
         mock_output_dir,
-        mock_openai,
-        mock_async_openai,
+        mock_make_clients,
         mock_fetch,
         mock_levels,
         mock_audio,
-        mock_write,
     ):
         with tempfile.TemporaryDirectory() as tmpdir:
             mock_output_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
@@ -151,6 +183,7 @@ class TestRunPipeline:
             )
             mock_levels.return_value = processed
             mock_audio.return_value = processed
+            mock_make_clients.return_value = (MagicMock(), AsyncMock())
 
             config = {
                 "api_key": "test-key",
@@ -161,15 +194,339 @@ class TestRunPipeline:
 
             await run_pipeline(config)
 
-            mock_fetch.assert_called_once_with(max_stories=3)
+            mock_fetch.assert_called_once_with(
+                max_stories=3, feeds=None, dedupe_threshold=None,
+            )
             mock_levels.assert_called_once()
             mock_audio.assert_called_once()
-            mock_write.assert_called_once()
 
             # Verify digest structure
-            digest = mock_write.call_args.args[0]
+            content = Path(tmpdir) / "content"
+            digest = json.loads(next(content.glob("*/digest.json")).read_text())
             assert digest["schema_version"] == 1
             assert len(digest["stories"]) == 1
+            assert json.loads((content / "latest.json").read_text()) == digest
+            # The spool is removed once the digest is out
+            assert not list((Path(tmpdir) / "spool").glob("*.ndjson"))
+
+    @pytest.mark.asyncio
+    @patch("backend.build.generate_audio_for_story")
+    @patch("backend.build.generate_levels")
+    @patch("backend.build.fetch_stories")
+    @patch("backend.build.make_clients")
+    @patch("backend.build.OUTPUT_DIR")
+    async def test_resumes_from_spool(
+        self,
+        mock_output_dir,
+        mock_make_clients,
+        mock_fetch,
+        mock_levels,
+        mock_audio,
+    ):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_output_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
+            today = date.today().isoformat()
+            done = ProcessedStory(
+                id="111", headline_de="Fertig", headline_en="", summary_en="",
+                source_url="", levels={1: LevelContent(text_de="A", text_en="A")},
+            )
+            StorySpool(Path(tmpdir) / "spool" / f"{today}.ndjson").append(
+                story_to_dict(done)
+            )
+            mock_fetch.return_value = [
+                RawStory(
+                    id=story_id, title="T", link="", full_text="Text.",
+                    published_date=datetime(2026, 2, 23),
+                )
+                for story_id in ("111", "222")
+            ]
+            new = ProcessedStory(
+                id="222", headline_de="Neu", headline_en="", summary_en="",
+                source_url="", levels={1: LevelContent(text_de="B", text_en="B")},
+            )
+            mock_levels.return_value = new
+            mock_audio.return_value = new
+            mock_make_clients.return_value = (MagicMock(), AsyncMock())
+
+            await run_pipeline({
+                "api_key": "test-key",
+                "llm_model": "gpt-4o-mini",
+                "tts_voice": "nova",
+                "max_stories": 3,
+            })
+
+            # Only the story missing from the spool is processed
+            assert mock_levels.call_count == 1
+            assert mock_levels.call_args.args[0].id == "222"
+            digest = json.loads(
+                (Path(tmpdir) / "content" / today / "digest.json").read_text()
+            )
+            assert [s["headline_de"] for s in digest["stories"]] == ["Fertig", "Neu"]
+
+    @pytest.mark.asyncio
+    @patch("backend.build.generate_audio_for_story")
+    @patch("backend.build.generate_levels")
+    @patch("backend.build.fetch_stories")
+    @patch("backend.build.make_clients")
+    @patch("backend.build.OUTPUT_DIR")
+    async def test_progressive_publish(
+        self,
+        mock_output_dir,
+        mock_make_clients,
+        mock_fetch,
+        mock_levels,
+        mock_audio,
+    ):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_output_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
+            latest = Path(tmpdir) / "content" / "latest.json"
+            mock_make_clients.return_value = (MagicMock(), AsyncMock())
+            mock_fetch.return_value = [
+                RawStory(
+                    id="111", title="T", link="", full_text="Text.",
+                    published_date=datetime(2026, 2, 23),
+                )
+            ]
+            seen = []
+            callbacks = []
+
+            def levels(raw, client, routes, translate, validate, memory, progress, cancel):
+                callbacks.append(progress)
+                headlines = ProcessedStory(
+                    id="111", headline_de="Schlagzeile", headline_en="Headline",
+                    summary_en="", source_url="", levels={},
+                )
+                progress(headlines)
+                seen.append(json.loads(latest.read_text()))
+                story = replace(headlines, levels={
+                    n: LevelContent(text_de="T", text_en="T") for n in (1, 2, 3)
+                })
+                progress(story)
+                return story
+
+            async def audio(story, *args):
+                seen.append(json.loads(latest.read_text()))
+                return story
+
+            mock_levels.side_effect = levels
+            mock_audio.side_effect = audio
+
+            await run_pipeline({
+                "api_key": "test-key",
+                "llm_model": "gpt-4o-mini",
+                "tts_voice": "nova",
+                "max_stories": 3,
+                "progressive_publish": True,
+            })
+
+            headlines_only, before_audio = seen
+            assert headlines_only["in_progress"] is True
+            assert headlines_only["stories"][0]["headline_en"] == "Headline"
+            assert headlines_only["stories"][0]["levels"]["1"] == {"status": "pending"}
+            assert before_audio["stories"][0]["levels"]["1"]["status"] == "text"
+            final = json.loads(latest.read_text())
+            assert "in_progress" not in final
+            assert "status" not in final["stories"][0]["levels"]["1"]
+
+            # A level thread reporting after the final write changes nothing
+            callbacks[0](replace(story_from_dict(final["stories"][0]), levels={}))
+            assert json.loads(latest.read_text()) == final
+
+    @pytest.mark.asyncio
+    @patch("backend.build.generate_audio_for_story")
+    @patch("backend.build.generate_levels")
+    @patch("backend.build.fetch_stories")
+    @patch("backend.build.make_clients")
+    @patch("backend.build.OUTPUT_DIR")
+    async def test_budget_drops_lowest_priority(
+        self,
+        mock_output_dir,
+        mock_make_clients,
+        mock_fetch,
+        mock_levels,
+        mock_audio,
+    ):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_output_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
+            mock_make_clients.return_value = (MagicMock(), AsyncMock())
+            mock_fetch.return_value = [
+                RawStory(
+                    id=story_id, title="T", link="", full_text="Text. " * 100,
+                    published_date=datetime(2026, 2, 23),
+                )
+                for story_id in ("111", "222")
+            ]
+            mock_levels.return_value = SAMPLE_STORY
+            mock_audio.return_value = SAMPLE_STORY
+
+            await run_pipeline({
+                "api_key": "test-key",
+                "llm_model": "gpt-4o-mini",
+                "tts_voice": "nova",
+                "max_stories": 3,
+                "budget_completion_tokens": 500,
+            })
+
+            assert mock_levels.call_count == 1
+            assert mock_levels.call_args.args[0].id == "111"
+            digest_path = next((Path(tmpdir) / "content").glob("*/digest.json"))
+            budget = json.loads(digest_path.read_text())["budget"]
+            assert budget["limits"]["completion_tokens"] == 500
+            assert budget["decisions"][-1]["story"] == "222"
+            assert budget["decisions"][-1]["action"] == "drop"
+            report = json.loads(next((Path(tmpdir) / "metrics").glob("*.json")).read_text())
+            assert report["budget"] == budget
+
+    @pytest.mark.asyncio
+    @patch("backend.build.fill_translations")
+    @patch("backend.build.generate_audio_for_story")
+    @patch("backend.build.generate_levels")
+    @patch("backend.build.fetch_stories")
+    @patch("backend.build.make_clients")
+    @patch("backend.build.OUTPUT_DIR")
+    async def test_packed_translations(
+        self,
+        mock_output_dir,
+        mock_make_clients,
+        mock_fetch,
+        mock_levels,
+        mock_audio,
+        mock_fill,
+    ):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_output_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
+            mock_make_clients.return_value = (MagicMock(), AsyncMock())
+            mock_fetch.return_value = [
+                RawStory(
+                    id="111",
+                    title="Test",
+                    link="https://dw.com/a-111",
+                    full_text="Langer Text.",
+                    published_date=datetime(2026, 2, 23),
+                )
+            ]
+            untranslated = replace(SAMPLE_STORY, levels={
+                n: replace(c, text_en="") for n, c in SAMPLE_STORY.levels.items()
+            })
+            mock_levels.return_value = untranslated
+            mock_audio.return_value = SAMPLE_STORY
+            mock_fill.return_value = [SAMPLE_STORY]
+
+            await run_pipeline({
+                "api_key": "test-key",
+                "llm_model": "gpt-4o-mini",
+                "tts_voice": "nova",
+                "max_stories": 3,
+                "translation_pack_tokens": 4000,
+            })
+
+            # Levels are generated without per-level translation calls...
+            assert mock_levels.call_args.args[3] is False
+            # ...and translated together afterwards
+            mock_fill.assert_called_once()
+            assert mock_fill.call_args.args[3] == 4000
+            # ...before any audio, which is only made for translated stories
+            mock_audio.assert_called_once()
+            assert mock_audio.call_args.args[0] == SAMPLE_STORY
+            digest_paths = list((Path(tmpdir) / "content").glob("*/digest.json"))
+            assert len(digest_paths) == 1
+
+    @pytest.mark.asyncio
+    @patch("backend.build.seconds_until", return_value=0.5)
+    @patch("backend.build.fill_translations", side_effect=lambda stories, *a: stories)
+    @patch("backend.build.generate_audio_for_story")
+    @patch("backend.build.generate_levels")
+    @patch("backend.build.fetch_stories")
+    @patch("backend.build.make_clients")
+    @patch("backend.build.OUTPUT_DIR")
+    async def test_packed_voicing_is_bounded_and_counted_per_story(
+        self,
+        mock_output_dir,
+        mock_make_clients,
+        mock_fetch,
+        mock_levels,
+        mock_audio,
+        mock_fill,
+        mock_seconds_until,
+    ):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_output_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
+            mock_make_clients.return_value = (MagicMock(), AsyncMock())
+            mock_fetch.return_value = [
+                RawStory(
+                    id=story_id, title=story_id, link="", full_text="Text.",
+                    published_date=datetime(2026, 2, 23),
+                )
+                for story_id in ("fast", "slow")
+            ]
+            mock_levels.side_effect = lambda raw, *args: replace(SAMPLE_STORY, id=raw.id)
+
+            async def audio(story, *args):
+                metrics.record_tts(100)
+                if story.id == "slow":
+                    await asyncio.sleep(10)
+                return story
+
+            mock_audio.side_effect = audio
+
+            await run_pipeline({
+                "api_key": "test-key",
+                "llm_model": "gpt-4o-mini",
+                "tts_voice": "nova",
+                "max_stories": 3,
+                "translation_pack_tokens": 4000,
+                "publish_at": "23:59",
+            })
+
+            today = date.today().isoformat()
+            digest = json.loads((Path(tmpdir) / "content" / today / "digest.json").read_text())
+            assert [s["id"] for s in digest["stories"]] == ["fast"]
+            run = json.loads((Path(tmpdir) / "metrics" / f"{today}.json").read_text())
+            assert run["schedule"]["deferred"] == ["slow"]
+            # TTS spend is attributed to the story that made it
+            assert metrics.story_usage("fast").tts_chars == 100
+
+    @pytest.mark.asyncio
+    @patch("backend.build.seconds_until", return_value=0.2)
+    @patch("backend.build.generate_levels")
+    @patch("backend.build.fetch_stories")
+    @patch("backend.build.make_clients")
+    @patch("backend.build.OUTPUT_DIR")
+    async def test_deadline_stops_level_threads(
+        self, mock_output_dir, mock_make_clients, mock_fetch, mock_levels, _,
+    ):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_output_dir.__truediv__ = lambda self, other: Path(tmpdir) / other
+            mock_make_clients.return_value = (MagicMock(), AsyncMock())
+            mock_fetch.return_value = [
+                RawStory(
+                    id="111", title="T", link="", full_text="Text.",
+                    published_date=datetime(2026, 2, 23),
+                )
+            ]
+            stopped = []
+            returned = threading.Event()
+
+            def levels(raw, *args):
+                cancel = args[-1]
+                stopped.append(cancel.wait(5))
+                returned.set()
+                raise GenerationCancelled(raw.id)
+
+            mock_levels.side_effect = levels
+
+            with pytest.raises(RuntimeError, match="No stories processed"):
+                await run_pipeline({
+                    "api_key": "test-key",
+                    "llm_model": "gpt-4o-mini",
+                    "tts_voice": "nova",
+                    "max_stories": 3,
+                    "publish_at": "23:59",
+                })
+
+            # The level thread saw the deadline instead of running on
+            assert returned.wait(5)
+            assert stopped == [True]
 
     @pytest.mark.asyncio
     @patch("backend.build.fetch_stories")
@@ -0,0 +1,62 @@
+from backend.cefr import is_basic_word, split_sentences, validate_level
+
+GOOD_A1 = (
+    "Heute ist Wahl in Deutschland. Viele Menschen gehen wählen. "
+    "Die Partei will mehr Geld für Schulen. Der Kanzler spricht im Fernsehen. "
+    "Er sagt: Wir brauchen neue Ideen. Die Leute hören zu. "
+    "Morgen gibt es das Ergebnis."
+)
+
+
+class TestIsBasicWord:
+    def test_base_forms_and_inflections(self):
+        assert is_basic_word("gehen")
+        assert is_basic_word("geht")
+        assert is_basic_word("Schulen")
+
+    def test_rare_word(self):
+        assert not is_basic_word("Haushaltskonsolidierung")
+
+
+class TestSplitSentences:
+    def test_splits_on_terminal_punctuation(self):
+        assert split_sentences("Eins. Zwei! Drei?") == ["Eins.", "Zwei!", "Drei?"]
+
+    def test_ordinals_and_abbreviations_dont_split(self):
+        assert split_sentences("Am 3. Oktober ist z. B. frei. Das war 2024. Gut.") == [
+            "Am 3. Oktober ist z. B. frei.", "Das war 2024.", "Gut.",
+        ]
+
+
+class TestValidateLevel:
+    def test_c1_is_unconstrained(self):
+        assert validate_level(3, "Obwohl es regnete, war er, der Kanzler, dort.") == []
+
+    def test_good_a1_passes(self):
+        assert validate_level(1, GOOD_A1) == []
+
+    def test_a1_subordinate_clause(self):
+        problems = validate_level(1, "Er bleibt zu Hause, weil es regnet.")
+        assert any("weil" in p for p in problems)
+
+    def test_a1_relative_clause(self):
+        problems = validate_level(1, "Der Mann, der dort steht, ist alt.")
+        assert any("relative" in p for p in problems)
+
+    def test_a1_past_tense(self):
+        assert any("Präteritum" in p for p in validate_level(1, "Er war müde."))
+        assert any("Perfekt" in p for p in validate_level(1, "Er hat Brot gekauft."))
+
+    def test_a1_long_sentences(self):
+        long = "Der Minister und die Ministerin sprechen heute lange mit vielen Leuten in Berlin. "
+        assert any("sentence length" in p for p in validate_level(1, long * 3))
+
+    def test_a1_rare_vocabulary(self):
+        text = " ".join(
+            ["Haushaltskonsolidierung Infrastrukturprogramm Koalitionsvertrag."] * 12
+        )
+        assert any("basic vocabulary" in p for p in validate_level(1, text))
+
+    def test_b1_forbidden_words(self):
+        problems = validate_level(2, "Trotz des Regens kommen viele Menschen.")
+        assert any("trotz" in p for p in problems)
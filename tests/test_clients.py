@@ -0,0 +1,132 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from openai import OpenAI, RateLimitError
+
+from backend.clients import (
+    AdaptiveLimiter,
+    LimitedTransport,
+    make_clients,
+    parse_duration,
+)
+from tests.fake_openai import FakeOpenAIServer
+
+
+def _quota_headers(remaining: int, limit: int = 100) -> dict:
+    return {
+        "x-ratelimit-limit-requests": str(limit),
+        "x-ratelimit-remaining-requests": str(remaining),
+        "x-ratelimit-reset-requests": "1s",
+    }
+
+
+class TestParseDuration:
+    def test_formats(self):
+        assert parse_duration("2") == 2.0
+        assert parse_duration("1s") == 1.0
+        assert parse_duration("6m0s") == 360.0
+        assert parse_duration("20ms") == pytest.approx(0.02)
+        assert parse_duration("") is None
+        assert parse_duration("soon") is None
+
+
+class TestAdaptiveLimiter:
+    def test_additive_increase_on_healthy_quota(self):
+        limiter = AdaptiveLimiter("t", initial=2, maximum=8)
+        for _ in range(10):
+            limiter.observe(200, httpx.Headers(_quota_headers(90)))
+        assert 3 <= limiter.limit <= 8
+
+    def test_caps_at_maximum(self):
+        limiter = AdaptiveLimiter("t", initial=4, maximum=4)
+        limiter.observe(200, httpx.Headers(_quota_headers(90)))
+        assert limiter.limit == 4
+
+    def test_multiplicative_decrease_on_429(self):
+        limiter = AdaptiveLimiter("t", initial=8)
+        limiter.observe(429, httpx.Headers({"retry-after": "0"}))
+        assert limiter.limit == 4
+        # A second throttled response from the same round doesn't halve again
+        limiter.observe(429, httpx.Headers({}))
+        assert limiter.limit == 4
+
+    def test_decrease_on_low_remaining(self):
+        limiter = AdaptiveLimiter("t", initial=8)
+        limiter.observe(200, httpx.Headers(_quota_headers(5)))
+        assert limiter.limit == 4
+
+    def test_retry_after_blocks_new_requests(self):
+        limiter = AdaptiveLimiter("t", initial=4)
+        limiter.observe(429, httpx.Headers({"retry-after-ms": "60000"}))
+        assert not limiter.try_acquire()
+
+    def test_respects_limit(self):
+        limiter = AdaptiveLimiter("t", initial=2)
+        assert limiter.try_acquire()
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        limiter.release()
+        assert limiter.try_acquire()
+
+
+class TestAgainstStandInServer:
+    def test_concurrency_never_exceeds_limit(self):
+        with FakeOpenAIServer() as server:
+            server.delay = 0.05
+            server.default_headers = _quota_headers(90)
+            limiter = AdaptiveLimiter("llm", initial=2, maximum=2)
+            client = OpenAI(
+                api_key="test",
+                base_url=server.base_url,
+                http_client=httpx.Client(
+                    transport=LimitedTransport(limiter, httpx.HTTPTransport()),
+                ),
+            )
+
+            def call():
+                client.chat.completions.create(
+                    model="gpt-4o-mini", messages=[{"role": "user", "content": "x"}],
+                )
+
+            threads = [threading.Thread(target=call) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            assert len(server.requests) == 8
+            assert server.peak_in_flight <= 2
+            assert limiter.in_flight == 0
+
+    def test_shrinks_on_throttling(self):
+        with FakeOpenAIServer() as server:
+            server.script = [(429, {"retry-after": "0"}, {"error": {"message": "slow down"}})]
+            llm_client, _ = make_clients({
+                "api_key": "test", "base_url": server.base_url,
+            })
+            limiter = llm_client._client._transport.limiter
+            before = limiter.limit
+
+            with pytest.raises(RateLimitError):
+                llm_client.with_options(max_retries=0).chat.completions.create(
+                    model="gpt-4o-mini", messages=[{"role": "user", "content": "x"}],
+                )
+
+            assert limiter.limit == before / 2
+            assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_async_client_releases_after_streamed_body(self):
+        with FakeOpenAIServer() as server:
+            _, tts_client = make_clients({"api_key": "test", "base_url": server.base_url})
+            limiter = tts_client._client._transport.limiter
+
+            responses = await asyncio.gather(*[
+                tts_client.audio.speech.create(model="tts-1", voice="nova", input="Hallo")
+                for _ in range(3)
+            ])
+
+            assert all(r.content.startswith(b"\xff\xfb") for r in responses)
+            assert limiter.in_flight == 0
@@ -0,0 +1,55 @@
+from backend.dedupe import (
+    cluster_stories,
+    dedupe_stories,
+    estimate_similarity,
+    minhash_signature,
+)
+from tests.factories import make_raw_story
+
+BASE = (
+    "Die Bundesregierung hat am Montag ein neues Klimaschutzpaket vorgestellt. "
+    "Der Kanzler sagte in Berlin, Deutschland wolle bis 2045 klimaneutral werden. "
+    "Kritiker aus der Opposition bemängelten, die Maßnahmen gingen nicht weit genug. "
+    "Umweltverbände forderten zusätzliche Investitionen in den Ausbau der Bahn."
+)
+REWRITE = (
+    "Die Bundesregierung hat am Montag ein neues Klimaschutzpaket vorgestellt! "
+    "Der Kanzler sagte in Berlin, Deutschland wolle bis 2045 klimaneutral werden. "
+    "Kritiker aus der Opposition bemängelten, die Maßnahmen gingen nicht weit genug. "
+    "Umweltverbände forderten mehr Investitionen in den Ausbau der Bahn."
+)
+OTHER = (
+    "In Mexiko ist es erneut zu schweren Unwettern gekommen. Mehrere Flüsse traten "
+    "über die Ufer, Tausende Menschen mussten ihre Häuser verlassen. Die Behörden "
+    "riefen in drei Bundesstaaten den Notstand aus."
+)
+
+
+class TestMinHash:
+    def test_signature_is_deterministic(self):
+        assert minhash_signature(BASE) == minhash_signature(BASE)
+
+    def test_similarity_tracks_overlap(self):
+        base = minhash_signature(BASE)
+        assert estimate_similarity(base, minhash_signature(REWRITE)) > 0.5
+        assert estimate_similarity(base, minhash_signature(OTHER)) < 0.2
+
+    def test_ignores_case_and_punctuation(self):
+        assert minhash_signature(BASE) == minhash_signature(BASE.upper().replace(",", ""))
+
+
+class TestClusterStories:
+    def test_groups_near_duplicates(self):
+        stories = [make_raw_story("a", BASE), make_raw_story("b", OTHER), make_raw_story("c", REWRITE)]
+        clusters = cluster_stories(stories)
+        assert [[s.id for s in c] for c in clusters] == [["a", "c"], ["b"]]
+
+    def test_same_id_is_duplicate(self):
+        stories = [make_raw_story("a", BASE), make_raw_story("a", OTHER)]
+        assert len(cluster_stories(stories)) == 1
+
+
+class TestDedupeStories:
+    def test_keeps_earliest_representative(self):
+        stories = [make_raw_story("b", OTHER), make_raw_story("c", REWRITE), make_raw_story("a", BASE)]
+        assert [s.id for s in dedupe_stories(stories)] == ["b", "c"]
@@ -0,0 +1,130 @@
+import json
+import threading
+from unittest.mock import MagicMock
+
+from backend.glossary import Dictionary, build_glossary, extract_vocabulary
+from tests.factories import make_mock_response
+
+GLOSSES = {
+    "Die": ("die", "the"),
+    "Katze": ("die Katze", "cat"),
+    "schläft": ("schlafen", "to sleep"),
+    "schlafen": ("schlafen", "to sleep"),
+    "Der": ("der", "the"),
+    "Hund": ("der Hund", "dog"),
+}
+
+
+def _respond(**kwargs) -> MagicMock:
+    """Gloss whatever forms the prompt asks for."""
+    prompt = kwargs["messages"][1]["content"]
+    forms = json.loads(prompt[prompt.rindex("["):])
+    return make_mock_response({
+        "items": {
+            f: {"lemma": GLOSSES[f][0], "en": GLOSSES[f][1]} for f in forms if f in GLOSSES
+        },
+    })
+
+
+def _requested_forms(client: MagicMock) -> list[list[str]]:
+    requested = []
+    for call in client.chat.completions.create.call_args_list:
+        prompt = call.kwargs["messages"][1]["content"]
+        requested.append(json.loads(prompt[prompt.rindex("["):]))
+    return requested
+
+
+class TestExtractVocabulary:
+    def test_distinct_forms_in_order(self):
+        texts = ["Die Katze schläft.", "Die Katze, 3 Mal: schläft!"]
+        assert extract_vocabulary(texts) == ["Die", "Katze", "schläft", "Mal"]
+
+
+class TestBuildGlossary:
+    def test_one_request_per_story_for_new_forms_only(self, tmp_path):
+        store = tmp_path / "dictionary.json"
+        Dictionary({"Die": "die"}, {"die": "the"}).save(store)
+        client = MagicMock()
+        client.chat.completions.create.side_effect = _respond
+
+        count = build_glossary(
+            {"a": ["Die Katze schläft.", "Die Katze"], "b": ["Der Hund schläft."]},
+            client, "gpt-4o-mini", store, tmp_path / "glossary.json",
+        )
+
+        # "schläft" is new to both stories but only requested once
+        assert sorted(_requested_forms(client)) == [["Der", "Hund"], ["Katze", "schläft"]]
+        assert count == 5
+        shard = Dictionary.load(tmp_path / "glossary.json")
+        assert shard.forms["Hund"] == "der Hund"
+        assert shard.lemmas["schlafen"] == "to sleep"
+        assert Dictionary.load(store).knows("Katze")
+
+    def test_known_words_cost_no_call(self, tmp_path):
+        store = tmp_path / "dictionary.json"
+        client = MagicMock()
+        client.chat.completions.create.side_effect = _respond
+        build_glossary({"a": ["Die Katze schläft."]}, client, "m", store, tmp_path / "1.json")
+
+        build_glossary({"b": ["Die Katze schläft."]}, client, "m", store, tmp_path / "2.json")
+
+        assert client.chat.completions.create.call_count == 1
+        assert len(Dictionary.load(tmp_path / "2.json").forms) == 3
+
+    def test_shard_grows_during_the_day(self, tmp_path):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = _respond
+        shard = tmp_path / "glossary.json"
+        store = tmp_path / "dictionary.json"
+
+        build_glossary({"a": ["Die Katze"]}, client, "m", store, shard)
+        build_glossary({"b": ["Der Hund"]}, client, "m", store, shard)
+
+        assert list(Dictionary.load(shard).forms) == ["Der", "Hund", "Die", "Katze"]
+
+    def test_unglossed_forms_are_retried_next_build(self, tmp_path):
+        store = tmp_path / "dictionary.json"
+        client = MagicMock()
+        client.chat.completions.create.side_effect = _respond
+        build_glossary({"a": ["Katze Unbekannt"]}, client, "m", store, tmp_path / "g.json")
+
+        build_glossary({"a": ["Katze Unbekannt"]}, client, "m", store, tmp_path / "g.json")
+
+        assert _requested_forms(client) == [["Katze", "Unbekannt"], ["Unbekannt"]]
+
+    def test_failed_request_still_writes_shard(self, tmp_path):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = RuntimeError("down")
+
+        count = build_glossary(
+            {"a": ["Die Katze"]}, client, "m", tmp_path / "d.json", tmp_path / "g.json",
+        )
+
+        assert count == 0
+        assert Dictionary.load(tmp_path / "g.json").forms == {}
+
+    def test_concurrent_builds_keep_each_others_words(self, tmp_path):
+        store = tmp_path / "dictionary.json"
+        shard = tmp_path / "glossary.json"
+        # Both stories are glossed before either saves
+        barrier = threading.Barrier(2, timeout=5)
+
+        def respond(**kwargs):
+            barrier.wait()
+            return _respond(**kwargs)
+
+        client = MagicMock()
+        client.chat.completions.create.side_effect = respond
+        threads = [
+            threading.Thread(
+                target=build_glossary, args=({sid: [text]}, client, "m", store, shard),
+            )
+            for sid, text in (("a", "Die Katze"), ("b", "Der Hund"))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert set(Dictionary.load(store).forms) == {"Die", "Katze", "Der", "Hund"}
+        assert set(Dictionary.load(shard).forms) == {"Die", "Katze", "Der", "Hund"}
@@ -1,18 +1,24 @@
-import json
+import threading
 from datetime import datetime
 from unittest.mock import MagicMock, call, patch
 
-from backend.levels import _call_llm, generate_levels
-from backend.models import RawStory
-
-
-def _make_mock_response(content: dict) -> MagicMock:
-    """Create a mock OpenAI chat completion response."""
-    mock_response = MagicMock()
-    mock_response.choices = [MagicMock()]
-    mock_response.choices[0].message.content = json.dumps(content)
-    return mock_response
+import pytest
 
+from backend.levels import (
+    GenerationCancelled,
+    call_llm,
+    call_structured,
+    expects,
+    generate_levels,
+    translate_text,
+)
+from backend.metrics import metrics
+from backend.models import RawStory
+from backend.prompts import LEVEL_PROMPTS, TRANSLATION_PROMPT
+from backend.responses import ResponseError
+from backend.routing import parse_routes
+from backend.translation_memory import TranslationMemory
+from tests.factories import make_mock_response
 
 SAMPLE_STORY = RawStory(
     id="12345",
@@ -26,20 +32,20 @@ SAMPLE_STORY = RawStory(
 class TestCallLlm:
     def test_parses_json_response(self):
         client = MagicMock()
-        client.chat.completions.create.return_value = _make_mock_response(
+        client.chat.completions.create.return_value = make_mock_response(
             {"text_de": "Hallo Welt"}
         )
 
-        result = _call_llm(client, "gpt-4o-mini", "Test prompt")
+        result = call_llm(client, "gpt-4o-mini", "Test prompt")
         assert result == {"text_de": "Hallo Welt"}
 
     def test_passes_system_prompt(self):
         client = MagicMock()
-        client.chat.completions.create.return_value = _make_mock_response(
+        client.chat.completions.create.return_value = make_mock_response(
             {"text_de": "Test"}
         )
 
-        _call_llm(client, "gpt-4o-mini", "User prompt")
+        call_llm(client, "gpt-4o-mini", "User prompt")
 
         call_args = client.chat.completions.create.call_args
         messages = call_args.kwargs["messages"]
@@ -48,6 +54,47 @@ class TestCallLlm:
         assert messages[1]["role"] == "user"
         assert messages[1]["content"] == "User prompt"
 
+    def test_passes_prompt_cache_key_per_task(self):
+        client = MagicMock()
+        client.chat.completions.create.return_value = make_mock_response(
+            {"text_en": "Test"}
+        )
+
+        call_llm(client, "gpt-4o-mini", "Prompt", "translate")
+
+        call_args = client.chat.completions.create.call_args
+        assert call_args.kwargs["prompt_cache_key"].endswith("translate")
+
+    def test_records_cached_tokens(self):
+        client = MagicMock()
+        response = make_mock_response({"text_en": "Test"})
+        response.usage.prompt_tokens = 1500
+        response.usage.prompt_tokens_details.cached_tokens = 1024
+        response.usage.completion_tokens = 40
+        client.chat.completions.create.return_value = response
+        metrics.reset()
+
+        call_llm(client, "gpt-4o-mini", "Prompt", "translate")
+
+        assert metrics.totals().cached_tokens == 1024
+        metrics.reset()
+
+
+class TestPromptPrefixes:
+    def test_variable_content_comes_last(self):
+        """Two calls for the same task share everything up to the variable text."""
+        for template, key in [
+            (LEVEL_PROMPTS[3], "article_text"),
+            (LEVEL_PROMPTS[2], "previous_text"),
+            (LEVEL_PROMPTS[1], "previous_text"),
+            (TRANSLATION_PROMPT, "text_de"),
+        ]:
+            a = template.format(**{key: "ERSTER TEXT"})
+            b = template.format(**{key: "ZWEITER TEXT"})
+            prefix = a.removesuffix("ERSTER TEXT")
+            assert b == prefix + "ZWEITER TEXT"
+            assert "Respond with JSON" in prefix
+
 
 class TestGenerateLevels:
     def test_generates_all_three_levels(self):
@@ -56,19 +103,19 @@ class TestGenerateLevels:
         # Build response sequence: L3(C1), trans3, L2(B1), trans2, L1(A1), trans1
         responses = [
             # Level 3 (C1)
-            _make_mock_response({
+            make_mock_response({
                 "text_de": "Komplexer C1 Text.",
                 "headline_de": "C1 Schlagzeile",
                 "headline_en": "C1 Headline",
                 "summary_en": "A C1 summary.",
             }),
-            _make_mock_response({"text_en": "Complex C1 text."}),
+            make_mock_response({"text_en": "Complex C1 text."}),
             # Level 2 (B1)
-            _make_mock_response({"text_de": "Mittlerer B1 Text."}),
-            _make_mock_response({"text_en": "Medium B1 text."}),
+            make_mock_response({"text_de": "Mittlerer B1 Text."}),
+            make_mock_response({"text_en": "Medium B1 text."}),
             # Level 1 (A1)
-            _make_mock_response({"text_de": "Einfach A1."}),
-            _make_mock_response({"text_en": "Simple A1."}),
+            make_mock_response({"text_de": "Einfach A1."}),
+            make_mock_response({"text_en": "Simple A1."}),
         ]
         client.chat.completions.create.side_effect = responses
 
@@ -98,13 +145,13 @@ class TestGenerateLevels:
         client = MagicMock()
 
         responses = [
-            _make_mock_response({
+            make_mock_response({
                 "text_de": "Text",
                 "headline_de": "H",
                 "headline_en": "H",
                 "summary_en": "S",
             }),
-        ] + [_make_mock_response({"text_de": "T", "text_en": "T"})] * 5
+        ] + [make_mock_response({"text_de": "T", "text_en": "T"})] * 5
 
         client.chat.completions.create.side_effect = responses
 
@@ -116,17 +163,17 @@ class TestGenerateLevels:
         client = MagicMock()
 
         responses = [
-            _make_mock_response({
+            make_mock_response({
                 "text_de": "C1_TEXT",
                 "headline_de": "H",
                 "headline_en": "H",
                 "summary_en": "S",
             }),
-            _make_mock_response({"text_en": "trans"}),
-            _make_mock_response({"text_de": "B1_TEXT"}),
-            _make_mock_response({"text_en": "trans"}),
-            _make_mock_response({"text_de": "A1_TEXT"}),
-            _make_mock_response({"text_en": "trans"}),
+            make_mock_response({"text_en": "trans"}),
+            make_mock_response({"text_de": "B1_TEXT"}),
+            make_mock_response({"text_en": "trans"}),
+            make_mock_response({"text_de": "A1_TEXT"}),
+            make_mock_response({"text_en": "trans"}),
         ]
         client.chat.completions.create.side_effect = responses
 
@@ -145,3 +192,231 @@ class TestGenerateLevels:
         # Call 4: L1 prompt should contain B1_TEXT
         l1_prompt = calls[4].kwargs["messages"][1]["content"]
         assert "B1_TEXT" in l1_prompt
+
+    def test_translate_false_skips_translation_calls(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"text_de": "C1", "headline_de": "H"}),
+            make_mock_response({"text_de": "B1"}),
+            make_mock_response({"text_de": "A1"}),
+        ]
+
+        result = generate_levels(SAMPLE_STORY, client, "gpt-4o-mini", translate=False)
+
+        assert client.chat.completions.create.call_count == 3
+        assert result.levels[1].text_de == "A1"
+        assert all(level.text_en == "" for level in result.levels.values())
+
+    def test_cancel_stops_before_the_next_call(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"text_de": "C1", "headline_de": "H"}),
+            make_mock_response({"text_de": "B1"}),
+        ]
+        cancel = threading.Event()
+
+        with pytest.raises(GenerationCancelled):
+            generate_levels(
+                SAMPLE_STORY, client, "gpt-4o-mini", translate=False,
+                progress=lambda story: story.levels and cancel.set(), cancel=cancel,
+            )
+
+        # C1 was done when the deadline passed; B1 and A1 are never requested
+        assert client.chat.completions.create.call_count == 1
+
+    def test_failing_a1_gets_one_corrective_call(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"text_de": "C1", "headline_de": "H"}),
+            make_mock_response({"text_de": "B1"}),
+            make_mock_response({"text_de": "Er bleibt zu Hause, weil es regnet."}),
+            make_mock_response({"text_de": "Es regnet. Er bleibt zu Hause."}),
+        ]
+
+        result = generate_levels(SAMPLE_STORY, client, "gpt-4o-mini", translate=False)
+
+        calls = client.chat.completions.create.call_args_list
+        assert len(calls) == 4
+        fix_prompt = calls[3].kwargs["messages"][1]["content"]
+        assert "weil" in fix_prompt
+        assert calls[3].kwargs["prompt_cache_key"] == "langsame-nachrichten-correct-a1"
+        assert result.levels[1].text_de == "Es regnet. Er bleibt zu Hause."
+
+    def test_validate_false_skips_checks(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"text_de": "C1", "headline_de": "H"}),
+            make_mock_response({"text_de": "B1"}),
+            make_mock_response({"text_de": "Er bleibt zu Hause, weil es regnet."}),
+        ]
+
+        result = generate_levels(
+            SAMPLE_STORY, client, "gpt-4o-mini", translate=False, validate=False,
+        )
+
+        assert client.chat.completions.create.call_count == 3
+        assert "weil" in result.levels[1].text_de
+
+
+class TestRouting:
+    ROUTES = parse_routes("a1=small>large,translate=nano", "default")
+
+    def test_routes_each_task_to_its_model(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"text_de": "C1", "headline_de": "H"}),
+            make_mock_response({"text_en": "C1 en"}),
+            make_mock_response({"text_de": "B1"}),
+            make_mock_response({"text_en": "B1 en"}),
+            make_mock_response({"text_de": "A1"}),
+            make_mock_response({"text_en": "A1 en"}),
+        ]
+
+        generate_levels(SAMPLE_STORY, client, self.ROUTES, validate=False)
+
+        models = [c.kwargs["model"] for c in client.chat.completions.create.call_args_list]
+        assert models == ["default", "nano", "default", "nano", "small", "nano"]
+
+    def test_escalates_invalid_json(self):
+        metrics.reset()
+        client = MagicMock()
+        broken = make_mock_response({})
+        broken.choices[0].message.content = '{"text_de": "abgebroch'
+        client.chat.completions.create.side_effect = [
+            broken, make_mock_response({"text_de": "Gut."}),
+        ]
+
+        result = call_llm(client, self.ROUTES, "prompt", "a1")
+
+        assert result == {"text_de": "Gut."}
+        models = [c.kwargs["model"] for c in client.chat.completions.create.call_args_list]
+        assert models == ["small", "large"]
+        assert metrics.to_dict()["escalations"] == [
+            {"task": "a1", "from_model": "small", "to_model": "large", "count": 1},
+        ]
+
+    def test_repairs_unusable_reply_once(self):
+        metrics.reset()
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"text": "Falsches Feld."}),
+            make_mock_response({"text_de": "Richtig."}),
+        ]
+
+        result = call_structured(client, "gpt-4o-mini", "prompt", "b1")
+
+        assert result.text_de == "Richtig."
+        first, second = client.chat.completions.create.call_args_list
+        assert first.kwargs["response_format"]["json_schema"]["name"] == "TextResponse"
+        # Follow-up turn on the same conversation, so the prefix stays cached
+        messages = second.kwargs["messages"]
+        assert messages[:2] == first.kwargs["messages"]
+        assert messages[2] == {"role": "assistant", "content": '{"text": "Falsches Feld."}'}
+        assert "missing 'text_de'" in messages[3]["content"]
+        assert metrics.to_dict()["repairs"] == [{"task": "b1", "count": 1}]
+
+    def test_repair_goes_to_escalation_model(self):
+        client = MagicMock()
+        broken = make_mock_response({})
+        broken.choices[0].message.content = '{"text_de": "abgebroch'
+        client.chat.completions.create.side_effect = [
+            broken, make_mock_response({"text_de": "Gut."}),
+        ]
+
+        assert call_structured(client, self.ROUTES, "prompt", "a1").text_de == "Gut."
+        models = [c.kwargs["model"] for c in client.chat.completions.create.call_args_list]
+        assert models == ["small", "large"]
+
+    def test_unrepairable_reply_raises(self):
+        client = MagicMock()
+        client.chat.completions.create.return_value = make_mock_response({})
+
+        with pytest.raises(ResponseError):
+            call_structured(client, "gpt-4o-mini", "prompt", "translate")
+        assert client.chat.completions.create.call_count == 2
+
+    def test_no_escalation_without_route(self):
+        client = MagicMock()
+        client.chat.completions.create.return_value = make_mock_response({})
+
+        result = call_llm(client, self.ROUTES, "prompt", "c1", expects("text_de"))
+
+        assert result == {}
+        assert client.chat.completions.create.call_count == 1
+
+    def test_cefr_correction_uses_escalation_model(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"text_de": "C1", "headline_de": "H"}),
+            make_mock_response({"text_de": "B1"}),
+            make_mock_response({"text_de": "Er bleibt zu Hause, weil es regnet."}),
+            make_mock_response({"text_de": "Es regnet. Er bleibt zu Hause."}),
+        ]
+
+        generate_levels(SAMPLE_STORY, client, self.ROUTES, translate=False)
+
+        models = [c.kwargs["model"] for c in client.chat.completions.create.call_args_list]
+        assert models == ["default", "default", "small", "large"]
+
+
+class TestTranslateWithMemory:
+    def _memory(self) -> TranslationMemory:
+        memory = TranslationMemory()
+        memory.add("Die Regierung plant neue Gesetze.", "The government plans new laws.")
+        return memory
+
+    def test_sends_only_new_sentences(self):
+        client = MagicMock()
+        client.chat.completions.create.return_value = make_mock_response(
+            {"items": {"1": "Parliament votes on Friday."}}
+        )
+        text = "Die Regierung plant neue Gesetze.\n\nDas Parlament stimmt am Freitag ab."
+
+        english = translate_text(client, "gpt-4o-mini", text, self._memory())
+
+        assert english == "The government plans new laws.\n\nParliament votes on Friday."
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert '"1": "Das Parlament stimmt am Freitag ab."' in prompt
+        assert "Regierung" not in prompt
+
+    def test_remembered_text_costs_no_call(self):
+        client = MagicMock()
+        memory = self._memory()
+        memory.add("Das Parlament stimmt am Freitag ab.", "Parliament votes on Friday.")
+
+        english = translate_text(
+            client, "gpt-4o-mini",
+            "Die Regierung plant neue Gesetze. Das Parlament stimmt am Freitag ab.", memory,
+        )
+
+        assert english == "The government plans new laws. Parliament votes on Friday."
+        client.chat.completions.create.assert_not_called()
+
+    def test_new_sentences_are_remembered(self):
+        client = MagicMock()
+        client.chat.completions.create.return_value = make_mock_response(
+            {"items": {"0": "It is raining."}}
+        )
+        memory = TranslationMemory()
+
+        translate_text(client, "gpt-4o-mini", "Es regnet.", memory)
+
+        assert memory.lookup("Es  regnet.") == ("It is raining.", True)
+
+    def test_missing_item_translates_whole_text(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"items": {}}),
+            make_mock_response({"text_en": "Whole text."}),
+        ]
+
+        english = translate_text(
+            client, "gpt-4o-mini", "Neuer Satz. Die Regierung plant neue Gesetze.",
+            self._memory(),
+        )
+
+        assert english == "Whole text."
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert prompt == TRANSLATION_PROMPT.format(
+            text_de="Neuer Satz. Die Regierung plant neue Gesetze."
+        )
@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from backend.metrics import BuildMetrics, StoryUsage, story_scope, usage_counts
+
+
+def _usage(prompt: int, cached: int, completion: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached),
+    )
+
+
+class TestUsageCounts:
+    def test_reads_cached_tokens(self):
+        assert usage_counts(_usage(1200, 1024, 300)) == (1200, 1024, 300)
+
+    def test_missing_usage(self):
+        assert usage_counts(None) == (0, 0, 0)
+        assert usage_counts(SimpleNamespace(prompt_tokens=10)) == (10, 0, 0)
+
+    def test_ignores_non_integer_values(self):
+        assert usage_counts(MagicMock()) == (0, 0, 0)
+
+
+class TestBuildMetrics:
+    def test_accumulates_per_task_and_model(self):
+        m = BuildMetrics()
+        m.record_llm("translate", "gpt-4o-mini", _usage(1200, 0, 300), 1.0)
+        m.record_llm("translate", "gpt-4o-mini", _usage(1200, 1024, 300), 0.5)
+        m.record_llm("c1", "gpt-4o", _usage(2000, 0, 900), 3.0)
+        m.record_tts(4000)
+
+        data = m.to_dict()
+        translate = next(row for row in data["llm"] if row["task"] == "translate")
+        assert translate["calls"] == 2
+        assert translate["cached_tokens"] == 1024
+        assert translate["latency_seconds"] == 1.5
+        assert data["llm_totals"]["prompt_tokens"] == 4400
+        assert data["tts"] == {"requests": 1, "chars": 4000}
+
+    def test_reset(self):
+        m = BuildMetrics()
+        m.record_llm("c1", "gpt-4o-mini", _usage(10, 0, 5), 0.1)
+        m.reset()
+        assert m.to_dict()["llm"] == []
+
+    def test_counts_usage_per_story_across_threads(self):
+        m = BuildMetrics()
+
+        async def story(story_id: str, chars: int) -> None:
+            with story_scope(story_id):
+                await asyncio.to_thread(
+                    m.record_llm, "c1", "gpt-4o-mini", _usage(100, 0, 50), 0.1,
+                )
+                m.record_tts(chars)
+
+        async def run():
+            await asyncio.gather(story("a", 10), story("b", 20))
+
+        asyncio.run(run())
+        m.record_tts(5)  # outside any story
+
+        assert m.story_usage("a") == StoryUsage(100, 50, 10)
+        assert m.story_usage("b") == StoryUsage(100, 50, 20)
+        assert m.story_usage("c") == StoryUsage()
+        assert m.tts_chars == 35
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+from mutagen.mp3 import MP3
+
+from backend import mp3
+from tests.factories import mp3_frame
+
+
+def _info_frame() -> bytes:
+    # Xing/Info tag after 4 header bytes and 9 bytes of mono MPEG-2 side info
+    return mp3_frame(payload=bytes(9) + b"Info")
+
+
+def _id3v2(size: int = 20) -> bytes:
+    return b"ID3\x04\x00\x00" + bytes([0, 0, 0, size]) + bytes(size)
+
+
+class TestParse:
+    def test_counts_audio_frames(self):
+        stream = mp3.parse(mp3_frame() * 10)
+        assert len(stream.frames) == 10
+        # 576 samples per MPEG-2 frame
+        assert stream.duration == pytest.approx(10 * 576 / 22050)
+        assert stream.matches(22050, 48)
+        assert not stream.matches(22050, 64)
+
+    def test_skips_tags_and_header_frame(self):
+        data = _id3v2() + _info_frame() + mp3_frame() * 3 + b"TAG" + bytes(125)
+        stream = mp3.parse(data)
+        assert len(stream.frames) == 3
+        assert stream.frames[0][0] == len(_id3v2()) + len(_info_frame())
+
+    def test_resyncs_past_junk(self):
+        stream = mp3.parse(b"\xff\xfa junk" + mp3_frame() * 2)
+        assert len(stream.frames) == 2
+
+    def test_rejects_non_mp3(self):
+        with pytest.raises(ValueError):
+            mp3.parse(b"not audio at all")
+
+
+class TestSplice:
+    def test_joins_frames_under_one_info_header(self, tmp_path):
+        chunks = [mp3.parse(_info_frame() + mp3_frame() * n) for n in (4, 6)]
+        out = tmp_path / "out.mp3"
+
+        duration = mp3.splice(chunks, out)
+
+        data = out.read_bytes()
+        assert duration == pytest.approx(10 * 576 / 22050)
+        assert b"Info" in data[:64]
+        assert data.count(b"Info") == 1  # chunks' own headers dropped
+        assert mp3.duration(out) == pytest.approx(duration)
+        # Other readers agree, from the Info header's frame count
+        assert MP3(out).info.length == pytest.approx(duration, abs=1e-3)
+
+    def test_mixed_bitrates_get_a_xing_header(self, tmp_path):
+        chunks = [mp3.parse(mp3_frame(48) * 2), mp3.parse(mp3_frame(64) * 2)]
+        out = tmp_path / "out.mp3"
+        mp3.splice(chunks, out)
+        assert b"Xing" in out.read_bytes()[:64]
+
+    def test_mixed_sample_rates_are_refused(self, tmp_path):
+        chunks = [mp3.parse(mp3_frame() * 2), mp3.parse(mp3_frame(sample_rate=24000) * 2)]
+        with pytest.raises(ValueError):
+            mp3.splice(chunks, Path(tmp_path / "out.mp3"))
@@ -0,0 +1,103 @@
+import json
+from unittest.mock import MagicMock
+
+from backend.models import LevelContent, ProcessedStory
+from backend.packing import fill_translations, pack_items, translate_packed
+from tests.factories import make_mock_response, make_processed_story
+
+
+def _story(story_id: str) -> ProcessedStory:
+    return make_processed_story(story_id, {
+        level: LevelContent(text_de=f"Text {story_id} {level}.", text_en="")
+        for level in (1, 2, 3)
+    })
+
+
+class TestPackItems:
+    def test_respects_budget_and_order(self):
+        items = {"a": "x" * 40, "b": "x" * 40, "c": "x" * 40}  # ~11 tokens each
+        packs = pack_items(items, token_budget=25)
+        assert packs == [{"a": items["a"], "b": items["b"]}, {"c": items["c"]}]
+
+    def test_oversized_item_gets_own_pack(self):
+        items = {"a": "x" * 400, "b": "kurz"}
+        packs = pack_items(items, token_budget=10)
+        assert [list(p) for p in packs] == [["a"], ["b"]]
+
+
+class TestTranslatePacked:
+    def test_one_request_for_all_items(self):
+        client = MagicMock()
+        client.chat.completions.create.return_value = make_mock_response(
+            {"items": {"a": "One.", "b": "Two."}}
+        )
+
+        result = translate_packed(client, "gpt-4o-mini", {"a": "Eins.", "b": "Zwei."}, 1000)
+
+        assert result == {"a": "One.", "b": "Two."}
+        assert client.chat.completions.create.call_count == 1
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert prompt.rstrip().endswith("}")
+        assert '"a": "Eins."' in prompt
+
+    def test_missing_item_falls_back_to_single_call(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"items": {"a": "One.", "b": ""}}),
+            make_mock_response({"text_en": "Two."}),
+        ]
+
+        result = translate_packed(client, "gpt-4o-mini", {"a": "Eins.", "b": "Zwei."}, 1000)
+
+        assert result == {"a": "One.", "b": "Two."}
+        fallback_prompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert fallback_prompt.endswith("Zwei.")
+
+    def test_failed_pack_falls_back_per_item(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"wrong": "shape"}),
+            make_mock_response({"text_en": "One."}),
+            Exception("API error"),
+        ]
+
+        result = translate_packed(client, "gpt-4o-mini", {"a": "Eins.", "b": "Zwei."}, 1000)
+
+        assert result == {"a": "One."}
+
+
+class TestFillTranslations:
+    def test_fills_all_levels_across_stories(self):
+        client = MagicMock()
+
+        def create(**kwargs):
+            prompt = kwargs["messages"][1]["content"]
+            items = json.loads(prompt.split("GERMAN TEXTS:\n")[1])
+            return make_mock_response(
+                {"items": {k: v.replace("Text", "EN") for k, v in items.items()}}
+            )
+
+        client.chat.completions.create.side_effect = create
+
+        stories = fill_translations(
+            [_story("111"), _story("222")], client, "gpt-4o-mini", token_budget=4000,
+        )
+
+        assert client.chat.completions.create.call_count == 1
+        assert len(stories) == 2
+        assert stories[1].levels[3].text_en == "EN 222 3."
+
+    def test_drops_story_with_missing_translation(self):
+        client = MagicMock()
+        client.chat.completions.create.side_effect = [
+            make_mock_response({"items": {
+                "111:3": "a", "111:2": "b", "111:1": "c", "222:3": "d", "222:2": "e",
+            }}),
+            Exception("API error"),
+        ]
+
+        stories = fill_translations(
+            [_story("111"), _story("222")], client, "gpt-4o-mini", token_budget=4000,
+        )
+
+        assert [s.id for s in stories] == ["111"]
@@ -0,0 +1,60 @@
+import json
+
+from backend.progressive import ProgressivePublisher, with_status
+
+
+def _story(story_id: str, levels: dict) -> dict:
+    return {
+        "id": story_id, "headline_de": "H", "headline_en": "H", "summary_en": "",
+        "source_url": "", "levels": levels,
+    }
+
+
+class TestWithStatus:
+    def test_marks_pending_and_text_levels(self):
+        story = with_status(_story("1", {
+            "3": {"text_de": "C1", "text_en": "", "audio_url": "a.mp3"},
+            "2": {"text_de": "B1", "text_en": "", "audio_url": None},
+        }))
+
+        assert story["levels"]["1"] == {"status": "pending"}
+        assert story["levels"]["2"]["status"] == "text"
+        assert "status" not in story["levels"]["3"]
+
+
+class TestProgressivePublisher:
+    def test_republishes_in_feed_order(self, tmp_path):
+        content_dir = tmp_path / "2026-02-23"
+        publisher = ProgressivePublisher(
+            {"schema_version": 1, "date": "2026-02-23"}, content_dir, ["a", "b"],
+        )
+
+        publisher.update(_story("b", {}))
+        publisher.update(_story("a", {"1": {"text_de": "A1"}}), done=True)
+
+        digest = json.loads((tmp_path / "latest.json").read_text())
+        assert digest["in_progress"] is True
+        assert [s["id"] for s in digest["stories"]] == ["a", "b"]
+        assert digest["stories"][0]["levels"] == {"1": {"text_de": "A1"}}
+        assert digest["stories"][1]["levels"]["3"] == {"status": "pending"}
+        assert json.loads((content_dir / "digest.json").read_text()) == digest
+
+        publisher.discard("b")
+        digest = json.loads((tmp_path / "latest.json").read_text())
+        assert [s["id"] for s in digest["stories"]] == ["a"]
+
+    def test_ignores_updates_after_discard_and_close(self, tmp_path):
+        content_dir = tmp_path / "2026-02-23"
+        publisher = ProgressivePublisher({"schema_version": 1}, content_dir, ["a", "b"])
+        publisher.update(_story("a", {}))
+        publisher.discard("a")
+
+        # A level thread of the cancelled story reports late
+        publisher.update(_story("a", {"3": {"text_de": "C1"}}))
+        digest = json.loads((tmp_path / "latest.json").read_text())
+        assert digest["stories"] == []
+
+        publisher.close()
+        publisher.update(_story("b", {}), done=True)
+        publisher.discard("a")
+        assert json.loads((tmp_path / "latest.json").read_text()) == digest
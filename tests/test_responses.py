@@ -0,0 +1,58 @@
+import pytest
+
+from backend.responses import (
+    LevelResponse,
+    ResponseError,
+    TextResponse,
+    json_schema,
+    parse,
+    response_for,
+    response_format,
+)
+
+
+class TestSchema:
+    def test_strict_schema_from_fields(self):
+        assert json_schema(LevelResponse) == {
+            "type": "object",
+            "properties": {
+                "text_de": {"type": "string"},
+                "headline_de": {"type": "string"},
+                "headline_en": {"type": "string"},
+                "summary_en": {"type": "string"},
+            },
+            "required": ["text_de", "headline_de", "headline_en", "summary_en"],
+            "additionalProperties": False,
+        }
+        fmt = response_format(TextResponse)
+        assert fmt["type"] == "json_schema"
+        assert fmt["json_schema"]["strict"] is True
+
+    def test_tasks_map_to_models(self):
+        assert response_for("c1") is LevelResponse
+        assert response_for("correct-a1") is TextResponse
+        assert response_for("glossary") is None
+
+
+class TestParse:
+    def test_typed_result(self):
+        result = parse(LevelResponse, '{"text_de": " Text. ", "headline_de": "H"}')
+        assert result == LevelResponse(text_de="Text.", headline_de="H")
+
+    def test_tolerates_fence_and_wrapper(self):
+        assert parse(TextResponse, '```json\n{"result": {"text_de": "Text."}}\n```') == (
+            TextResponse("Text.")
+        )
+
+    @pytest.mark.parametrize("content, problem", [
+        ('{"text_de": "abgebroch', "invalid JSON"),
+        ('{"text_en": "Text."}', "missing 'text_de'"),
+        ('{"text_de": "  "}', "empty 'text_de'"),
+        ('{"text_de": ["Satz."]}', "'text_de' is not a string"),
+        ('["Text."]', "expected a JSON object"),
+        ("", "empty reply"),
+    ])
+    def test_lists_problems(self, content, problem):
+        with pytest.raises(ResponseError) as e:
+            parse(TextResponse, content)
+        assert problem in str(e.value)
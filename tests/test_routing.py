@@ -0,0 +1,36 @@
+import pytest
+
+from backend.routing import ModelRoutes, Route, as_routes, parse_routes
+
+
+class TestParseRoutes:
+    def test_primary_and_escalation(self):
+        routes = parse_routes(" a1=mini>big , translate=nano ", "default")
+        assert routes.for_task("a1") == Route("mini", "big")
+        assert routes.for_task("translate") == Route("nano")
+        assert routes.for_task("c1") == Route("default")
+
+    def test_empty_routes_everything_to_default(self):
+        routes = parse_routes("", "gpt-4o-mini")
+        assert routes.for_task("b1") == Route("gpt-4o-mini")
+        assert routes.for_task(None) == Route("gpt-4o-mini")
+
+    @pytest.mark.parametrize("spec", ["a1", "a1=", "x1=mini", "a1=>big"])
+    def test_rejects_bad_specs(self, spec):
+        with pytest.raises(ValueError):
+            parse_routes(spec, "default")
+
+
+class TestModelRoutes:
+    def test_derived_tasks_use_base_route(self):
+        routes = ModelRoutes(
+            Route("default"), {"b1": Route("mini", "big"), "translate": Route("nano")},
+        )
+        assert routes.for_task("correct-b1") == Route("mini", "big")
+        assert routes.for_task("translate-packed") == Route("nano")
+        assert routes.for_task("correct-a1") == Route("default")
+
+    def test_as_routes(self):
+        assert as_routes("gpt-4o").for_task("a1") == Route("gpt-4o")
+        routes = parse_routes("a1=x", "y")
+        assert as_routes(routes) is routes
@@ -0,0 +1,108 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.models import RawStory
+from backend.scheduler import (
+    CostModel,
+    load_cost_model,
+    plan,
+    projected_makespan,
+    seconds_until,
+)
+from tests.factories import make_raw_story
+
+
+def _story(story_id: str, chars: int) -> RawStory:
+    return make_raw_story(story_id, "x" * chars)
+
+
+class TestCostModel:
+    def test_longer_articles_cost_more(self):
+        model = CostModel()
+        assert model.estimate_seconds(_story("a", 8000)) > model.estimate_seconds(
+            _story("b", 2000)
+        )
+
+    def test_learns_ratios_from_history(self, tmp_path):
+        data = {
+            "llm": [
+                {"task": "c1", "model": "m", "prompt_tokens": 1200,
+                 "completion_tokens": 500, "latency_seconds": 10.0},
+                {"task": "a1", "model": "m", "completion_tokens": 100,
+                 "latency_seconds": 4.0},
+                {"task": "correct-a1", "model": "m", "completion_tokens": 999,
+                 "latency_seconds": 1.0},
+            ],
+            "sources": {"stories": 1, "tokens": 1000},
+        }
+        (tmp_path / "2026-02-22.json").write_text(json.dumps(data))
+
+        model = load_cost_model(tmp_path)
+
+        assert model.output_ratios["c1"] == 0.5
+        assert model.output_ratios["a1"] == 0.1
+        assert model.seconds_per_token["a1"] == pytest.approx(0.04)
+        # No history for b1: default kept
+        assert model.output_ratios["b1"] == 0.6
+        assert model.prompt_ratios["c1"] == 1.2
+        assert model.prompt_ratios["b1"] == CostModel().prompt_ratios["b1"]
+
+    def test_no_history_uses_defaults(self, tmp_path):
+        assert load_cost_model(tmp_path) == CostModel()
+
+
+class TestProjectedMakespan:
+    def test_parallel_slots(self):
+        assert projected_makespan([5, 4, 3, 3], slots=2) == 8
+        assert projected_makespan([5, 4, 3, 3], slots=4) == 5
+        assert projected_makespan([], slots=2) == 0
+
+
+class TestPlan:
+    def test_longest_first(self):
+        stories = [_story("short", 1000), _story("long", 9000), _story("mid", 4000)]
+        schedule = plan(stories, CostModel())
+        assert [s.id for s in schedule.order] == ["long", "mid", "short"]
+        assert schedule.deferred == []
+
+    def test_defers_lowest_priority_to_fit_budget(self):
+        model = CostModel()
+        stories = [_story(f"s{i}", 4000) for i in range(4)]
+        one = model.estimate_seconds(stories[0])
+
+        schedule = plan(stories, model, slots=2, budget_seconds=one * 1.5)
+
+        assert [s.id for s in schedule.order] == ["s0", "s1"]
+        assert [s.id for s in schedule.deferred] == ["s2", "s3"]
+        assert schedule.projected_seconds == pytest.approx(one)
+
+    def test_skips_stories_whose_removal_does_not_help(self):
+        model = CostModel()
+        stories = [_story("top", 20000), _story("small", 1000)]
+        budget = model.estimate_seconds(stories[1]) * 2
+
+        schedule = plan(stories, model, budget_seconds=budget)
+
+        # Running everything at once, only the long story sets the finish time
+        assert [s.id for s in schedule.deferred] == ["top"]
+        assert [s.id for s in schedule.order] == ["small"]
+
+    def test_keeps_at_least_one_story(self):
+        schedule = plan([_story("a", 9000)], CostModel(), budget_seconds=1)
+        assert [s.id for s in schedule.order] == ["a"]
+
+
+class TestSecondsUntil:
+    def test_before_publish_time(self):
+        now = datetime(2026, 2, 23, 5, 0)
+        assert seconds_until("06:30", margin=60, now=now) == 90 * 60 - 60
+
+    def test_past_time_means_tomorrow(self):
+        now = datetime(2026, 2, 23, 23, 0)
+        assert seconds_until("06:00", now=now) == 7 * 3600
+
+    def test_within_margin_is_late(self):
+        now = datetime(2026, 2, 23, 5, 59)
+        assert seconds_until("06:00", margin=120, now=now) is None
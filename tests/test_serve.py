@@ -0,0 +1,136 @@
+import gzip
+import http.client
+import socket
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from backend.serve import (
+    IMMUTABLE,
+    REVALIDATE,
+    SENDFILE_MIN_BYTES,
+    make_server,
+    parse_range,
+)
+
+
+@pytest.fixture
+def server(tmp_path):
+    site = tmp_path / "site"
+    content = tmp_path / "output" / "content"
+    (site / "assets").mkdir(parents=True)
+    (content / "2026-01-15" / "s1").mkdir(parents=True)
+    (site / "index.html").write_text("<h1>Nachrichten</h1>")
+    (site / "assets" / "app.3f9a1c2e7b.js").write_text("console.log(1)")
+    (content / "latest.json").write_text('{"date": "2026-01-15"}')
+    (content / "latest.json.gz").write_bytes(gzip.compress(b'{"date": "2026-01-15"}'))
+    (content / "2026-01-15" / "s1" / "level-1.mp3").write_bytes(bytes(range(256)) * 1024)
+    (tmp_path / "secret.txt").write_text("nope")
+
+    srv = make_server(site, content, port=0)
+    thread = threading.Thread(
+        target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True,
+    )
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def get(server, path, headers=None, method="GET"):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    conn.request(method, path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+class TestParseRange:
+    def test_forms(self):
+        assert parse_range("bytes=0-99", 1000) == (0, 99)
+        assert parse_range("bytes=900-", 1000) == (900, 999)
+        assert parse_range("bytes=-100", 1000) == (900, 999)
+        assert parse_range("bytes=990-2000", 1000) == (990, 999)
+
+    def test_ignored_and_unsatisfiable(self):
+        assert parse_range("bytes=0-1,5-6", 1000) is None
+        assert parse_range("items=0-1", 1000) is None
+        with pytest.raises(ValueError):
+            parse_range("bytes=1000-", 1000)
+
+
+class TestServer:
+    def test_serves_site_and_content(self, server):
+        response, body = get(server, "/")
+        assert response.status == 200
+        assert body == b"<h1>Nachrichten</h1>"
+
+        response, body = get(server, "/content/latest.json")
+        assert response.status == 200
+        assert response.getheader("Content-Type") == "application/json"
+        assert response.getheader("Cache-Control") == REVALIDATE
+        assert body == b'{"date": "2026-01-15"}'
+
+    def test_range_request(self, server):
+        url = "/content/2026-01-15/s1/level-1.mp3"
+        response, body = get(server, url, {"Range": "bytes=256-511"})
+        assert response.status == 206
+        assert response.getheader("Content-Range") == "bytes 256-511/262144"
+        assert response.getheader("Content-Type") == "audio/mpeg"
+        assert body == bytes(range(256))
+
+        response, _ = get(server, url, {"Range": "bytes=999999-"})
+        assert response.status == 416
+        assert response.getheader("Content-Range") == "bytes */262144"
+
+    def test_large_file_uses_sendfile(self, server):
+        original = socket.socket.sendfile
+        calls = []
+
+        def spy(sock, file, offset=0, count=None):
+            calls.append((offset, count))
+            return original(sock, file, offset, count)
+
+        with patch("socket.socket.sendfile", spy):
+            response, body = get(server, "/content/2026-01-15/s1/level-1.mp3")
+
+        assert response.status == 200
+        assert body == bytes(range(256)) * 1024
+        assert calls == [(0, 262144)]
+        assert 262144 >= SENDFILE_MIN_BYTES
+
+    def test_precompressed_sibling(self, server):
+        response, body = get(
+            server, "/content/latest.json", {"Accept-Encoding": "br;q=0, gzip"},
+        )
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert response.getheader("Vary") == "Accept-Encoding"
+        assert gzip.decompress(body) == b'{"date": "2026-01-15"}'
+
+        response, body = get(server, "/content/latest.json")
+        assert response.getheader("Content-Encoding") is None
+        assert body == b'{"date": "2026-01-15"}'
+
+    def test_hashed_assets_are_immutable(self, server):
+        response, _ = get(server, "/assets/app.3f9a1c2e7b.js")
+        assert response.getheader("Cache-Control") == IMMUTABLE
+
+    def test_revalidation(self, server):
+        response, _ = get(server, "/index.html")
+        etag = response.getheader("ETag")
+
+        response, body = get(server, "/index.html", {"If-None-Match": etag})
+        assert response.status == 304
+        assert body == b""
+
+    def test_head_and_missing(self, server):
+        response, body = get(server, "/index.html", method="HEAD")
+        assert response.status == 200
+        assert response.getheader("Content-Length") == "20"
+        assert body == b""
+
+        assert get(server, "/nope.html")[0].status == 404
+        assert get(server, "/../secret.txt")[0].status == 404
+        assert get(server, "/content/%2e%2e/%2e%2e/secret.txt")[0].status == 404
@@ -5,7 +5,13 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from backend.models import RawStory
-from backend.sources import fetch_article_text, fetch_stories, parse_rss_entry
+from backend.sources import (
+    entry_text,
+    fetch_article_text,
+    fetch_stories,
+    is_dw_feed,
+    parse_rss_entry,
+)
 
 
 class TestParseRssEntry:
@@ -143,3 +149,99 @@ class TestFetchStories:
 
         stories = fetch_stories(max_stories=3)
         assert len(stories) == 3
+
+
+class TestEntryText:
+    def test_strips_markup(self):
+        entry = {"summary": "<p>Erster &amp; zweiter</p>\n<p>Absatz.</p>"}
+        assert entry_text(entry) == "Erster & zweiter Absatz."
+
+    def test_prefers_full_content(self):
+        entry = {"summary": "Kurz.", "content": [{"value": "<div>Lang.</div>"}]}
+        assert entry_text(entry) == "Lang."
+
+
+class TestIsDwFeed:
+    def test_dw_hosts(self):
+        assert is_dw_feed("https://rss.dw.com/xml/rss-de-all")
+        assert is_dw_feed("https://dw.com/feed")
+
+    def test_lookalike_hosts(self):
+        assert not is_dw_feed("https://notdw.com/feed")
+        assert not is_dw_feed("https://dw.com.example.org/feed")
+
+
+class TestMultiFeed:
+    @patch("backend.sources.fetch_article_text")
+    @patch("backend.sources.fetch_rss_entries")
+    def test_interleaves_feeds_and_dedupes(self, mock_rss, mock_api):
+        text = (
+            "Die Bundesregierung hat am Montag ein neues Klimaschutzpaket "
+            "vorgestellt. Kritiker sagen, es gehe nicht weit genug."
+        )
+
+        def entries(max_entries, feed_url):
+            if "dw.com" in feed_url:
+                return [
+                    {"id": "111", "title": "Klima", "link": "https://dw.com/a-111"},
+                    {"id": "222", "title": "Sport", "link": "https://dw.com/a-222"},
+                ]
+            return [{
+                "id": "https://other.de/klima",
+                "title": "Klima",
+                "link": "https://other.de/klima",
+                "summary": f"<p>{text}</p>",
+            }]
+
+        mock_rss.side_effect = entries
+        mock_api.side_effect = lambda article_id: (
+            text if article_id == "111" else "Fußball am Wochenende, alle Ergebnisse."
+        )
+
+        stories = fetch_stories(
+            max_stories=5,
+            feeds=["https://rss.dw.com/xml/rss-de-all", "https://other.de/rss"],
+            dedupe_threshold=0.5,
+        )
+
+        # Round-robin would give 111, other, 222; the other outlet's copy of
+        # the climate story is a near-duplicate of 111 and is dropped
+        assert [s.id for s in stories] == ["111", "222"]
+        mock_api.assert_any_call("111")
+
+    @patch("backend.sources.fetch_rss_entries")
+    def test_drops_near_duplicates_of_published_stories(self, mock_rss):
+        text = (
+            "Die Bundesregierung hat am Montag ein neues Klimaschutzpaket "
+            "vorgestellt. Kritiker sagen, es gehe nicht weit genug."
+        )
+        mock_rss.return_value = [
+            {
+                "id": "https://other.de/klima",
+                "title": "Klima",
+                "link": "https://other.de/klima",
+                "summary": f"<p>{text}</p>",
+            },
+            {
+                "id": "https://other.de/sport",
+                "title": "Sport",
+                "link": "https://other.de/sport",
+                "summary": "<p>Fußball am Wochenende, alle Ergebnisse.</p>",
+            },
+        ]
+        published = RawStory(
+            id="111", title="Klima", link="https://dw.com/a-111",
+            full_text=text, published_date=datetime(2026, 2, 23, 8),
+        )
+
+        stories = fetch_stories(
+            max_stories=5, feeds=["https://other.de/rss"], dedupe_threshold=0.5,
+            skip_ids={"111"}, published=[published],
+        )
+
+        assert [s.title for s in stories] == ["Sport"]
+
+    @patch("backend.sources.fetch_rss_entries")
+    def test_failed_feed_is_skipped(self, mock_rss):
+        mock_rss.side_effect = RuntimeError("feed down")
+        assert fetch_stories(max_stories=3, feeds=["https://other.de/rss"]) == []
@@ -0,0 +1,74 @@
+import json
+
+from backend.build import build_digest, story_to_dict, write_digest
+from backend.models import LevelContent, ProcessedStory
+from backend.spool import StorySpool, write_digest_streaming
+
+
+def _story(story_id: str, duration: float | None = 12.5) -> dict:
+    return story_to_dict(ProcessedStory(
+        id=story_id,
+        headline_de=f"Schlagzeile {story_id} – Straße",
+        headline_en=f"Headline {story_id}",
+        summary_en="Summary.",
+        source_url=f"https://dw.com/a-{story_id}",
+        levels={
+            1: LevelContent(
+                text_de="Zeile\nmit \"Zitat\".", text_en="Line.",
+                audio_url=f"content/{story_id}/level-1.mp3" if duration else None,
+                audio_duration_seconds=duration,
+            ),
+            3: LevelContent(text_de="C1.", text_en="C1."),
+        },
+    ))
+
+
+class TestStorySpool:
+    def test_appends_and_reads_back_in_requested_order(self, tmp_path):
+        spool = StorySpool(tmp_path / "spool.ndjson")
+        for story_id in ("b", "a", "c"):
+            spool.append(_story(story_id))
+
+        assert spool.ids() == {"a", "b", "c"}
+        ordered = [s["id"] for s in spool.stories(order=["a", "b", "x"])]
+        assert ordered == ["a", "b", "c"]
+
+    def test_drops_torn_final_line(self, tmp_path):
+        path = tmp_path / "spool.ndjson"
+        StorySpool(path).append(_story("a"))
+        with open(path, "a") as f:
+            f.write('{"id": "b", "headl')
+
+        spool = StorySpool(path)
+        spool.append(_story("c"))
+
+        assert [s["id"] for s in spool.stories()] == ["a", "c"]
+
+
+class TestWriteDigestStreaming:
+    def test_output_matches_write_digest(self, tmp_path):
+        stories = [_story("1"), _story("2", duration=None)]
+        expected_dir = tmp_path / "expected" / "2026-02-23"
+        write_digest({**build_digest([], "2026-02-23"), "stories": stories}, expected_dir)
+
+        content_dir = tmp_path / "streamed" / "2026-02-23"
+        summaries = write_digest_streaming(
+            build_digest([], "2026-02-23"), iter(stories), content_dir,
+        )
+
+        assert (content_dir / "digest.json").read_text() == (
+            expected_dir / "digest.json"
+        ).read_text()
+        assert (content_dir.parent / "latest.json").read_text() == (
+            content_dir / "digest.json"
+        ).read_text()
+        assert [s["levels"]["1"]["audio_duration_seconds"] for s in summaries] == [
+            12.5, None,
+        ]
+        index = json.loads((content_dir.parent / "archive" / "index.json").read_text())
+        assert index["recent"][0]["stories"][1]["id"] == "2"
+
+    def test_empty_digest_is_valid_json(self, tmp_path):
+        write_digest_streaming(build_digest([], "2026-02-23"), [], tmp_path / "d")
+        digest = json.loads((tmp_path / "d" / "digest.json").read_text())
+        assert digest["stories"] == []
@@ -0,0 +1,269 @@
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.models import RawStory
+from backend.routing import parse_routes
+from backend.streaming import SentenceExtractor, generate_levels_streaming
+from tests.factories import make_mock_response
+
+
+def _pieces(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _stream(content: dict, size: int = 7) -> list[MagicMock]:
+    """Chat completion stream chunks delivering content in small deltas."""
+    chunks = []
+    for piece in _pieces(json.dumps(content), size):
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = piece
+        chunks.append(chunk)
+    return chunks
+
+
+SAMPLE_STORY = RawStory(
+    id="12345",
+    title="Test Schlagzeile",
+    link="https://dw.com/a-12345",
+    full_text="Ein langer Nachrichtentext über deutsche Politik.",
+    published_date=datetime(2026, 2, 23),
+)
+
+
+class TestSentenceExtractor:
+    def _extract(self, document: str, size: int) -> list[str]:
+        extractor = SentenceExtractor()
+        sentences = []
+        for piece in _pieces(document, size):
+            sentences.extend(extractor.feed(piece))
+        assert extractor.done
+        return sentences
+
+    def test_yields_sentences_before_value_ends(self):
+        extractor = SentenceExtractor()
+        assert extractor.feed('{"text_de": "Erster Satz. Zwei') == ["Erster Satz."]
+        assert extractor.feed('ter Satz! Dritter') == ["Zweiter Satz!"]
+        assert extractor.feed(' Satz.", "headline_de": "H. X."}') == ["Dritter Satz."]
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 5, 11])
+    def test_decodes_escapes_across_delta_boundaries(self, size):
+        text = 'Er sagte "Grüße aus Köln" gestern. Neue Zeile\nhier. Emoji 🎉 ok.'
+        document = json.dumps({"text_de": text, "headline_de": "Nicht. Das."})
+        sentences = self._extract(document, size)
+        assert sentences == [
+            'Er sagte "Grüße aus Köln" gestern.',
+            "Neue Zeile\nhier.",
+            "Emoji 🎉 ok.",
+        ]
+
+    def test_unicode_escapes(self):
+        document = json.dumps({"text_de": "Straße ist groß. Ende."}, ensure_ascii=True)
+        assert self._extract(document, 4) == ["Straße ist groß.", "Ende."]
+
+    @pytest.mark.parametrize("size", [1, 4, 9])
+    def test_ordinals_and_abbreviations_dont_end_sentences(self, size):
+        text = "Am 3. Oktober kam z. B. der Kanzler. Dann ging er."
+        document = json.dumps({"text_de": text})
+        assert self._extract(document, size) == [
+            "Am 3. Oktober kam z. B. der Kanzler.", "Dann ging er.",
+        ]
+
+    def test_ignores_other_fields_before_target(self):
+        document = json.dumps({"headline_de": "Satz. Satz.", "text_de": "Nur das."})
+        assert self._extract(document, 3) == ["Nur das."]
+
+
+class TestGenerateLevelsStreaming:
+    @pytest.mark.asyncio
+    @patch("backend.streaming.get_mp3_duration", return_value=8.0)
+    @patch("backend.streaming.assemble_audio")
+    @patch("backend.streaming.generate_tts_chunk", new_callable=AsyncMock)
+    async def test_streams_all_levels(self, mock_tts, mock_assemble, _):
+        c1 = {
+            "text_de": "Komplexer erster Satz. Komplexer zweiter Satz.",
+            "headline_de": "C1 Schlagzeile",
+            "headline_en": "C1 Headline",
+            "summary_en": "A summary.",
+        }
+        llm = MagicMock()
+
+        def create(**kwargs):
+            prompt = kwargs["messages"][1]["content"]
+            if kwargs.get("stream"):
+                if SAMPLE_STORY.full_text in prompt:
+                    return _stream(c1)
+                if "Komplexer" in prompt:
+                    return _stream({"text_de": "Mittlerer Satz."})
+                return _stream({"text_de": "Einfach."})
+            return make_mock_response({"text_en": "English."})
+
+        llm.chat.completions.create.side_effect = create
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = Path(tmpdir) / "output" / "content" / "2026-02-23"
+            with patch("backend.streaming.STREAM_MIN_CHARS", 1):
+                story = await generate_levels_streaming(
+                    SAMPLE_STORY, llm, AsyncMock(), "gpt-4o-mini", "nova", output_dir,
+                    validate=False,
+                )
+
+        assert story.headline_de == "C1 Schlagzeile"
+        assert story.summary_en == "A summary."
+        assert story.levels[3].text_de == c1["text_de"]
+        assert story.levels[2].text_de == "Mittlerer Satz."
+        assert story.levels[1].text_de == "Einfach."
+        assert all(level.text_en == "English." for level in story.levels.values())
+        assert story.levels[1].audio_url == "content/2026-02-23/12345/level-1.mp3"
+        assert story.levels[3].audio_duration_seconds == 8.0
+
+        # Each sentence went to TTS on its own; one assembled MP3 per level
+        spoken = [c.args[2] for c in mock_tts.call_args_list]
+        assert sorted(spoken) == sorted([
+            "Komplexer erster Satz.", "Komplexer zweiter Satz.",
+            "Mittlerer Satz.", "Einfach.",
+        ])
+        assert mock_assemble.call_count == 3
+
+    @pytest.mark.asyncio
+    @patch("backend.streaming.enforce_level", return_value="Korrigiert.")
+    @patch("backend.streaming.generate_level_audio", new_callable=AsyncMock)
+    @patch("backend.streaming.get_mp3_duration", return_value=8.0)
+    @patch("backend.streaming.assemble_audio")
+    @patch("backend.streaming.generate_tts_chunk", new_callable=AsyncMock)
+    async def test_validated_levels_are_voiced_once(
+        self, mock_tts, mock_assemble, _, mock_level_audio, mock_enforce,
+    ):
+        llm = MagicMock()
+
+        def create(**kwargs):
+            if kwargs.get("stream"):
+                return _stream({"text_de": "Komplexer Satz.", "headline_de": "H"})
+            if "text_en" in kwargs["messages"][1]["content"]:
+                return make_mock_response({"text_en": "English."})
+            return make_mock_response({"text_de": "Unkorrigiert."})
+
+        llm.chat.completions.create.side_effect = create
+        mock_level_audio.side_effect = lambda *args: (str(args[3]), 4.0, ())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = Path(tmpdir) / "output" / "content" / "2026-02-23"
+            story = await generate_levels_streaming(
+                SAMPLE_STORY, llm, AsyncMock(), "gpt-4o-mini", "nova", output_dir,
+            )
+
+        # Only C1 is streamed to TTS; B1 and A1 are voiced from corrected text
+        assert [c.args[2] for c in mock_tts.call_args_list] == ["Komplexer Satz."]
+        assert [c.args[2] for c in mock_level_audio.call_args_list] == [
+            "Korrigiert.", "Korrigiert.",
+        ]
+        assert [c.args[3] for c in mock_enforce.call_args_list] == [
+            "Unkorrigiert.", "Unkorrigiert.",
+        ]
+        assert story.levels[1].text_de == "Korrigiert."
+
+    @pytest.mark.asyncio
+    @patch("backend.streaming.get_mp3_duration", return_value=8.0)
+    @patch("backend.streaming.assemble_audio")
+    @patch("backend.streaming.generate_tts_chunk", new_callable=AsyncMock)
+    async def test_align_builds_sentence_index(self, mock_tts, mock_assemble, _):
+        text = "Erster Satz. Zweiter Satz."
+        llm = MagicMock()
+        llm.chat.completions.create.side_effect = lambda **kw: (
+            _stream({"text_de": text, "headline_de": "H"})
+            if kw.get("stream") else make_mock_response({"text_en": "Sentence."})
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = Path(tmpdir) / "output" / "content" / "2026-02-23"
+            story = await generate_levels_streaming(
+                SAMPLE_STORY, llm, AsyncMock(), "gpt-4o-mini", "nova", output_dir,
+                validate=False, align=True,
+            )
+
+        # One TTS request per sentence, no grouping, even with STREAM_MIN_CHARS
+        assert mock_tts.call_count == 6
+        index = story.levels[3].sentences
+        assert [text[t.char_start:t.char_end] for t in index] == [
+            "Erster Satz.", "Zweiter Satz.",
+        ]
+        assert (index[0].start, index[1].end) == (0.0, 8.0)
+
+    @pytest.mark.asyncio
+    @patch("backend.streaming.get_mp3_duration", return_value=8.0)
+    @patch("backend.streaming.assemble_audio")
+    @patch("backend.streaming.generate_tts_chunk", new_callable=AsyncMock)
+    async def test_tts_failure_keeps_text(self, mock_tts, mock_assemble, _):
+        llm = MagicMock()
+        llm.chat.completions.create.side_effect = lambda **kw: (
+            _stream({"text_de": "Satz.", "headline_de": "H"})
+            if kw.get("stream") else make_mock_response({"text_en": "Sentence."})
+        )
+        mock_tts.side_effect = Exception("TTS API error")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = Path(tmpdir) / "output" / "content" / "2026-02-23"
+            story = await generate_levels_streaming(
+                SAMPLE_STORY, llm, AsyncMock(), "gpt-4o-mini", "nova", output_dir,
+                validate=False,
+            )
+
+        assert len(story.levels) == 3
+        assert story.levels[1].text_de == "Satz."
+        assert story.levels[1].audio_url is None
+        mock_assemble.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("backend.streaming.get_mp3_duration", return_value=8.0)
+    @patch("backend.streaming.assemble_audio")
+    @patch("backend.streaming.generate_tts_chunk", new_callable=AsyncMock)
+    async def test_escalates_broken_stream(self, mock_tts, mock_assemble, _):
+        routes = parse_routes("c1=small>large", "gpt-4o-mini")
+        llm = MagicMock()
+
+        def create(**kwargs):
+            if kwargs["model"] == "small":
+                # Cut off mid-object: one sentence already went to TTS
+                return _stream({"text_de": "Kaputt. Weiter"})[:-3]
+            if kwargs.get("stream"):
+                return _stream({"text_de": "Satz.", "headline_de": "H"})
+            if kwargs["model"] == "large":
+                return make_mock_response({"text_de": "Repariert.", "headline_de": "H"})
+            return make_mock_response({"text_en": "Sentence."})
+
+        llm.chat.completions.create.side_effect = create
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = Path(tmpdir) / "output" / "content" / "2026-02-23"
+            with patch("backend.streaming.STREAM_MIN_CHARS", 1):
+                story = await generate_levels_streaming(
+                    SAMPLE_STORY, llm, AsyncMock(), routes, "nova", output_dir,
+                    validate=False,
+                )
+
+        assert story.levels[3].text_de == "Repariert."
+        c1_audio = next(
+            c.args[0] for c in mock_assemble.call_args_list
+            if c.args[1].name == "level-3.mp3"
+        )
+        spoken = {c.args[3]: c.args[2] for c in mock_tts.call_args_list}
+        assert [spoken[p] for p in c1_audio] == ["Repariert."]
+
+    @pytest.mark.asyncio
+    @patch("backend.streaming.assemble_audio")
+    @patch("backend.streaming.generate_tts_chunk", new_callable=AsyncMock)
+    async def test_llm_failure_raises(self, mock_tts, mock_assemble):
+        llm = MagicMock()
+        llm.chat.completions.create.side_effect = RuntimeError("LLM API error")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_dir = Path(tmpdir) / "output" / "content" / "2026-02-23"
+            with pytest.raises(RuntimeError, match="LLM API error"):
+                await generate_levels_streaming(
+                    SAMPLE_STORY, llm, AsyncMock(), "gpt-4o-mini", "nova", output_dir,
+                )
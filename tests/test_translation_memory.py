@@ -0,0 +1,73 @@
+from backend.storage import read_json, write_json_atomic
+from backend.translation_memory import TranslationMemory, join, segment
+
+
+class TestSegment:
+    def test_round_trips_separators(self):
+        text = "Erster Satz. Zweiter Satz!\n\nNeuer Absatz? Ja."
+        sentences, separators = segment(text)
+        assert sentences == ["Erster Satz.", "Zweiter Satz!", "Neuer Absatz?", "Ja."]
+        assert join(sentences, separators) == text
+
+    def test_keeps_dates_and_abbreviations_whole(self):
+        text = "Am 3. Oktober wird z. B. gefeiert. Das war 2024. Dann kam Dr. Meier."
+        sentences, separators = segment(text)
+        assert sentences == [
+            "Am 3. Oktober wird z. B. gefeiert.", "Das war 2024.", "Dann kam Dr. Meier.",
+        ]
+        assert join(sentences, separators) == text
+
+
+class TestTranslationMemory:
+    def test_exact_match_ignores_whitespace(self):
+        memory = TranslationMemory()
+        memory.add("Die Bahn streikt.", "The railway is on strike.")
+        assert memory.lookup(" Die  Bahn streikt.") == ("The railway is on strike.", True)
+        assert memory.lookup("Die Post streikt.") is None
+
+    def test_fuzzy_match_for_near_identical_sentences(self):
+        memory = TranslationMemory(similarity=0.95)
+        memory.add(
+            "Der Bundeskanzler reist am Montag zu Gesprächen nach Paris.",
+            "The chancellor travels to Paris for talks on Monday.",
+        )
+        assert memory.lookup(
+            "Der Bundeskanzler reist am Montag zu Gesprächen nach Paris!"
+        ) == ("The chancellor travels to Paris for talks on Monday.", False)
+
+    def test_fuzzy_match_ignores_case_and_quotes(self):
+        memory = TranslationMemory(similarity=0.85)
+        memory.add("Er sagt: „Wir bleiben.“", "He says: 'We are staying.'")
+        assert memory.lookup('Er sagt: "wir bleiben."') == ("He says: 'We are staying.'", False)
+
+    def test_fuzzy_match_requires_same_words(self):
+        memory = TranslationMemory(similarity=0.8)
+        memory.add("Es gibt keine weiteren Opfer.", "There are no further victims.")
+        memory.add("Der Minister sagt das.", "The minister says so.")
+        assert memory.lookup("Es gibt weitere Opfer.") is None
+        # An inflection changes the meaning too
+        assert memory.lookup("Der Minister sagte das.") is None
+
+    def test_fuzzy_match_requires_same_numbers(self):
+        memory = TranslationMemory(similarity=0.9)
+        memory.add("Die Inflation stieg im Mai auf 3 Prozent.", "Inflation rose to 3 percent.")
+        assert memory.lookup("Die Inflation stieg im Mai auf 4 Prozent.") is None
+
+    def test_similarity_one_is_exact_only(self):
+        memory = TranslationMemory(similarity=1.0)
+        memory.add("Es regnet heute.", "It is raining today.")
+        assert memory.lookup("Es regnet heute!") is None
+
+    def test_save_merges_with_file(self, tmp_path):
+        path = tmp_path / "translations.json"
+        memory = TranslationMemory(path)
+        memory.add("Es schneit.", "It is snowing.")
+        # Another worker saved in the meantime
+        write_json_atomic(path, {"schema_version": 1, "sentences": {"Es regnet.": "It rains."}})
+
+        memory.save()
+
+        assert read_json(path)["sentences"] == {
+            "Es regnet.": "It rains.", "Es schneit.": "It is snowing.",
+        }
+        assert TranslationMemory(path).lookup("Es regnet.") == ("It rains.", True)
@@ -0,0 +1,138 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.audio import generate_single_audio
+from backend.tts import (
+    EspeakEngine,
+    OpenAiEngine,
+    TtsEngine,
+    default_engine,
+    make_tts_engine,
+)
+
+
+class FakeEngine(TtsEngine):
+    name = "fake"
+
+    def __init__(self, max_chars=100, max_concurrency=2):
+        super().__init__(max_chars, max_concurrency)
+        self.active = 0
+        self.peak = 0
+        self.texts = []
+
+    async def _synthesize(self, text, voice):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        self.texts.append(text)
+        return f"<{text}>".encode()
+
+
+def _process(stdout=b"", returncode=0, stderr=b""):
+    proc = MagicMock()
+    proc.communicate = AsyncMock(return_value=(stdout, stderr))
+    proc.returncode = returncode
+    return proc
+
+
+class TestTtsEngine:
+    @pytest.mark.asyncio
+    async def test_limits_concurrency(self):
+        engine = FakeEngine(max_concurrency=2)
+        await asyncio.gather(*(engine.synthesize(f"Satz {i}.", "nova") for i in range(6)))
+        assert engine.peak == 2
+        assert len(engine.texts) == 6
+
+    @pytest.mark.asyncio
+    async def test_rejects_text_over_max_chars(self):
+        with pytest.raises(ValueError, match="at most 10"):
+            await FakeEngine(max_chars=10).synthesize("Ein zu langer Satz.", "nova")
+
+
+class TestGenerateSingleAudioWithEngine:
+    @pytest.mark.asyncio
+    @patch("backend.audio.get_mp3_duration", return_value=4.0)
+    @patch("backend.audio.concat_mp3s")
+    @patch("backend.audio.encode_renditions")
+    async def test_chunks_to_engine_limit(self, mock_encode, mock_concat, _, tmp_path):
+        engine = FakeEngine(max_chars=20)
+        written = []
+        mock_concat.side_effect = lambda paths, out: written.extend(
+            p.read_bytes() for p in paths
+        )
+
+        _, duration = await generate_single_audio(
+            None, "nova", "Erster Satz hier. Zweiter Satz hier.",
+            tmp_path / "level-1.mp3", engine=engine,
+        )
+
+        assert sorted(engine.texts) == ["Erster Satz hier.", "Zweiter Satz hier."]
+        assert written == [b"<Erster Satz hier.>", b"<Zweiter Satz hier.>"]
+        assert duration == 4.0
+
+
+class TestOpenAiEngine:
+    @pytest.mark.asyncio
+    async def test_returns_response_bytes(self):
+        client = AsyncMock()
+        client.audio.speech.create.return_value = MagicMock(content=b"mp3")
+
+        audio = await OpenAiEngine(client).synthesize("Hallo", "nova")
+
+        assert audio == b"mp3"
+        client.audio.speech.create.assert_called_once_with(
+            model="tts-1", voice="nova", input="Hallo",
+        )
+
+    def test_default_engine_is_shared_per_client(self):
+        client = AsyncMock()
+        assert default_engine(client) is default_engine(client)
+        assert default_engine(client) is not default_engine(AsyncMock())
+
+    def test_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            TtsEngine(max_chars=10, max_concurrency=1)
+
+
+class TestEspeakEngine:
+    @pytest.mark.asyncio
+    async def test_pipes_espeak_through_ffmpeg(self):
+        procs = [_process(b"RIFF wav"), _process(b"mp3")]
+        with patch(
+            "backend.tts.asyncio.create_subprocess_exec", side_effect=procs,
+        ) as mock_exec:
+            audio = await EspeakEngine(voice="de").synthesize("Hallo Welt.", "nova")
+
+        assert audio == b"mp3"
+        espeak_cmd, ffmpeg_cmd = (c.args for c in mock_exec.call_args_list)
+        assert espeak_cmd[:3] == ("espeak-ng", "-v", "de")
+        assert "--stdout" in espeak_cmd
+        assert ffmpeg_cmd[0] == "ffmpeg"
+        procs[0].communicate.assert_called_once_with(b"Hallo Welt.")
+        procs[1].communicate.assert_called_once_with(b"RIFF wav")
+
+    @pytest.mark.asyncio
+    async def test_raises_on_failure(self):
+        with (
+            patch(
+                "backend.tts.asyncio.create_subprocess_exec",
+                return_value=_process(returncode=1, stderr=b"no voice"),
+            ),
+            pytest.raises(RuntimeError, match="no voice"),
+        ):
+            await EspeakEngine().synthesize("Hallo.", "nova")
+
+
+class TestMakeTtsEngine:
+    def test_selects_engine(self):
+        assert isinstance(make_tts_engine({}, MagicMock()), OpenAiEngine)
+        engine = make_tts_engine({"tts_engine": "espeak", "espeak_voice": "de+f3"}, None)
+        assert isinstance(engine, EspeakEngine)
+        assert engine.voice == "de+f3"
+
+    def test_rejects_unknown_engine(self):
+        with pytest.raises(ValueError, match="Unknown TTS engine"):
+            make_tts_engine({"tts_engine": "say"}, None)
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+from backend.models import RawStory
+from backend.storage import read_json
+from backend.watch import SeenIds, poll_once, publish_story
+from tests.factories import make_processed_story, make_raw_story
+
+
+def _raw(story_id: str, hour: int) -> RawStory:
+    return make_raw_story(story_id, published_date=datetime(2026, 2, 23, hour))
+
+
+class TestSeenIds:
+    def test_persists_across_instances(self, tmp_path):
+        seen = SeenIds(tmp_path, "2026-02-23")
+        assert [s.id for s in seen.add_new([_raw("1", 8), _raw("2", 9)])] == ["1", "2"]
+        assert seen.add_new([_raw("2", 9)]) == []
+        seen.done("1")
+        seen.done("2")
+
+        again = SeenIds(tmp_path, "2026-02-23")
+        assert [s.id for s in again.add_new([_raw("2", 9), _raw("3", 10)])] == ["3"]
+        assert again.published["1"] == _raw("1", 8)
+        assert SeenIds(tmp_path, "2026-02-24").published == {}
+
+    def test_failed_story_is_queued_again(self, tmp_path):
+        seen = SeenIds(tmp_path, "2026-02-23")
+        seen.add_new([_raw("1", 8)])
+        seen.release("1")
+
+        assert [s.id for s in seen.add_new([_raw("1", 8)])] == ["1"]
+        # Not persisted until published
+        assert SeenIds(tmp_path, "2026-02-23").published == {}
+
+
+class TestPublishStory:
+    def test_newest_first_with_eviction(self, tmp_path):
+        content_dir = tmp_path / "content" / "2026-02-23"
+        (content_dir / "old").mkdir(parents=True)
+        (content_dir / "old" / "level-1.mp3").write_bytes(b"x")
+
+        publish_story(make_processed_story("old"), content_dir, "2026-02-23", 2)
+        publish_story(make_processed_story("mid"), content_dir, "2026-02-23", 2)
+        evicted = publish_story(make_processed_story("new"), content_dir, "2026-02-23", 2)
+
+        assert evicted == ["old"]
+        assert not (content_dir / "old").exists()
+        latest = read_json(tmp_path / "content" / "latest.json")
+        assert [s["id"] for s in latest["stories"]] == ["new", "mid"]
+        assert latest == read_json(content_dir / "digest.json")
+
+    def test_republishing_replaces_story(self, tmp_path):
+        content_dir = tmp_path / "2026-02-23"
+        publish_story(make_processed_story("a"), content_dir, "2026-02-23", 5)
+        publish_story(make_processed_story("b"), content_dir, "2026-02-23", 5)
+        publish_story(make_processed_story("a"), content_dir, "2026-02-23", 5)
+
+        digest = read_json(content_dir / "digest.json")
+        assert [s["id"] for s in digest["stories"]] == ["a", "b"]
+
+    def test_links_glossary_shard(self, tmp_path):
+        content_dir = tmp_path / "2026-02-23"
+        publish_story(make_processed_story("a"), content_dir, "2026-02-23", 5)
+        assert "glossary" not in read_json(content_dir / "digest.json")
+
+        (content_dir / "glossary.json").write_text("{}")
+        publish_story(make_processed_story("b"), content_dir, "2026-02-23", 5)
+        assert read_json(content_dir / "digest.json")["glossary"] == "2026-02-23/glossary.json"
+
+
+class TestPollOnce:
+    @patch("backend.watch.fetch_stories")
+    def test_queues_unseen_stories_newest_first(self, mock_fetch, tmp_path):
+        seen = SeenIds(tmp_path, "2026-02-23")
+        seen.add_new([_raw("old", 6)])
+        mock_fetch.return_value = [_raw("a", 7), _raw("b", 11)]
+
+        async def run():
+            queue = asyncio.PriorityQueue()
+            count = await poll_once(queue, seen, {"feeds": None}, 20)
+            return count, [queue.get_nowait()[3].id for _ in range(queue.qsize())]
+
+        count, order = asyncio.run(run())
+
+        assert count == 2
+        assert order == ["b", "a"]
+        assert mock_fetch.call_args.kwargs["skip_ids"] == {"old"}
+        # In-progress and published stories are deduped against
+        assert [s.id for s in mock_fetch.call_args.kwargs["published"]] == ["old"]
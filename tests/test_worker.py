@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from backend.worker import (
+    FileQueue,
+    merge,
+    raw_story_from_dict,
+    raw_story_to_dict,
+    run_worker,
+)
+from tests.factories import make_processed_story, make_raw_story
+
+CONFIG = {
+    "api_key": "test-key",
+    "llm_model": "gpt-4o-mini",
+    "tts_voice": "nova",
+    "max_stories": 3,
+}
+
+
+class TestRawStorySerialization:
+    def test_roundtrip(self):
+        raw = make_raw_story("111")
+        assert raw_story_from_dict(json.loads(json.dumps(raw_story_to_dict(raw)))) == raw
+
+
+class TestFileQueue:
+    def test_each_job_claimed_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            FileQueue(root).init("2026-02-23")
+            FileQueue(root).enqueue([make_raw_story("111"), make_raw_story("222")])
+
+            # Two independent queue handles, as two worker processes would have
+            a, b = FileQueue(root), FileQueue(root)
+            claims = [a.claim(), b.claim(), a.claim(), b.claim()]
+
+            names = [c.name for c in claims if c is not None]
+            assert len(names) == 2
+            assert len(set(names)) == 2
+            assert not list(a.pending.glob("*.json"))
+
+    def test_claims_in_feed_order(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = FileQueue(Path(tmpdir))
+            queue.init("2026-02-23")
+            queue.enqueue([make_raw_story("222"), make_raw_story("111")])
+
+            first = queue.claim()
+            assert json.loads(first.read_text())["id"] == "222"
+
+    def test_requeue_stale(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = FileQueue(Path(tmpdir))
+            queue.init("2026-02-23")
+            queue.enqueue([make_raw_story("111")])
+            claim = queue.claim()
+            assert queue.requeue_stale(max_age=60) == 0
+
+            old = time.time() - 120
+            os.utime(claim, (old, old))
+            assert queue.requeue_stale(max_age=60) == 1
+            assert queue.claim() is not None
+
+    def test_claim_lost_to_requeue_is_skipped(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = FileQueue(Path(tmpdir))
+            queue.init("2026-02-23")
+            queue.enqueue([make_raw_story("111"), make_raw_story("222")])
+
+            # The first claim is moved back right after the rename
+            with patch("backend.worker.os.utime", side_effect=[FileNotFoundError, None]):
+                claim = queue.claim()
+
+            assert json.loads(claim.read_text())["id"] == "222"
+
+
+class TestRunWorker:
+    @pytest.mark.asyncio
+    @patch("backend.worker.make_clients", return_value=(None, None))
+    @patch("backend.worker.build.process_story")
+    async def test_processes_and_records_failures(self, mock_process, _):
+        async def process(raw, *args):
+            if raw.id == "222":
+                raise RuntimeError("LLM error")
+            return make_processed_story(raw.id)
+
+        mock_process.side_effect = process
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = FileQueue(Path(tmpdir) / "queue")
+            queue.init("2026-02-23")
+            queue.enqueue([make_raw_story(i) for i in ("111", "222", "333")])
+
+            count = await run_worker(queue, CONFIG, Path(tmpdir) / "output")
+
+            assert count == 2
+            assert [p.name for p in queue.result_paths()] == [
+                "00000-111.json", "00002-333.json",
+            ]
+            failed = list(queue.failed.glob("*.json"))
+            assert len(failed) == 1
+            assert "LLM error" in json.loads(failed[0].read_text())["error"]
+            assert not list(queue.claimed.glob("*.json"))
+
+    @pytest.mark.asyncio
+    @patch("backend.worker.HEARTBEAT_SECONDS", 0.01)
+    @patch("backend.worker.make_clients", return_value=(None, None))
+    @patch("backend.worker.build.process_story")
+    async def test_heartbeat_keeps_long_claims_fresh(self, mock_process, _):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = FileQueue(Path(tmpdir) / "queue")
+            queue.init("2026-02-23")
+            queue.enqueue([make_raw_story("111")])
+            requeued = []
+
+            async def process(raw, *args):
+                claim = next(queue.claimed.glob("*.json"))
+                old = time.time() - 120
+                os.utime(claim, (old, old))
+                await asyncio.sleep(0.05)
+                requeued.append(queue.requeue_stale(max_age=60))
+                return make_processed_story(raw.id)
+
+            mock_process.side_effect = process
+
+            assert await run_worker(queue, CONFIG, Path(tmpdir) / "output") == 1
+            assert requeued == [0]
+
+
+class TestMerge:
+    def test_writes_digest_in_feed_order(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = FileQueue(Path(tmpdir) / "queue")
+            queue.init("2026-02-23")
+            queue.enqueue([make_raw_story("111"), make_raw_story("222")])
+            claims = [queue.claim(), queue.claim()]
+            # Finish out of order, as parallel workers would
+            queue.complete(claims[1], make_processed_story("222"))
+            queue.complete(claims[0], make_processed_story("111"))
+
+            output_dir = Path(tmpdir) / "output"
+            merge(queue, output_dir)
+
+            digest = json.loads(
+                (output_dir / "content" / "2026-02-23" / "digest.json").read_text()
+            )
+            assert digest["schema_version"] == 1
+            assert digest["date"] == "2026-02-23"
+            assert [s["id"] for s in digest["stories"]] == ["111", "222"]
+            assert digest["stories"][0]["levels"]["1"]["text_de"] == "Einfach"
+
+    def test_no_results_raises(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = FileQueue(Path(tmpdir))
+            queue.init("2026-02-23")
+            with pytest.raises(RuntimeError, match="No story results"):
+                merge(queue, Path(tmpdir) / "output")